@@ -1,155 +1,49 @@
 #!/usr/bin/env python3
 """
 System Architecture Diagram Generator
-Requires: pip install diagrams
+Renders SVG diagrams with the repository's native renderer
+No external dependencies required (no `diagrams`, no Graphviz)
 """
 
-from diagrams import Diagram, Cluster, Edge
-from diagrams.k8s.compute import Pod, Deployment
-from diagrams.k8s.network import Service, Ingress
-from diagrams.k8s.storage import PV, PVC, StorageClass
-from diagrams.onprem.client import Users
-from diagrams.onprem.network import Internet
-from diagrams.programming.language import Python
-from diagrams.onprem.monitoring import Grafana, Prometheus
-from diagrams.generic.network import VPN
-from diagrams.aws.storage import EBS
+import sys
+from pathlib import Path
 
-def create_system_architecture():
-    """Generate complete system architecture diagram"""
-    
-    with Diagram("Ollama Kubernetes Stack - System Architecture", 
-                 filename="docs/architecture/diagrams/generated/system_architecture",
-                 show=False, direction="TB"):
-        
-        # External Access
-        users = Users("Users")
-        internet = Internet("Internet/LAN")
-        tailscale = VPN("Tailscale Mesh\n100.102.114.95")
-        
-        with Cluster("Kubernetes Cluster (MicroK8s)"):
-            
-            with Cluster("LoadBalancer (MetalLB)"):
-                webui_lb = Service("OpenWebUI LB\n192.168.1.101:8080")
-                grafana_lb = Service("Grafana LB\n192.168.1.102:3000")
-            
-            with Cluster("ollama-stack Namespace"):
-                
-                with Cluster("AI Processing"):
-                    ollama_svc = Service("Ollama Service\nClusterIP")
-                    ollama_pod = Pod("Ollama Pod\nAI Inference")
-                    
-                with Cluster("Web Interface"):
-                    webui_svc = Service("WebUI Service")
-                    webui_pod = Pod("OpenWebUI Pod\nWeb Interface")
-                
-                with Cluster("Storage"):
-                    storage_class = StorageClass("Custom StorageClass\n/mnt/evo4t")
-                    ollama_pvc = PVC("Models PVC\n1TB NVMe SSD")
-                    webui_pvc = PVC("WebUI PVC\nChat Data")
-            
-            with Cluster("observability Namespace"):
-                prometheus = Prometheus("Prometheus\nMetrics Collection")
-                grafana_pod = Pod("Grafana Pod\nDashboards")
-        
-        # Hardware Layer
-        with Cluster("Hardware Infrastructure"):
-            nvme_storage = EBS("1TB NVMe SSD\n/mnt/evo4t")
-            cpu = Python("AMD Ryzen AI 9 HX 370\n96GB")
-        
-        # Connections
-        users >> internet >> webui_lb
-        users >> tailscale >> webui_pod
-        users >> internet >> grafana_lb
-        
-        webui_lb >> webui_svc >> webui_pod
-        webui_pod >> ollama_svc >> ollama_pod
-        
-        grafana_lb >> grafana_pod
-        prometheus >> grafana_pod
-        ollama_pod >> Edge(label="metrics") >> prometheus
-        
-        storage_class >> ollama_pvc >> ollama_pod
-        storage_class >> webui_pvc >> webui_pod
-        storage_class >> nvme_storage
-        
-        ollama_pod >> cpu
+REPO_ROOT = Path(__file__).resolve().parents[3]
+OUTPUT_DIR = REPO_ROOT / "docs" / "architecture" / "diagrams" / "generated"
 
-def create_network_flow():
-    """Generate network flow diagram"""
-    
-    with Diagram("Network Flow Architecture", 
-                 filename="docs/architecture/diagrams/generated/network_flow",
-                 show=False, direction="LR"):
-        
-        users = Users("External Users")
-        
-        with Cluster("Entry Points"):
-            internet = Internet("Internet/LAN")
-            tailscale = VPN("Tailscale\n100.102.114.95")
-        
-        with Cluster("Load Balancing"):
-            metallb = Service("MetalLB\nBare Metal LB")
-        
-        with Cluster("Kubernetes Services"):
-            webui_svc = Service("OpenWebUI\n192.168.1.101:8080")
-            grafana_svc = Service("Grafana\n192.168.1.102:3000")
-            ollama_internal = Service("Ollama Internal\nClusterIP")
-        
-        with Cluster("Application Pods"):
-            webui_pod = Pod("OpenWebUI")
-            ollama_pod = Pod("Ollama AI")
-            grafana_pod = Pod("Grafana")
-        
-        # Flow connections
-        users >> internet >> metallb
-        users >> tailscale >> webui_pod
-        
-        metallb >> webui_svc >> webui_pod
-        metallb >> grafana_svc >> grafana_pod
-        
-        webui_pod >> ollama_internal >> ollama_pod
+CONFIG = {
+    "project_name": 'Ollama Kubernetes Stack',
+    "kubernetes": {'cluster_type': 'MicroK8s', 'namespaces': ['ollama-stack', 'observability']},
+    "services": {'openwebui': {'external_ip': '192.168.1.101', 'port': 8080, 'namespace': 'ollama-stack'}, 'grafana': {'external_ip': '192.168.1.102', 'port': 3000, 'namespace': 'observability'}, 'tailscale': {'ip': '100.102.114.95', 'port': 8080}},
+    "hardware": {'cpu': 'AMD Ryzen AI 9 HX 370', 'ram': '96GB', 'storage': '1TB NVMe SSD', 'mount_path': '/mnt/evo4t'},
+    "ai_models": ['CodeLlama', 'Llama3.2:3b', 'Gemma2:4b'],
+}
 
-def create_data_flow():
-    """Generate data flow and processing diagram"""
-    
-    with Diagram("AI Data Processing Flow", 
-                 filename="docs/architecture/diagrams/generated/data_flow",
-                 show=False, direction="TB"):
-        
-        user_input = Users("User Input\nChat/API Requests")
-        
-        with Cluster("Web Layer"):
-            webui = Pod("OpenWebUI\nRequest Processing")
-        
-        with Cluster("AI Processing Layer"):
-            ollama_api = Service("Ollama API\nModel Management")
-            ai_models = Pod("AI Models\nCodeLlama, Llama3.2:3b, Gemma2:4b")
-        
-        with Cluster("Storage Layer"):
-            model_storage = PVC("Model Storage\n1TB NVMe SSD")
-            chat_storage = PVC("Chat History\nWebUI Data")
-        
-        with Cluster("Monitoring Layer"):
-            metrics = Prometheus("Metrics\nCollection")
-            dashboards = Grafana("Dashboards\nVisualization")
-        
-        # Data flow
-        user_input >> webui >> ollama_api >> ai_models
-        ai_models >> model_storage
-        webui >> chat_storage
-        
-        ai_models >> Edge(label="performance metrics") >> metrics
-        webui >> Edge(label="usage metrics") >> metrics
-        metrics >> dashboards
 
-if __name__ == "__main__":
-    print("🎨 Generating Python architecture diagrams...")
-    create_system_architecture()
-    create_network_flow() 
-    create_data_flow()
-    print("✅ Python diagrams generated successfully!")
+def main():
+    """Render the architecture diagrams; renderers are imported only when needed"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate architecture diagrams")
+    parser.add_argument("--format", "-f", nargs="+", choices=["ascii", "mermaid", "svg"], default=["svg"],
+                        dest="formats", help="Formats to render (default: svg)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(REPO_ROOT / "scripts" / "documentation"))
+    from diagram_backends import render_formats
+    from svg_renderer import LayoutCache
+
+    print("🎨 Generating architecture diagrams...")
+    start = time.perf_counter()
+    cache = LayoutCache(OUTPUT_DIR / ".layout-cache.json")
+    written = render_formats(CONFIG, OUTPUT_DIR, args.formats, cache=cache)
+    cache.save()
+    print(f"✅ Diagrams generated in {(time.perf_counter() - start) * 1000:.1f} ms")
     print("📁 Generated files:")
-    print("   - docs/architecture/diagrams/generated/system_architecture.png")
-    print("   - docs/architecture/diagrams/generated/network_flow.png") 
-    print("   - docs/architecture/diagrams/generated/data_flow.png")
+    for path in written:
+        print(f"   - {path.relative_to(REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
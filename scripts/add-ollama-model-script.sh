@@ -13,6 +13,11 @@ set -e
 # Configuration
 NAMESPACE="ollama-stack"
 DEPLOYMENT="ollama"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+SYNC_PORT="${SYNC_PORT:-11439}"
+MODEL_DISK_PATH="${MODEL_DISK_PATH:-/mnt/evo4t}"
+OLLAMA_MEMORY_LIMIT="${OLLAMA_MEMORY_LIMIT:-64Gi}"
+OLLAMA_NUM_PARALLEL="${OLLAMA_NUM_PARALLEL:-4}"
 
 # Color codes for output
 RED='\033[0;31m'
@@ -50,6 +55,8 @@ show_usage() {
     echo "  -add <model-name>          Add/download a new model"
     echo "  -delete <model-name>       Delete an existing model"
     echo "  -potential                 Show popular models that can be installed"
+    echo "  -sync [values-file...]     Reconcile models with ollama.models in values.yaml"
+    echo "  -plan [values-file...]     Show what -sync would change"
     echo "  -h, --help                 Show this help message"
     echo ""
     echo "Examples:"
@@ -57,6 +64,7 @@ show_usage() {
     echo "  $0 -add llama3.2:7b         # Download Llama 3.2 7B"
     echo "  $0 -delete codellama:13b    # Remove CodeLlama 13B"
     echo "  $0 -potential               # Show available models"
+    echo "  $0 -sync                    # Install/remove models to match values.yaml"
     echo ""
     echo "Quick usage (backwards compatible):"
     echo "  $0 llama3.2:7b              # Same as -add llama3.2:7b"
@@ -229,6 +237,15 @@ delete_model() {
 estimate_model_size() {
     local model_name="$1"
     local size_estimate=""
+
+    # Real size from the registry manifest when the estimator is available
+    if command -v python3 &> /dev/null && [ -f "$SCRIPT_DIR/ollama/model_estimator.py" ]; then
+        size_estimate=$(python3 "$SCRIPT_DIR/ollama/model_estimator.py" "$model_name" --format size 2>/dev/null)
+        if [ -n "$size_estimate" ] && [ "$size_estimate" != "Unknown" ]; then
+            echo "$size_estimate"
+            return
+        fi
+    fi
     
     case "$model_name" in
         *"3b"*)    size_estimate="~2GB" ;;
@@ -246,6 +263,28 @@ estimate_model_size() {
     echo "$size_estimate"
 }
 
+# Function to check that a model fits on disk and within the pod memory limit
+check_model_fits() {
+    local model_name="$1"
+
+    if ! command -v python3 &> /dev/null || [ ! -f "$SCRIPT_DIR/ollama/model_estimator.py" ]; then
+        return 0
+    fi
+
+    local rc=0
+    python3 "$SCRIPT_DIR/ollama/model_estimator.py" "$model_name" --check \
+        --disk-path "$MODEL_DISK_PATH" \
+        --memory-limit "$OLLAMA_MEMORY_LIMIT" \
+        --num-parallel "$OLLAMA_NUM_PARALLEL" || rc=$?
+    case $rc in
+        0) return 0 ;;
+        1) print_error "Model '$model_name' will not fit; not downloading it"
+           return 1 ;;
+        *) print_warning "Could not estimate '$model_name' from its manifest; size checks skipped"
+           return 0 ;;
+    esac
+}
+
 # Function to add the model
 add_model() {
     local model_name="$1"
@@ -254,6 +293,11 @@ add_model() {
     print_info "Preparing to download model: $model_name"
     print_info "Estimated size: $estimated_size"
     echo ""
+
+    if ! check_model_fits "$model_name"; then
+        exit 1
+    fi
+    echo ""
     
     # Ask for confirmation for large models
     if [[ "$estimated_size" == *"GB"* ]] && [[ ${estimated_size//[!0-9]/} -gt 10 ]]; then
@@ -297,6 +341,33 @@ add_model() {
     print_info "Access your AI stack at: http://192.168.1.101:8080"
 }
 
+# Function to reconcile installed models with the declarative list in values.yaml
+sync_models() {
+    local dry_run="$1"
+    shift
+    local values_args=()
+    for values_file in "$@"; do
+        values_args+=(-f "$values_file")
+    done
+
+    if ! command -v python3 &> /dev/null; then
+        print_error "python3 is required for model reconciliation"
+        return 1
+    fi
+
+    microk8s kubectl port-forward -n "$NAMESPACE" deployment/"$DEPLOYMENT" "$SYNC_PORT:11434" >/dev/null 2>&1 &
+    local pf_pid=$!
+    trap "kill $pf_pid 2>/dev/null" EXIT
+    for _ in $(seq 1 20); do
+        curl -s -o /dev/null "http://127.0.0.1:$SYNC_PORT/" && break
+        sleep 0.5
+    done
+
+    print_info "Reconciling models with ollama.models..."
+    python3 "$SCRIPT_DIR/ollama/model_reconciler.py" "${values_args[@]}" \
+        --url "http://127.0.0.1:$SYNC_PORT" $dry_run
+}
+
 # Function to validate model name
 validate_model_name() {
     local model_name="$1"
@@ -360,6 +431,14 @@ main() {
             echo ""
             add_model "$2"
             ;;
+        -sync)
+            shift
+            sync_models "" "$@"
+            ;;
+        -plan)
+            shift
+            sync_models "--dry-run" "$@"
+            ;;
         -delete)
             if [ -z "$2" ]; then
                 print_error "No model name provided for deletion."
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+CLI Cold-Start Benchmark
+Times documentation CLI commands in fresh interpreters and checks that
+light commands do not import heavy modules
+
+Exits non-zero when a command exceeds its startup budget (time over a bare
+`python -c pass`) or imports a module it should not need, so it can run as
+a CI step.
+"""
+
+import os
+import sys
+import time
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+GENERATOR = SCRIPT_DIR / "documentation_generator.py"
+DIAGRAM_SCRIPT = REPO_ROOT / "docs" / "architecture" / "diagrams" / "generate_python_diagrams.py"
+
+# Modules only the rendering code paths need
+HEAVY_MODULES = {
+    "concurrent.futures", "multiprocessing", "subprocess", "json", "hashlib", "xml.sax",
+    "doc_templates", "build_manifest", "section_cache", "cluster_snapshot",
+    "diagram_topology", "diagram_backends", "svg_renderer", "simple_diagram_generator",
+}
+
+# Case name -> (command line, modules that must not be imported)
+CASES: Dict[str, Tuple[List[str], set]] = {
+    "--help": ([str(GENERATOR), "--help"], HEAVY_MODULES),
+    "docs --help": ([str(GENERATOR), "docs", "--help"], HEAVY_MODULES),
+    "diagrams --help": ([str(GENERATOR), "diagrams", "--help"], HEAVY_MODULES),
+    "ascii --help": ([str(GENERATOR), "ascii", "--help"], HEAVY_MODULES),
+    "tree": ([str(GENERATOR), "tree", "--base-dir", "{tmp}"], HEAVY_MODULES),
+    "generate_python_diagrams --help": ([str(DIAGRAM_SCRIPT), "--help"], HEAVY_MODULES),
+}
+
+
+def _run(args: List[str]) -> Tuple[float, str]:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited {result.returncode}: {result.stderr.strip()}")
+    return elapsed, result.stderr
+
+
+def imported_modules(args: List[str]) -> set:
+    """Modules imported by a command, from `python -X importtime`"""
+    _, stderr = _run(["-X", "importtime"] + args)
+    modules = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def measure(args: List[str], runs: int) -> float:
+    """Median wall time in milliseconds over fresh interpreters"""
+    return statistics.median(_run(args)[0] for _ in range(runs))
+
+
+def main():
+    """Benchmark CLI cold start and enforce the budget"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark documentation CLI cold start')
+    parser.add_argument('--runs', '-n', type=int, default=7, help='Fresh interpreters per case (default: 7)')
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help='Allowed startup time over a bare interpreter, in ms (default: 100)')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help='Cases to run (default: all)')
+    args = parser.parse_args()
+
+    baseline = measure(["-c", "pass"], args.runs)
+    print(f"⏱️  Bare interpreter: {baseline:.1f} ms (median of {args.runs})")
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "docs"))
+        for name in args.cases or CASES:
+            command, forbidden = CASES[name]
+            command = [arg.format(tmp=tmp) for arg in command]
+            overhead = measure(command, args.runs) - baseline
+            leaked = sorted(forbidden & imported_modules(command))
+            ok = overhead <= args.budget_ms and not leaked
+            print(f"   {'✅' if ok else '❌'} {name:<34} +{overhead:6.1f} ms")
+            if overhead > args.budget_ms:
+                failures.append(f"{name}: {overhead:.1f} ms over budget of {args.budget_ms:.0f} ms")
+            if leaked:
+                failures.append(f"{name}: imports {', '.join(leaked)}")
+
+    if failures:
+        print("\n❌ Startup regressions:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("\n✅ CLI startup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Documentation Build Manifest
+Tracks the inputs of every generated file so unchanged outputs can be skipped
+"""
+
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+MANIFEST_VERSION = 1
+
+
+def hash_config(config: Dict[str, Any]) -> str:
+    """Stable hash of a documentation config dictionary"""
+    encoded = json.dumps(config, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Hash a template or rendered document"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_file(path: Path) -> Optional[str]:
+    """Hash a file on disk, or None if it does not exist"""
+    if not path.is_file():
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """Per-output record of config hash, template hash and output hash"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self._load()
+
+    def _load(self):
+        """Load an existing manifest, ignoring unreadable or outdated files"""
+        if not self.path.is_file():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.entries = data.get('outputs', {})
+
+    def is_fresh(self, output: str, config_hash: str, template_hash: str, file_path: Path) -> bool:
+        """True when the output exists untouched and was built from the same inputs"""
+        entry = self.entries.get(output)
+        if not entry:
+            return False
+        if entry.get('config') != config_hash or entry.get('template') != template_hash:
+            return False
+        return hash_file(file_path) == entry.get('output')
+
+    def record(self, output: str, config_hash: str, template_hash: str, output_hash: str):
+        """Remember the inputs and result of a successful build"""
+        self.entries[output] = {
+            'config': config_hash,
+            'template': template_hash,
+            'output': output_hash,
+        }
+
+    def save(self):
+        """Persist the manifest next to the generated documentation"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'version': MANIFEST_VERSION, 'outputs': self.entries}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
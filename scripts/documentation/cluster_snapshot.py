@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Cluster Snapshot Data Source
+Builds documentation config from the live cluster instead of hard-coded values
+
+Collectors (services, PVCs, pods, nodes, models) each run once, in parallel,
+and the reduced result is persisted to a snapshot file with a TTL so repeated
+documentation builds read the snapshot instead of re-querying the cluster.
+A recorded fixture of raw command output can stand in for the cluster.
+"""
+
+import copy
+import json
+import time
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional
+
+SNAPSHOT_VERSION = 1
+DEFAULT_TTL = 300
+
+# Collector name -> command producing its raw output
+COMMANDS = {
+    "services": ["get", "services", "-n", "{namespace}", "-o", "json"],
+    "pvcs": ["get", "pvc", "-n", "{namespace}", "-o", "json"],
+    "pods": ["get", "pods", "-n", "{namespace}", "-o", "json"],
+    "nodes": ["get", "nodes", "-o", "json"],
+    "models": ["exec", "-n", "{namespace}", "deployment/ollama", "--", "ollama", "list"],
+}
+# Collectors run once per configured namespace, their items joined into one list
+PER_NAMESPACE = {"services", "pvcs", "pods"}
+
+
+class SnapshotError(Exception):
+    """Raised when the cluster cannot be queried"""
+
+
+def kubectl_runner(kubectl: str = "kubectl", context: Optional[str] = None,
+                   namespace: str = "ollama-stack", timeout: int = 30,
+                   namespaces: Optional[List[str]] = None) -> Callable[[str], str]:
+    """Runner that executes a collector's command with kubectl, within the configured namespaces (default: the
+    Ollama namespace) so only namespace-scoped read access is needed"""
+    def execute(collector: str, scope: str) -> str:
+        args = [arg.format(namespace=scope) for arg in COMMANDS[collector]]
+        cmd = kubectl.split() + (["--context", context] if context else []) + args
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise SnapshotError(f"{collector}: {e}") from e
+        if result.returncode != 0:
+            raise SnapshotError(f"{collector}: {result.stderr.strip()}")
+        return result.stdout
+
+    def run(collector: str) -> str:
+        if collector not in PER_NAMESPACE:
+            return execute(collector, namespace)
+        items = [item for scope in (namespaces or [namespace])
+                 for item in json.loads(execute(collector, scope)).get("items", [])]
+        return json.dumps({"items": items})
+    return run
+
+
+def fixture_runner(fixture_path: str) -> Callable[[str], str]:
+    """Runner that replays raw command output recorded in a fixture file"""
+    with open(fixture_path, 'r', encoding='utf-8') as f:
+        recorded = json.load(f)
+
+    def run(collector: str) -> str:
+        output = recorded[collector]
+        return output if isinstance(output, str) else json.dumps(output)
+    return run
+
+
+def _items(raw: str, namespaces: List[str]) -> List[Dict[str, Any]]:
+    items = json.loads(raw).get("items", [])
+    if not namespaces:
+        return items
+    return [item for item in items if item["metadata"].get("namespace") in namespaces]
+
+
+def parse_services(raw: str, namespaces: List[str]) -> List[Dict[str, Any]]:
+    services = []
+    for item in _items(raw, namespaces):
+        ingress = item.get("status", {}).get("loadBalancer", {}).get("ingress") or [{}]
+        services.append({
+            "name": item["metadata"]["name"],
+            "namespace": item["metadata"]["namespace"],
+            "type": item["spec"].get("type", "ClusterIP"),
+            "cluster_ip": item["spec"].get("clusterIP"),
+            "external_ip": ingress[0].get("ip") or ingress[0].get("hostname"),
+            "ports": [port["port"] for port in item["spec"].get("ports", [])],
+        })
+    return services
+
+
+def parse_pvcs(raw: str, namespaces: List[str]) -> List[Dict[str, Any]]:
+    return [{
+        "name": item["metadata"]["name"],
+        "namespace": item["metadata"]["namespace"],
+        "phase": item.get("status", {}).get("phase"),
+        "size": item["spec"].get("resources", {}).get("requests", {}).get("storage"),
+        "storage_class": item["spec"].get("storageClassName"),
+    } for item in _items(raw, namespaces)]
+
+
+def parse_pods(raw: str, namespaces: List[str]) -> List[Dict[str, Any]]:
+    pods = []
+    for item in _items(raw, namespaces):
+        statuses = item.get("status", {}).get("containerStatuses", [])
+        pods.append({
+            "name": item["metadata"]["name"],
+            "namespace": item["metadata"]["namespace"],
+            "app": item["metadata"].get("labels", {}).get("app"),
+            "phase": item.get("status", {}).get("phase"),
+            "node": item["spec"].get("nodeName"),
+            "ready": bool(statuses) and all(s.get("ready") for s in statuses),
+        })
+    return pods
+
+
+def parse_nodes(raw: str, namespaces: List[str]) -> List[Dict[str, Any]]:
+    return [{
+        "name": item["metadata"]["name"],
+        "cpu": item.get("status", {}).get("capacity", {}).get("cpu"),
+        "memory": item.get("status", {}).get("capacity", {}).get("memory"),
+    } for item in json.loads(raw).get("items", [])]
+
+
+def parse_models(raw: str, namespaces: List[str]) -> List[Dict[str, Any]]:
+    """Parse the NAME / ID / SIZE / MODIFIED table printed by `ollama list`"""
+    models = []
+    for line in raw.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        models.append({
+            "name": fields[0],
+            "id": fields[1],
+            "size": f"{fields[2]} {fields[3]}",
+            "modified": " ".join(fields[4:]),
+        })
+    return models
+
+
+PARSERS = {
+    "services": parse_services,
+    "pvcs": parse_pvcs,
+    "pods": parse_pods,
+    "nodes": parse_nodes,
+    "models": parse_models,
+}
+
+# Runtime fields that change without the deployment changing ("3 days ago" included); kept out of the
+# config so its hash, and with it the build manifest, only moves when the documented cluster does
+VOLATILE_FIELDS = {
+    "pods": ("phase", "ready"),
+    "models": ("modified",),
+}
+
+
+class ClusterSnapshot:
+    """Collects a reduced view of the cluster, cached on disk for a TTL"""
+
+    def __init__(self, runner: Callable[[str], str], snapshot_path: Path,
+                 namespaces: List[str], ttl: int = DEFAULT_TTL, source: str = "cluster"):
+        self.runner = runner
+        self.snapshot_path = Path(snapshot_path)
+        self.namespaces = namespaces
+        self.ttl = ttl
+        self.source = source
+
+    def _read_cached(self) -> Optional[Dict[str, Any]]:
+        if not self.snapshot_path.is_file():
+            return None
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("source") != self.source:
+            return None
+        if time.time() - snapshot.get("collected_at", 0) > self.ttl:
+            return None
+        return snapshot
+
+    def collect(self) -> Dict[str, Any]:
+        """Run every collector once, in parallel"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=len(PARSERS)) as pool:
+            raw = {name: pool.submit(self.runner, name) for name in PARSERS}
+            data = {name: PARSERS[name](raw[name].result(), self.namespaces) for name in PARSERS}
+
+        data.update({
+            "version": SNAPSHOT_VERSION,
+            "source": self.source,
+            "collected_at": time.time(),
+        })
+        return data
+
+    def load(self, refresh: bool = False) -> Dict[str, Any]:
+        """Return the cached snapshot while fresh, otherwise collect and persist a new one"""
+        snapshot = None if refresh else self._read_cached()
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = self.collect()
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.snapshot_path)
+        return snapshot
+
+
+def _find(items: List[Dict[str, Any]], name: str) -> Optional[Dict[str, Any]]:
+    return next((item for item in items if item["name"] == name), None)
+
+
+def apply_snapshot(config: Dict[str, Any], snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Overlay live cluster values onto a documentation config"""
+    config = copy.deepcopy(config)
+    services = config.get("services", {})
+
+    for key, service_name in (("openwebui", "open-webui-service-local"), ("grafana", "grafana-external")):
+        service = _find(snapshot["services"], service_name)
+        if service and key in services:
+            if service["external_ip"]:
+                services[key]["external_ip"] = service["external_ip"]
+            if service["ports"]:
+                services[key]["port"] = service["ports"][0]
+            services[key]["namespace"] = service["namespace"]
+
+    if snapshot["models"]:
+        config["ai_models"] = [model["name"] for model in snapshot["models"]]
+
+    namespaces = sorted({item["namespace"] for item in snapshot["pods"] + snapshot["services"]})
+    if namespaces:
+        config.setdefault("kubernetes", {})["namespaces"] = namespaces
+
+    if snapshot["nodes"] and (snapshot["nodes"][0].get("memory") or "").endswith("Ki"):
+        memory_gb = int(snapshot["nodes"][0]["memory"][:-2]) / (1024 * 1024)
+        config.setdefault("hardware", {})["ram"] = f"{round(memory_gb)}GB"
+
+    # The snapshot, less VOLATILE_FIELDS, for templates that render per-model / per-node tables
+    config["cluster"] = {key: [{field: value for field, value in item.items()
+                                if field not in VOLATILE_FIELDS.get(key, ())} for item in snapshot[key]]
+                         for key in PARSERS}
+    return config
+
+
+def load_snapshot(source: str, config: Dict[str, Any], snapshot_path: Path,
+                  ttl: int = DEFAULT_TTL, fixture: Optional[str] = None,
+                  refresh: bool = False) -> Dict[str, Any]:
+    """Build the snapshot for a data source name ('cluster' or 'fixture')"""
+    namespaces = config.get("kubernetes", {}).get("namespaces", [])
+    if source == "fixture":
+        if not fixture:
+            raise SnapshotError("the fixture data source needs a fixture file")
+        runner = fixture_runner(fixture)
+    else:
+        runner = kubectl_runner(context=config.get("kubernetes", {}).get("context"),
+                                namespace=config.get("services", {}).get("openwebui", {}).get("namespace", "ollama-stack"),
+                                namespaces=namespaces)
+    return ClusterSnapshot(runner, snapshot_path, namespaces, ttl, source).load(refresh)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Diagram Backends
+Render stack topology views as ASCII, Mermaid or SVG from the one shared graph
+
+Backends take a Topology and return text; `render_formats` builds the stack
+graph once and writes every requested view in every requested format.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional
+
+from diagram_topology import Topology, VIEWS, build_stack_graph, build_view
+
+# Icon prefix per node kind, used by the text backends
+ICONS = {
+    "users": "👥",
+    "network": "🌐",
+    "vpn": "🔒",
+    "service": "⚡",
+    "pod": "🧠",
+    "storage": "📦",
+    "disk": "💾",
+    "compute": "🖥️",
+    "monitoring": "📈",
+}
+
+# Mermaid arrow per edge kind
+MERMAID_ARROWS = {
+    "traffic": "-->",
+    "metrics": "-.->",
+    "storage": "---",
+    "compute": "==>",
+}
+
+
+def _flat(label: str, sep: str = " · ") -> str:
+    return sep.join(label.split("\n"))
+
+
+def _cluster_tree(topo: Topology) -> Dict[tuple, List[tuple]]:
+    """Direct children (('cluster', path) / ('node', id)) of every cluster path; () is the root"""
+    children: Dict[tuple, List[tuple]] = {(): []}
+    for node in topo.nodes.values():
+        for depth in range(1, len(node.cluster) + 1):
+            path = node.cluster[:depth]
+            if path not in children:
+                children[path] = []
+                children[path[:-1]].append(('cluster', path))
+        children[node.cluster].append(('node', node.id))
+    return children
+
+
+def render_ascii(topo: Topology) -> str:
+    """Cluster tree followed by the request paths from users into the stack"""
+    children = _cluster_tree(topo)
+    lines = [topo.title, "=" * len(topo.title), ""]
+
+    def walk(path: tuple, prefix: str):
+        items = children[path]
+        for i, (kind, key) in enumerate(items):
+            last = i == len(items) - 1
+            branch, indent = ("└── ", "    ") if last else ("├── ", "│   ")
+            if kind == 'cluster':
+                lines.append(f"{prefix}{branch}[{key[-1]}]")
+                walk(key, prefix + indent)
+            else:
+                node = topo.nodes[key]
+                lines.append(f"{prefix}{branch}{ICONS.get(node.kind, '•')} {_flat(node.label)}")
+
+    walk((), "")
+
+    by_kind: Dict[str, List[str]] = {}
+    for edge in topo.edges:
+        label = f" ({edge.label})" if edge.label else ""
+        src, dst = topo.nodes[edge.src].label.split("\n")[0], topo.nodes[edge.dst].label.split("\n")[0]
+        by_kind.setdefault(edge.kind, []).append(f"  {src} → {dst}{label}")
+    for kind, entries in by_kind.items():
+        lines += ["", f"{kind.capitalize()}:"] + entries
+
+    targets = [node_id for node_id in ("ollama_pod", "grafana_pod") if node_id in topo.nodes]
+    if "users" in topo.nodes and targets:
+        lines += ["", "Request paths:"]
+        for target in targets:
+            for path in topo.all_paths("users", target, kinds=("traffic",)):
+                lines.append("  " + " → ".join(topo.nodes[n].label.split("\n")[0] for n in path))
+    return "\n".join(lines) + "\n"
+
+
+def _mermaid_label(label: str) -> str:
+    return label.replace('"', "#quot;").replace("\n", "<br/>")
+
+
+def render_mermaid(topo: Topology) -> str:
+    """Mermaid flowchart with one subgraph per cluster"""
+    children = _cluster_tree(topo)
+    lines = [f"graph {topo.direction}"]
+    ids: Dict[tuple, str] = {}
+
+    def walk(path: tuple, indent: str):
+        for kind, key in children[path]:
+            if kind == 'cluster':
+                ids[key] = f"C{len(ids) + 1}"
+                lines.append(f'{indent}subgraph {ids[key]}["{_mermaid_label(key[-1])}"]')
+                walk(key, indent + "    ")
+                lines.append(f"{indent}end")
+            else:
+                node = topo.nodes[key]
+                icon = ICONS.get(node.kind)
+                label = f"{icon} {node.label}" if icon else node.label
+                lines.append(f'{indent}{key}["{_mermaid_label(label)}"]')
+
+    walk((), "    ")
+    lines.append("")
+    for edge in topo.edges:
+        arrow = MERMAID_ARROWS.get(edge.kind, "-->")
+        label = f'|"{_mermaid_label(edge.label)}"|' if edge.label else ""
+        lines.append(f"    {edge.src} {arrow}{label} {edge.dst}")
+
+    used = sorted({node.kind for node in topo.nodes.values()})
+    if used:
+        from svg_renderer import NODE_STYLES, DEFAULT_STYLE
+
+        lines.append("")
+        for kind in used:
+            fill, stroke = NODE_STYLES.get(kind, DEFAULT_STYLE)
+            lines.append(f"    classDef {kind} fill:{fill},stroke:{stroke}")
+        for kind in used:
+            members = ",".join(n.id for n in topo.nodes.values() if n.kind == kind)
+            lines.append(f"    class {members} {kind}")
+    return "\n".join(lines) + "\n"
+
+
+def render_svg(topo: Topology, cache=None) -> str:
+    """Native SVG, laid out in-process (see svg_renderer)"""
+    from svg_renderer import LayoutCache, render_svg as draw
+
+    cache = cache or LayoutCache()
+    return draw(topo, cache.get(topo))
+
+
+# Format -> (renderer, file extension)
+BACKENDS: Dict[str, tuple] = {
+    "ascii": (render_ascii, "txt"),
+    "mermaid": (render_mermaid, "mmd"),
+    "svg": (render_svg, "svg"),
+}
+
+
+def register_backend(name: str, renderer: Callable[[Topology], str], extension: str):
+    """Add a diagram format; the renderer takes a Topology and returns text"""
+    BACKENDS[name] = (renderer, extension)
+
+
+def render_formats(config: Dict[str, Any], output_dir: str, formats: Optional[List[str]] = None,
+                   names: Optional[List[str]] = None, cache=None) -> List[Path]:
+    """Build the stack graph once and write every view in every format as <name>.<ext>"""
+    graph = build_stack_graph(config)
+    views = [build_view(graph, name) for name in (names or VIEWS)]
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+
+    written = []
+    for fmt in formats or list(BACKENDS):
+        renderer, extension = BACKENDS[fmt]
+        for topo in views:
+            text = renderer(topo, cache) if fmt == "svg" else renderer(topo)
+            path = output / f"{topo.name}.{extension}"
+            if not path.is_file() or path.read_text(encoding='utf-8') != text:
+                path.write_text(text, encoding='utf-8')
+            written.append(path)
+    return written
+
+
+class RenderedView:
+    """One diagram view, rendered on first access to a format attribute"""
+
+    def __init__(self, topo: Topology):
+        self.topo = topo
+        self._rendered: Dict[str, str] = {}
+
+    def __getattr__(self, fmt: str) -> str:
+        if fmt.startswith("_") or fmt not in BACKENDS:
+            raise AttributeError(fmt)
+        if fmt not in self._rendered:
+            self._rendered[fmt] = BACKENDS[fmt][0](self.topo)
+        return self._rendered[fmt]
+
+
+class DiagramViews:
+    """Template-facing access to `diagrams.<view>.<format>`; the graph is built on first use"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self._config = config
+        self._views: Dict[str, RenderedView] = {}
+        self._graph: Optional[Topology] = None
+
+    def __getattr__(self, name: str) -> RenderedView:
+        if name.startswith("_") or name not in VIEWS:
+            raise AttributeError(name)
+        if name not in self._views:
+            if self._graph is None:
+                self._graph = build_stack_graph(self._config)
+            self._views[name] = RenderedView(build_view(self._graph, name))
+        return self._views[name]
+
+
+def main():
+    """Render every diagram view in the requested formats"""
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description='Render architecture diagrams from the stack graph')
+    parser.add_argument('--output-dir', '-o', default='docs/architecture/diagrams/generated',
+                        help='Directory for the generated diagram files')
+    parser.add_argument('--format', '-f', nargs='+', choices=sorted(BACKENDS), dest='formats',
+                        help='Formats to render (default: all)')
+    parser.add_argument('--config', '-c', help='Configuration file path (JSON)')
+    parser.add_argument('--path', nargs=2, metavar=('FROM', 'TO'),
+                        help='Print the shortest path between two components and exit')
+    args = parser.parse_args()
+
+    from documentation_generator import DocumentationGenerator
+
+    config = DocumentationGenerator().config
+    if args.config:
+        with open(args.config, 'r') as f:
+            config.update(json.load(f))
+
+    if args.path:
+        graph = build_stack_graph(config)
+        path = graph.find_path(*args.path)
+        if path is None:
+            print(f"❌ No path from {args.path[0]} to {args.path[1]}")
+            raise SystemExit(1)
+        print(" → ".join(path))
+        return
+
+    from svg_renderer import LayoutCache
+
+    start = time.perf_counter()
+    cache = LayoutCache(Path(args.output_dir) / ".layout-cache.json")
+    written = render_formats(config, args.output_dir, args.formats, cache=cache)
+    cache.save()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"✅ Rendered {len(written)} diagram files in {elapsed:.1f} ms")
+    for path in written:
+        print(f"   - {path}")
+
+
+if __name__ == "__main__":
+    main()
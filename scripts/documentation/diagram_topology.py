@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Stack Topology Graph
+One in-memory graph of the Ollama stack, shared by every diagram backend
+
+The stack is built once from the documentation config. Diagram views
+(system architecture, network flow, data flow) are projections of that
+graph, and path queries such as users -> ollama_pod run on its adjacency
+indexes.
+"""
+
+from collections import deque
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+
+class Node:
+    """A stack component; kind selects its styling (pod, service, storage, ...)"""
+
+    def __init__(self, node_id: str, label: str, kind: str, cluster: Tuple[str, ...] = ()):
+        self.id = node_id
+        self.label = label
+        self.kind = kind
+        self.cluster = cluster
+
+    def key(self) -> tuple:
+        return (self.id, self.label, self.kind, self.cluster)
+
+
+class Edge:
+    """A directed connection; kind is traffic, metrics, storage or compute"""
+
+    def __init__(self, src: str, dst: str, kind: str = "traffic", label: str = ""):
+        self.src = src
+        self.dst = dst
+        self.kind = kind
+        self.label = label
+
+    def key(self) -> tuple:
+        return (self.src, self.dst, self.kind, self.label)
+
+
+class Topology:
+    """Nodes grouped in nested clusters, connected by edges, with adjacency indexes"""
+
+    def __init__(self, name: str, title: str, direction: str = "TB"):
+        self.name = name
+        self.title = title
+        self.direction = direction
+        self.nodes: Dict[str, Node] = {}
+        self.edges: List[Edge] = []
+        self.out_edges: Dict[str, List[Edge]] = {}
+        self.in_edges: Dict[str, List[Edge]] = {}
+        self._cluster: List[str] = []
+
+    def cluster(self, label: str) -> "_ClusterScope":
+        """Context manager grouping the nodes added inside it"""
+        return _ClusterScope(self, label)
+
+    def add_node(self, node: Node) -> str:
+        self.nodes[node.id] = node
+        self.out_edges.setdefault(node.id, [])
+        self.in_edges.setdefault(node.id, [])
+        return node.id
+
+    def node(self, node_id: str, label: str, kind: str) -> str:
+        return self.add_node(Node(node_id, label, kind, tuple(self._cluster)))
+
+    def add_edge(self, edge: Edge):
+        self.edges.append(edge)
+        self.out_edges[edge.src].append(edge)
+        self.in_edges[edge.dst].append(edge)
+
+    def chain(self, *node_ids: str, kind: str = "traffic", label: str = ""):
+        """Connect nodes in sequence, like `a >> b >> c`"""
+        for src, dst in zip(node_ids, node_ids[1:]):
+            self.add_edge(Edge(src, dst, kind, label))
+
+    def successors(self, node_id: str, kinds: Optional[Iterable[str]] = None) -> List[str]:
+        return [e.dst for e in self.out_edges[node_id] if kinds is None or e.kind in kinds]
+
+    def predecessors(self, node_id: str, kinds: Optional[Iterable[str]] = None) -> List[str]:
+        return [e.src for e in self.in_edges[node_id] if kinds is None or e.kind in kinds]
+
+    def find_path(self, src: str, dst: str, kinds: Optional[Iterable[str]] = None) -> Optional[List[str]]:
+        """Shortest path from src to dst following edges of the given kinds"""
+        previous: Dict[str, Optional[str]] = {src: None}
+        queue = deque([src])
+        while queue:
+            current = queue.popleft()
+            if current == dst:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = previous[current]
+                return path[::-1]
+            for nxt in self.successors(current, kinds):
+                if nxt not in previous:
+                    previous[nxt] = current
+                    queue.append(nxt)
+        return None
+
+    def all_paths(self, src: str, dst: str, kinds: Optional[Iterable[str]] = None) -> List[List[str]]:
+        """Every simple path from src to dst, shortest first"""
+        paths = []
+        stack = [(src, [src])]
+        while stack:
+            current, path = stack.pop()
+            if current == dst:
+                paths.append(path)
+                continue
+            for nxt in reversed(self.successors(current, kinds)):
+                if nxt not in path:
+                    stack.append((nxt, path + [nxt]))
+        return sorted(paths, key=len)
+
+    def subgraph(self, name: str, title: str, direction: str,
+                 node_ids: Optional[Iterable[str]] = None,
+                 edge_kinds: Optional[Iterable[str]] = None) -> "Topology":
+        """Projection keeping the given nodes (default: all) and edges of the given kinds"""
+        keep = set(node_ids) if node_ids is not None else None
+        edges = [e for e in self.edges if edge_kinds is None or e.kind in edge_kinds]
+        if keep is None:
+            keep = {e.src for e in edges} | {e.dst for e in edges} if edge_kinds is not None else set(self.nodes)
+        view = Topology(name, title, direction)
+        for node in self.nodes.values():
+            if node.id in keep:
+                view.add_node(node)
+        for edge in edges:
+            if edge.src in keep and edge.dst in keep:
+                view.add_edge(edge)
+        return view
+
+    def key(self) -> tuple:
+        """Structural identity, used to cache layouts"""
+        return (self.direction,
+                tuple(node.key() for node in self.nodes.values()),
+                tuple(edge.key() for edge in self.edges))
+
+
+class _ClusterScope:
+    def __init__(self, topology: Topology, label: str):
+        self.topology = topology
+        self.label = label
+
+    def __enter__(self):
+        self.topology._cluster.append(self.label)
+        return self
+
+    def __exit__(self, *exc):
+        self.topology._cluster.pop()
+        return False
+
+
+def _endpoint(service: Dict[str, Any]) -> str:
+    return f"{service['external_ip']}:{service['port']}"
+
+
+def build_stack_graph(config: Dict[str, Any]) -> Topology:
+    """The whole stack: external access, cluster workloads, storage, monitoring and hardware"""
+    services = config['services']
+    hardware = config['hardware']
+    graph = Topology("stack", f"{config['project_name']} - System Architecture", "TB")
+
+    with graph.cluster("External Access"):
+        users = graph.node("users", "Users", "users")
+        internet = graph.node("internet", "Internet/LAN", "network")
+        tailscale = graph.node("tailscale", f"Tailscale Mesh\n{services['tailscale']['ip']}", "vpn")
+
+    with graph.cluster(f"Kubernetes Cluster ({config['kubernetes']['cluster_type']})"):
+        with graph.cluster("LoadBalancer (MetalLB)"):
+            webui_lb = graph.node("webui_lb", f"OpenWebUI LB\n{_endpoint(services['openwebui'])}", "service")
+            grafana_lb = graph.node("grafana_lb", f"Grafana LB\n{_endpoint(services['grafana'])}", "service")
+
+        with graph.cluster(f"{services['openwebui']['namespace']} Namespace"):
+            with graph.cluster("Web Interface"):
+                webui_svc = graph.node("webui_svc", "WebUI Service\nopen-webui-service-local", "service")
+                webui_pod = graph.node("webui_pod", "OpenWebUI Pod\nWeb Interface", "pod")
+            with graph.cluster("AI Processing"):
+                ollama_svc = graph.node("ollama_svc", "Ollama Service\nClusterIP", "service")
+                ollama_pod = graph.node("ollama_pod", f"Ollama Pod\n{', '.join(config['ai_models'])}", "pod")
+            with graph.cluster("Storage"):
+                storage_class = graph.node("storage_class", f"Custom StorageClass\n{hardware['mount_path']}", "storage")
+                ollama_pvc = graph.node("ollama_pvc", f"Models PVC\n{hardware['storage']}", "storage")
+                webui_pvc = graph.node("webui_pvc", "WebUI PVC\nChat Data", "storage")
+
+        with graph.cluster(f"{services['grafana']['namespace']} Namespace"):
+            prometheus = graph.node("prometheus", "Prometheus\nMetrics Collection", "monitoring")
+            grafana_pod = graph.node("grafana_pod", "Grafana Pod\nDashboards", "monitoring")
+
+    with graph.cluster("Hardware Infrastructure"):
+        nvme = graph.node("nvme", f"{hardware['storage']}\n{hardware['mount_path']}", "disk")
+        cpu = graph.node("cpu", f"{hardware['cpu']}\n{hardware['ram']}", "compute")
+
+    graph.chain(users, internet, webui_lb, webui_svc, webui_pod)
+    graph.chain(internet, grafana_lb, grafana_pod)
+    graph.chain(users, tailscale)
+    graph.chain(tailscale, webui_pod, label="direct access")
+    graph.chain(webui_pod, ollama_svc, ollama_pod)
+
+    graph.chain(ollama_pod, prometheus, kind="metrics", label="AI metrics")
+    graph.chain(webui_pod, prometheus, kind="metrics", label="usage metrics")
+    graph.chain(prometheus, grafana_pod, kind="metrics")
+
+    graph.chain(storage_class, ollama_pvc, ollama_pod, kind="storage")
+    graph.chain(storage_class, webui_pvc, webui_pod, kind="storage")
+    graph.chain(storage_class, nvme, kind="storage")
+    graph.chain(ollama_pod, cpu, kind="compute")
+    return graph
+
+
+# View name -> (title, direction, nodes to keep or None, edge kinds or None)
+VIEWS = {
+    "system_architecture": (None, "TB", None, None),
+    "network_flow": ("Network Flow Architecture", "LR", None, ("traffic",)),
+    "data_flow": ("AI Data Processing Flow", "TB",
+                  ("users", "webui_pod", "ollama_svc", "ollama_pod", "ollama_pvc", "webui_pvc",
+                   "prometheus", "grafana_pod"),
+                  ("traffic", "metrics", "storage")),
+}
+
+
+def build_view(graph: Topology, name: str) -> Topology:
+    """Project the stack graph onto one named diagram view"""
+    title, direction, node_ids, edge_kinds = VIEWS[name]
+    return graph.subgraph(name, title or graph.title, direction, node_ids, edge_kinds)
+
+
+def build_all(config: Dict[str, Any], names: Optional[List[str]] = None) -> List[Topology]:
+    """Build the stack graph once and derive the requested views (all by default)"""
+    graph = build_stack_graph(config)
+    return [build_view(graph, name) for name in (names or VIEWS)]
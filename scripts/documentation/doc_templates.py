@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Streaming Documentation Templates
+Templates are parsed once per process and rendered as a stream of chunks
+
+Syntax:
+    {{ services.openwebui.external_ip }}      dotted lookup into the context
+    {{ ai_models | join(', ') }}              lookup followed by filters
+    {{ hardware | repr }}                     Python literal, for generated scripts
+    {% for model in ai_models %}...{% endfor %}
+"""
+
+import ast
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Iterable, Tuple
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+
+TOKEN_RE = re.compile(r'\{\{\s*(.+?)\s*\}\}|\{%\s*(.+?)\s*%\}', re.DOTALL)
+FOR_RE = re.compile(r'^for\s+(\w+)\s+in\s+(.+)$')
+FILTER_RE = re.compile(r'^(\w+)(?:\((.*)\))?$', re.DOTALL)
+
+FILTERS = {
+    'join': lambda value, sep='': sep.join(str(item) for item in value),
+    'upper': lambda value: str(value).upper(),
+    'lower': lambda value: str(value).lower(),
+    'default': lambda value, fallback='': fallback if value in (None, '') else value,
+    'repr': repr,
+}
+
+
+class TemplateError(Exception):
+    """Raised when a template cannot be parsed or rendered"""
+
+
+class Expression:
+    """A dotted lookup followed by zero or more filters"""
+
+    def __init__(self, source: str, template: str):
+        parts = [part.strip() for part in source.split('|')]
+        self.path = parts[0].split('.')
+        self.filters = []
+        for part in parts[1:]:
+            match = FILTER_RE.match(part)
+            if not match or match.group(1) not in FILTERS:
+                raise TemplateError(f"{template}: unknown filter '{part}'")
+            args = ()
+            if match.group(2):
+                args = ast.literal_eval(f"({match.group(2)},)")
+            self.filters.append((FILTERS[match.group(1)], args))
+
+    def evaluate(self, scopes: List[Dict[str, Any]]) -> Any:
+        head = self.path[0]
+        for scope in reversed(scopes):
+            if head in scope:
+                value = scope[head]
+                break
+        else:
+            raise TemplateError(f"undefined template variable '{head}'")
+        for key in self.path[1:]:
+            value = value[key] if isinstance(value, dict) else getattr(value, key)
+        for func, args in self.filters:
+            value = func(value, *args)
+        return value
+
+
+class Template:
+    """A parsed template that renders to an iterator of string chunks"""
+
+    def __init__(self, source: str, name: str = "<string>"):
+        self.source = source
+        self.name = name
+        self.nodes = self._parse()
+
+    def _parse(self) -> list:
+        root: list = []
+        stack: List[Tuple[str, list]] = [("root", root)]
+        pos = 0
+        for match in TOKEN_RE.finditer(self.source):
+            if match.start() > pos:
+                stack[-1][1].append(('text', self.source[pos:match.start()]))
+            pos = match.end()
+            if match.group(1) is not None:
+                stack[-1][1].append(('expr', Expression(match.group(1), self.name)))
+                continue
+            tag = match.group(2)
+            loop = FOR_RE.match(tag)
+            if loop:
+                body: list = []
+                stack[-1][1].append(('for', loop.group(1), Expression(loop.group(2), self.name), body))
+                stack.append(("for", body))
+            elif tag == 'endfor':
+                if stack[-1][0] != "for":
+                    raise TemplateError(f"{self.name}: unexpected endfor")
+                stack.pop()
+            else:
+                raise TemplateError(f"{self.name}: unknown tag '{tag}'")
+        if len(stack) != 1:
+            raise TemplateError(f"{self.name}: unclosed for loop")
+        if pos < len(self.source):
+            root.append(('text', self.source[pos:]))
+        return root
+
+    def stream(self, context: Dict[str, Any]) -> Iterator[str]:
+        """Yield the rendered template chunk by chunk"""
+        return self._emit(self.nodes, [context])
+
+    def _emit(self, nodes: list, scopes: List[Dict[str, Any]]) -> Iterator[str]:
+        for node in nodes:
+            kind = node[0]
+            if kind == 'text':
+                yield node[1]
+            elif kind == 'expr':
+                yield str(node[1].evaluate(scopes))
+            else:
+                _, var, iterable, body = node
+                for item in iterable.evaluate(scopes):
+                    yield from self._emit(body, scopes + [{var: item}])
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """Render the whole template into a string"""
+        return ''.join(self.stream(context))
+
+
+class TemplateEngine:
+    """Loads templates from a directory and keeps the parsed form for reuse"""
+
+    def __init__(self, template_dir: Path = TEMPLATE_DIR):
+        self.template_dir = Path(template_dir)
+        self._cache: Dict[str, Template] = {}
+
+    def get(self, name: str) -> Template:
+        """Return the parsed template, parsing it on first use"""
+        template = self._cache.get(name)
+        if template is None:
+            source = (self.template_dir / name).read_text(encoding='utf-8')
+            template = self._cache[name] = Template(source, name)
+        return template
+
+
+def write_stream(chunks: Iterable[str], file_obj, digest=None) -> int:
+    """Write chunks to an open text file, updating an optional hash; returns characters written"""
+    written = 0
+    for chunk in chunks:
+        file_obj.write(chunk)
+        if digest is not None:
+            digest.update(chunk.encode('utf-8'))
+        written += len(chunk)
+    return written
+
+
+# Shared by every generator in the process so each template is parsed once
+default_engine = TemplateEngine()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Section Cache for Multi-Profile Documentation Builds
+Reuses rendered sections across profiles that share the config keys a section reads
+"""
+
+import json
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple, FrozenSet
+
+
+class ConfigRecorder(dict):
+    """Config dictionary that records which top-level keys were read"""
+
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.used_keys = set()
+
+    def __getitem__(self, key):
+        self.used_keys.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.used_keys.add(key)
+        return super().get(key, default)
+
+
+def digest_keys(config: Dict[str, Any], keys: FrozenSet[str]) -> str:
+    """Hash the values of the given top-level keys"""
+    subset = {key: config.get(key) for key in sorted(keys)}
+    encoded = json.dumps(subset, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class SectionCache:
+    """Rendered sections keyed by template and the config values they depend on"""
+
+    def __init__(self):
+        # template hash -> [(keys read while rendering, digest of their values, rendered section)]
+        self._entries: Dict[str, List[Tuple[FrozenSet[str], str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, template_hash: str, config: Dict[str, Any]) -> Optional[Any]:
+        """Return a previously rendered section if its dependencies match this config"""
+        for keys, digest, rendered in self._entries.get(template_hash, []):
+            if digest_keys(config, keys) == digest:
+                self.hits += 1
+                return rendered
+        self.misses += 1
+        return None
+
+    def store(self, template_hash: str, config: Dict[str, Any], used_keys, rendered: Any):
+        """Remember a rendered section (e.g. its output path and hash) with the keys it read"""
+        keys = frozenset(used_keys)
+        self._entries.setdefault(template_hash, []).append((keys, digest_keys(config, keys), rendered))
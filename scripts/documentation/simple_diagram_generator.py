@@ -2,99 +2,32 @@
 """
 Simple ASCII Architecture Diagram Generator
 No external dependencies required
+
+Architecture and network flow are rendered from the shared stack graph
+(diagram_topology), the same structure behind the Mermaid and SVG diagrams.
 """
 
-def generate_ascii_architecture():
-    """Generate ASCII art architecture diagram"""
-    
-    ascii_diagram = '''
-# System Architecture (ASCII)
+def _stack_config(config=None):
+    """Documentation config the diagrams are drawn from"""
+    if config is None:
+        from documentation_generator import DocumentationGenerator
+        config = DocumentationGenerator().config
+    return config
 
-```
-                     🌐 Internet/LAN
-                           │
-                           ▼
-                    ┌─────────────────┐
-                    │   MetalLB LB    │
-                    │  192.168.1.101  │
-                    │  192.168.1.102  │
-                    └─────────┬───────┘
-                              │
-                 ┌────────────┴────────────┐
-                 ▼                         ▼
-        ┌─────────────────┐       ┌─────────────────┐
-        │   OpenWebUI     │       │    Grafana      │
-        │ :8080 (Web UI)  │       │ :3000 (Monitor) │
-        └─────────┬───────┘       └─────────────────┘
-                  │
-                  ▼
-        ┌─────────────────┐
-        │  Ollama Service │
-        │   (ClusterIP)   │
-        └─────────┬───────┘
-                  │
-                  ▼
-        ┌─────────────────┐       🔒 Tailscale
-        │   Ollama Pod    │◄──────  100.102.114.95
-        │ AI Models:      │
-        │ • CodeLlama     │
-        │ • Llama3.2:3b   │       ┌─────────────────┐
-        │ • Gemma2:4b     │       │ Physical Storage│
-        └─────────┬───────┘       │   1TB NVMe SSD  │
-                  │               │  /mnt/evo4t     │
-                  └───────────────┤ AMD Ryzen AI    │
-                                  │ 96GB RAM        │
-                                  └─────────────────┘
-
-Namespaces:
-├── ollama-stack     (Application Tier)
-│   ├── OpenWebUI Pod
-│   ├── Ollama Pod
-│   └── Storage PVCs
-└── observability    (Monitoring Tier)
-    ├── Grafana Pod
-    └── Prometheus Stack
-```
-'''
-    
-    return ascii_diagram
+def _ascii_view(title, view, config=None):
+    from diagram_backends import render_ascii
+    from diagram_topology import build_stack_graph, build_view
 
-def generate_network_flow_ascii():
-    """Generate ASCII network flow diagram"""
-    
-    flow_diagram = '''
-# Network Flow (ASCII)
+    graph = build_stack_graph(_stack_config(config))
+    return f"\n# {title}\n\n```\n{render_ascii(build_view(graph, view))}```\n"
 
-```
-👤 User Request Flow:
-
-1. User → Internet/LAN → MetalLB (192.168.1.101:8080)
-   │
-   ▼
-2. MetalLB → open-webui-service-local → OpenWebUI Pod
-   │
-   ▼  
-3. OpenWebUI → ollama-service (ClusterIP) → Ollama Pod
-   │
-   ▼
-4. Ollama Pod → AI Model Processing → Response
-   │
-   ▼
-5. Response → OpenWebUI → MetalLB → User
-
-📊 Monitoring Flow (Parallel):
-
-Ollama Pod ────┐
-               ├──► Prometheus → Grafana (192.168.1.102:3000)
-OpenWebUI ─────┘
-
-🔒 Tailscale Direct Access:
-
-User → Tailscale (100.102.114.95) → OpenWebUI Pod
-```
-'''
-    
-    return flow_diagram
+def generate_ascii_architecture(config=None):
+    """Generate ASCII architecture diagram from the stack graph"""
+    return _ascii_view("System Architecture (ASCII)", "system_architecture", config)
+
+def generate_network_flow_ascii(config=None):
+    """Generate ASCII network flow diagram from the stack graph"""
+    return _ascii_view("Network Flow (ASCII)", "network_flow", config)
 
 def generate_component_status():
     """Generate current system status"""
@@ -134,25 +67,36 @@ Storage Configuration:
     
     return status
 
-def main():
-    """Generate all ASCII diagrams"""
-    print("🎨 Generating ASCII architecture diagrams...")
-    
-    # Create output files
+def write_ascii_diagrams(base_dir=".", config=None):
+    """Write the ASCII documents under base_dir; returns their relative paths"""
+    import os
+
+    config = _stack_config(config)
     diagrams = {
-        "docs/architecture/diagrams/ascii_architecture.md": generate_ascii_architecture(),
-        "docs/architecture/diagrams/ascii_network_flow.md": generate_network_flow_ascii(),
+        "docs/architecture/diagrams/ascii_architecture.md": generate_ascii_architecture(config),
+        "docs/architecture/diagrams/ascii_network_flow.md": generate_network_flow_ascii(config),
         "docs/architecture/diagrams/system_status.md": generate_component_status()
     }
-    
+
     for filename, content in diagrams.items():
-        with open(filename, 'w') as f:
+        path = os.path.join(base_dir, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
             f.write(content)
+    return list(diagrams)
+
+def main():
+    """Generate all ASCII diagrams"""
+    print("🎨 Generating ASCII architecture diagrams...")
+    
+    # Create output files
+    diagrams = write_ascii_diagrams()
+    for filename in diagrams:
         print(f"✅ Generated: {filename}")
     
     print("\n✅ ASCII diagrams generated successfully!")
     print("\n📁 Generated files:")
-    for filename in diagrams.keys():
+    for filename in diagrams:
         print(f"   📄 {filename}")
     
     print("\n🎯 These diagrams work everywhere:")
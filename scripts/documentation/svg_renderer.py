@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Native SVG Diagram Renderer
+Lays out diagram topologies in-process and writes SVG directly
+No external dependencies required (no `diagrams`, no Graphviz)
+"""
+
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from diagram_topology import Topology
+
+CHAR_WIDTH = 7
+LINE_HEIGHT = 16
+NODE_PADDING = 12
+NODE_GAP = 36
+RANK_GAP = 48
+CLUSTER_PADDING = 14
+CLUSTER_LABEL_HEIGHT = 18
+MARGIN = 40
+TITLE_HEIGHT = 36
+LAYOUT_VERSION = 1
+
+# Fill / stroke per node kind
+NODE_STYLES = {
+    "users": ("#eceff1", "#546e7a"),
+    "network": ("#ede7f6", "#5e35b1"),
+    "vpn": ("#e8eaf6", "#3949ab"),
+    "service": ("#e8f5e9", "#2e7d32"),
+    "pod": ("#e3f2fd", "#1565c0"),
+    "storage": ("#fff3e0", "#ef6c00"),
+    "disk": ("#fbe9e7", "#d84315"),
+    "compute": ("#f3e5f5", "#8e24aa"),
+    "monitoring": ("#ffebee", "#c62828"),
+}
+DEFAULT_STYLE = ("#ffffff", "#424242")
+# Cluster background by nesting depth
+CLUSTER_FILLS = ["#f5f7fa", "#eceff4", "#e3e8ef", "#dae1ea"]
+
+
+def _node_size(label: str) -> Tuple[int, int]:
+    lines = label.split("\n")
+    width = max(len(line) for line in lines) * CHAR_WIDTH + 2 * NODE_PADDING
+    height = len(lines) * LINE_HEIGHT + 2 * NODE_PADDING
+    return max(width, 90), height
+
+
+def _ranks(items: List[tuple], edges: List[Tuple[tuple, tuple]]) -> Dict[tuple, int]:
+    """Longest-path ranking; edges closing a cycle are ignored"""
+    succs: Dict[tuple, List[tuple]] = {item: [] for item in items}
+    indegree = {item: 0 for item in items}
+    for src, dst in edges:
+        succs[src].append(dst)
+        indegree[dst] += 1
+
+    rank = {item: 0 for item in items}
+    ready = [item for item in items if indegree[item] == 0]
+    seen = set()
+    while len(seen) < len(items):
+        if not ready:
+            # Cycle: release the first unvisited item
+            ready = [next(item for item in items if item not in seen)]
+        item = ready.pop(0)
+        if item in seen:
+            continue
+        seen.add(item)
+        for dst in succs[item]:
+            if dst in seen:
+                continue
+            rank[dst] = max(rank[dst], rank[item] + 1)
+            indegree[dst] -= 1
+            if indegree[dst] == 0:
+                ready.append(dst)
+    return rank
+
+
+def _order_layers(items: List[tuple], edges: List[Tuple[tuple, tuple]], rank: Dict[tuple, int]) -> List[List[tuple]]:
+    """Group items into layers and reduce crossings with barycenter sweeps"""
+    index = {item: i for i, item in enumerate(items)}
+    layers: List[List[tuple]] = [[] for _ in range(max(rank.values(), default=0) + 1)]
+    for item in items:
+        layers[rank[item]].append(item)
+
+    neighbours: Dict[tuple, List[tuple]] = {item: [] for item in items}
+    for src, dst in edges:
+        neighbours[src].append(dst)
+        neighbours[dst].append(src)
+
+    for _ in range(2):
+        for layer_range in (range(1, len(layers)), range(len(layers) - 2, -1, -1)):
+            position = {item: i for layer in layers for i, item in enumerate(layer)}
+            for i in layer_range:
+                def barycenter(item: tuple) -> float:
+                    linked = [position[n] for n in neighbours[item] if abs(rank[n] - i) == 1]
+                    return sum(linked) / len(linked) if linked else position[item]
+                layers[i].sort(key=lambda item: (barycenter(item), index[item]))
+    return layers
+
+
+def compute_layout(topo: Topology) -> Dict[str, Any]:
+    """Place nodes, cluster boxes and edges; coordinates are plain lists for JSON caching
+
+    Every cluster is laid out recursively as one block, so cluster boxes never
+    overlap nodes or clusters they do not contain.
+    """
+    horizontal = topo.direction == "LR"
+
+    # Direct children (nodes and sub-clusters) of every cluster path; () is the root
+    children: Dict[tuple, List[tuple]] = {(): []}
+    for node in topo.nodes.values():
+        for depth in range(1, len(node.cluster) + 1):
+            path = node.cluster[:depth]
+            if path not in children:
+                children[path] = []
+                children[path[:-1]].append(('cluster', path))
+        children[node.cluster].append(('node', node.id))
+
+    def item_under(node_id: str, path: tuple) -> Optional[tuple]:
+        cluster = topo.nodes[node_id].cluster
+        if cluster == path:
+            return ('node', node_id)
+        if cluster[:len(path)] == path:
+            return ('cluster', cluster[:len(path) + 1])
+        return None
+
+    def block(path: tuple) -> Tuple[float, float, List[list]]:
+        """Lay out one cluster's contents; returns width, height and relative placements"""
+        items = children[path]
+        sizes: Dict[tuple, Tuple[float, float]] = {}
+        inner: Dict[tuple, List[list]] = {}
+        for item in items:
+            if item[0] == 'node':
+                sizes[item] = _node_size(topo.nodes[item[1]].label)
+            else:
+                w, h, placed = block(item[1])
+                sizes[item] = (w + 2 * CLUSTER_PADDING, h + 2 * CLUSTER_PADDING + CLUSTER_LABEL_HEIGHT)
+                inner[item] = placed
+
+        edges = []
+        for edge in topo.edges:
+            src, dst = item_under(edge.src, path), item_under(edge.dst, path)
+            if src and dst and src != dst and (src, dst) not in edges:
+                edges.append((src, dst))
+        layers = _order_layers(items, edges, _ranks(items, edges))
+
+        def along(item: tuple) -> float:
+            return sizes[item][1] if horizontal else sizes[item][0]
+
+        def across(item: tuple) -> float:
+            return sizes[item][0] if horizontal else sizes[item][1]
+
+        extents = [sum(along(i) for i in layer) + NODE_GAP * (len(layer) - 1) for layer in layers]
+        widest = max(extents, default=0)
+        placements: List[list] = []
+        offset = 0.0
+        for layer, extent in zip(layers, extents):
+            depth = max((across(i) for i in layer), default=0)
+            cursor = (widest - extent) / 2
+            for item in layer:
+                w, h = sizes[item]
+                if horizontal:
+                    x, y = offset + (depth - w) / 2, cursor
+                else:
+                    x, y = cursor, offset + (depth - h) / 2
+                placements.append([item[0], item[1], x, y, w, h])
+                for kind, key, ix, iy, iw, ih in inner.get(item, []):
+                    placements.append([kind, key, x + CLUSTER_PADDING + ix,
+                                       y + CLUSTER_PADDING + CLUSTER_LABEL_HEIGHT + iy, iw, ih])
+                cursor += along(item) + NODE_GAP
+            offset += depth + RANK_GAP
+        offset -= RANK_GAP if layers else 0
+        return (offset, widest, placements) if horizontal else (widest, offset, placements)
+
+    width, height, placements = block(())
+    positions: Dict[str, List[float]] = {}
+    cluster_boxes = []
+    for kind, key, x, y, w, h in placements:
+        x, y = round(x + MARGIN, 1), round(y + MARGIN + TITLE_HEIGHT, 1)
+        if kind == 'node':
+            positions[key] = [x, y, w, h]
+        else:
+            cluster_boxes.append([key[-1], len(key), x, y, w, h])
+    cluster_boxes.sort(key=lambda box: box[1])
+
+    edges = []
+    for edge in topo.edges:
+        (x1, y1), (x2, y2) = _clip(positions[edge.src], positions[edge.dst]), _clip(positions[edge.dst], positions[edge.src])
+        edges.append([x1, y1, x2, y2, edge.label])
+
+    return {
+        "width": round(width + 2 * MARGIN),
+        "height": round(height + 2 * MARGIN + TITLE_HEIGHT),
+        "nodes": positions,
+        "clusters": cluster_boxes,
+        "edges": edges,
+    }
+
+
+def _clip(box: List[float], towards: List[float]) -> Tuple[float, float]:
+    """Point where the line from box's centre towards another box leaves box"""
+    x, y, w, h = box
+    cx, cy = x + w / 2, y + h / 2
+    tx, ty = towards[0] + towards[2] / 2, towards[1] + towards[3] / 2
+    dx, dy = tx - cx, ty - cy
+    if dx == 0 and dy == 0:
+        return cx, cy
+    scale = min((w / 2) / abs(dx) if dx else float("inf"), (h / 2) / abs(dy) if dy else float("inf"))
+    return round(cx + dx * scale, 1), round(cy + dy * scale, 1)
+
+
+class LayoutCache:
+    """Layouts keyed by topology structure, kept in memory and optionally on disk"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.layouts: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.dirty = False
+        if self.path and self.path.is_file():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == LAYOUT_VERSION:
+                    self.layouts = data.get("layouts", {})
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def key(topo: Topology) -> str:
+        return hashlib.sha256(repr(topo.key()).encode('utf-8')).hexdigest()
+
+    def get(self, topo: Topology) -> Dict[str, Any]:
+        key = self.key(topo)
+        if key in self.layouts:
+            self.hits += 1
+        else:
+            self.layouts[key] = compute_layout(topo)
+            self.dirty = True
+        return self.layouts[key]
+
+    def save(self, keep: Optional[List[str]] = None):
+        """Persist the cache, dropping layouts not in `keep` when given"""
+        if not self.path or not self.dirty:
+            return
+        layouts = {k: v for k, v in self.layouts.items() if keep is None or k in keep}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"version": LAYOUT_VERSION, "layouts": layouts}, f)
+
+
+def _text(x: float, y: float, label: str, size: int = 12, weight: str = "normal", anchor: str = "middle") -> str:
+    lines = label.split("\n")
+    top = y - (len(lines) - 1) * LINE_HEIGHT / 2
+    spans = "".join(f'<tspan x="{x:.1f}" y="{top + i * LINE_HEIGHT:.1f}">{escape(line)}</tspan>'
+                    for i, line in enumerate(lines))
+    return (f'<text font-family="Helvetica, Arial, sans-serif" font-size="{size}" font-weight="{weight}" '
+            f'text-anchor="{anchor}" dominant-baseline="middle">{spans}</text>')
+
+
+def render_svg(topo: Topology, layout: Dict[str, Any]) -> str:
+    """Render a laid-out topology as an SVG document"""
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout["width"]}" height="{layout["height"]}" '
+        f'viewBox="0 0 {layout["width"]} {layout["height"]}">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+        'orient="auto-start-reverse"><path d="M 0 0 L 10 5 L 0 10 z" fill="#616161"/></marker></defs>',
+        '<rect width="100%" height="100%" fill="#ffffff"/>',
+        _text(layout["width"] / 2, MARGIN / 2 + TITLE_HEIGHT / 2, topo.title, size=18, weight="bold"),
+    ]
+
+    for label, depth, x, y, w, h in layout["clusters"]:
+        fill = CLUSTER_FILLS[min(depth, len(CLUSTER_FILLS)) - 1]
+        out.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}" rx="8" '
+                   f'fill="{fill}" stroke="#9e9e9e" stroke-dasharray="4 3"/>')
+        out.append(_text(x + 10, y + CLUSTER_LABEL_HEIGHT / 2 + 4, label, size=12, weight="bold", anchor="start"))
+
+    for x1, y1, x2, y2, label in layout["edges"]:
+        out.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="#616161" stroke-width="1.4" '
+                   f'marker-end="url(#arrow)"/>')
+        if label:
+            mx, my = (x1 + x2) / 2, (y1 + y2) / 2
+            width = len(label) * 6 + 8
+            out.append(f'<rect x="{mx - width / 2:.1f}" y="{my - 9:.1f}" width="{width}" height="18" fill="#ffffff" opacity="0.85"/>')
+            out.append(_text(mx, my, label, size=11))
+
+    for node_id, (x, y, w, h) in layout["nodes"].items():
+        node = topo.nodes[node_id]
+        fill, stroke = NODE_STYLES.get(node.kind, DEFAULT_STYLE)
+        out.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{w}" height="{h}" rx="6" fill="{fill}" '
+                   f'stroke="{stroke}" stroke-width="1.5"/>')
+        out.append(_text(x + w / 2, y + h / 2, node.label))
+
+    out.append('</svg>')
+    return "\n".join(out) + "\n"
+
+
+def render_all(config: Dict[str, Any], output_dir: str, cache: Optional[LayoutCache] = None,
+               names: Optional[List[str]] = None) -> List[Path]:
+    """Render the diagram topologies to <output_dir>/<name>.svg"""
+    from diagram_topology import build_all
+
+    cache = cache or LayoutCache()
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    written = []
+    keys = []
+    for topo in build_all(config, names):
+        keys.append(cache.key(topo))
+        path = output / f"{topo.name}.svg"
+        svg = render_svg(topo, cache.get(topo))
+        if not path.is_file() or path.read_text(encoding='utf-8') != svg:
+            path.write_text(svg, encoding='utf-8')
+        written.append(path)
+    cache.save(keep=keys)
+    return written
+
+
+def main():
+    """Render all architecture diagrams as SVG"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Render architecture diagrams as SVG')
+    parser.add_argument('--output-dir', '-o', default='docs/architecture/diagrams/generated',
+                        help='Directory for the generated SVG files')
+    parser.add_argument('--config', '-c', help='Configuration file path (JSON)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the layout cache')
+    args = parser.parse_args()
+
+    from documentation_generator import DocumentationGenerator
+
+    config = DocumentationGenerator().config
+    if args.config:
+        with open(args.config, 'r') as f:
+            config.update(json.load(f))
+
+    start = time.perf_counter()
+    cache = LayoutCache(None if args.no_cache else Path(args.output_dir) / ".layout-cache.json")
+    written = render_all(config, args.output_dir, cache)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"✅ Rendered {len(written)} diagrams in {elapsed:.1f} ms ({cache.hits} cached layouts)")
+    for path in written:
+        print(f"   - {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,28 +3,58 @@
 echo "🤖 Downloading Best Coding Models for AI Development"
 echo "===================================================="
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+NAMESPACE="${OLLAMA_NAMESPACE:-ollama-stack}"
+SYNC_CONCURRENCY="${SYNC_CONCURRENCY:-2}"
+SYNC_START_BELOW_MBPS="${SYNC_START_BELOW_MBPS:-0}"
+SYNC_PORT="${SYNC_PORT:-11439}"
+
 MODELS=(
     "codellama:34b"
-    "deepseek-coder:33b" 
+    "deepseek-coder:33b"
     "codeqwen:32b"
     "codellama:13b"
 )
 
-for model in "${MODELS[@]}"; do
+echo "💾 Storage before download:"
+df -h /mnt/evo4t | tail -1
+
+if command -v python3 >/dev/null 2>&1 && [ -f "$SCRIPT_DIR/ollama/model_sync.py" ]; then
+    # Concurrent, resumable pulls through a port-forward to the Ollama API;
+    # rerunning skips installed models and resumes interrupted ones
+    microk8s kubectl port-forward -n "$NAMESPACE" deployment/ollama "$SYNC_PORT:11434" >/dev/null 2>&1 &
+    PF_PID=$!
+    trap 'kill $PF_PID 2>/dev/null' EXIT
+    for _ in $(seq 1 20); do
+        curl -s -o /dev/null "http://127.0.0.1:$SYNC_PORT/" && break
+        sleep 0.5
+    done
+
     echo ""
-    echo "📥 Downloading $model..."
-    echo "💾 Storage before download:"
-    df -h /mnt/evo4t | tail -1
-    
-    microk8s kubectl exec -n ollama-stack deployment/ollama -- ollama pull "$model"
-    
-    echo "✅ $model downloaded successfully!"
-done
+    if ! python3 "$SCRIPT_DIR/ollama/model_sync.py" "${MODELS[@]}" \
+        --url "http://127.0.0.1:$SYNC_PORT" \
+        --concurrency "$SYNC_CONCURRENCY" \
+        --start-below-mbps "$SYNC_START_BELOW_MBPS"; then
+        echo "❌ Some models failed to download; rerun this script to resume"
+        exit 1
+    fi
+else
+    for model in "${MODELS[@]}"; do
+        echo ""
+        echo "📥 Downloading $model..."
+        echo "💾 Storage before download:"
+        df -h /mnt/evo4t | tail -1
+
+        microk8s kubectl exec -n "$NAMESPACE" deployment/ollama -- ollama pull "$model"
+
+        echo "✅ $model downloaded successfully!"
+    done
+fi
 
 echo ""
 echo "🎉 All coding models downloaded!"
 echo "📋 Available models:"
-microk8s kubectl exec -n ollama-stack deployment/ollama -- ollama list
+microk8s kubectl exec -n "$NAMESPACE" deployment/ollama -- ollama list
 
 echo ""
 echo "💾 Final storage usage:"
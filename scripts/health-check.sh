@@ -12,6 +12,7 @@ GRAFANA_NAMESPACE="${GRAFANA_NAMESPACE:-observability}"
 TIMEOUT="${HEALTH_CHECK_TIMEOUT:-10}"
 RETRY_COUNT="${HEALTH_CHECK_RETRIES:-3}"
 RETRY_DELAY="${HEALTH_CHECK_DELAY:-5}"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 # Default endpoints - CHANGE THESE TO MATCH YOUR ENVIRONMENT
 # Use auto-detection or environment variables for actual deployment
@@ -94,9 +95,29 @@ check_prerequisites() {
     echo ""
 }
 
+has_k8s_collector() {
+    command -v python3 >/dev/null 2>&1 && [ -f "$SCRIPT_DIR/health/k8s_state.py" ]
+}
+
+# The collector fetches once per run; later sections read the state it saved
+k8s_collector() {
+    python3 "$SCRIPT_DIR/health/k8s_state.py" "$1" --namespace "$NAMESPACE" \
+        --grafana-namespace "$GRAFANA_NAMESPACE" --state-file "$K8S_STATE_FILE"
+}
+
 check_kubernetes_resources() {
     print_header "☸️  Kubernetes Resources"
     
+    # One batched fetch answers every check when the Python collector is available
+    if has_k8s_collector; then
+        local rc=0
+        k8s_collector check || rc=$?
+        echo ""
+        # 2: namespace missing or cluster unreachable
+        [ "$rc" -eq 2 ] && return 1
+        return 0
+    fi
+    
     # Check namespace
     if kubectl get namespace "$NAMESPACE" >/dev/null 2>&1; then
         print_status "OK" "Namespace '$NAMESPACE' exists" "$CHECK"
@@ -195,6 +216,18 @@ test_endpoint() {
 auto_detect_endpoints() {
     print_status "INFO" "Auto-detecting service endpoints..." "$INFO"
     
+    if has_k8s_collector; then
+        local key value
+        while IFS='=' read -r key value; do
+            case "$key" in
+                OPENWEBUI_URL) OPENWEBUI_URL="$value"; print_status "INFO" "Detected OpenWebUI: $value" "$INFO" ;;
+                GRAFANA_URL)   GRAFANA_URL="$value"; print_status "INFO" "Detected Grafana: $value" "$INFO" ;;
+            esac
+        done < <(k8s_collector endpoints 2>/dev/null || true)
+        echo ""
+        return 0
+    fi
+    
     # Try to get actual LoadBalancer IPs from Kubernetes
     local openwebui_ip=$(kubectl get service open-webui-service-local -n "$NAMESPACE" -o jsonpath='{.status.loadBalancer.ingress[0].ip}' 2>/dev/null)
     local grafana_ip=$(kubectl get service grafana-external -n "$GRAFANA_NAMESPACE" -o jsonpath='{.status.loadBalancer.ingress[0].ip}' 2>/dev/null)
@@ -215,6 +248,20 @@ auto_detect_endpoints() {
 check_endpoints() {
     print_header "🌐 Endpoint Health Check"
     
+    # Probe all endpoints concurrently when the Python checker is available
+    if command -v python3 >/dev/null 2>&1 && [ -f "$SCRIPT_DIR/health/health_check.py" ]; then
+        local rc=0
+        python3 "$SCRIPT_DIR/health/health_check.py" \
+            --openwebui-url "$OPENWEBUI_URL" \
+            --grafana-url "$GRAFANA_URL" \
+            --tailscale-ip "$TAILSCALE_IP" \
+            --deadline $((TIMEOUT * 2)) \
+            --retries "$RETRY_COUNT" \
+            --backoff-cap "$RETRY_DELAY" || rc=1
+        echo ""
+        return $rc
+    fi
+    
     local all_endpoints_ok=true
     
     # Check if URLs are still placeholders
@@ -304,16 +351,23 @@ check_ai_models() {
 check_storage() {
     print_header "💾 Storage Check"
     
-    # Check storage class
-    local storage_class=$(kubectl get pvc ollama-pvc -n "$NAMESPACE" -o jsonpath='{.spec.storageClassName}' 2>/dev/null)
-    if [ -n "$storage_class" ]; then
-        print_status "OK" "Using storage class: $storage_class" "$CHECK"
+    local ollama_running=false
+    if has_k8s_collector; then
+        # Storage class and the running Ollama pod, from the fetch check_kubernetes_resources saved
+        k8s_collector storage && ollama_running=true
     else
-        print_status "WARN" "No storage class specified" "$WARNING"
+        # Check storage class
+        local storage_class=$(kubectl get pvc ollama-pvc -n "$NAMESPACE" -o jsonpath='{.spec.storageClassName}' 2>/dev/null)
+        if [ -n "$storage_class" ]; then
+            print_status "OK" "Using storage class: $storage_class" "$CHECK"
+        else
+            print_status "WARN" "No storage class specified" "$WARNING"
+        fi
+        kubectl get pods -n "$NAMESPACE" -l app=ollama --field-selector=status.phase=Running >/dev/null 2>&1 && ollama_running=true
     fi
     
     # Check PV usage within pods
-    if kubectl get pods -n "$NAMESPACE" -l app=ollama --field-selector=status.phase=Running >/dev/null 2>&1; then
+    if [ "$ollama_running" = true ]; then
         local storage_usage
         if storage_usage=$(kubectl exec -n "$NAMESPACE" deployment/ollama -- df -h /root/.ollama 2>/dev/null); then
             local used_percent=$(echo "$storage_usage" | tail -1 | awk '{print $5}' | sed 's/%//')
@@ -418,6 +472,7 @@ Options:
   -q, --quick             Quick check (endpoints only)
   -v, --verbose           Verbose output
   -a, --auto-detect       Auto-detect service endpoints from Kubernetes
+  -d, --daemon            Run the watch-based health daemon (status on http://127.0.0.1:8765/status)
   --openwebui-url URL     Override OpenWebUI URL
   --grafana-url URL       Override Grafana URL
   --tailscale-ip IP       Override Tailscale IP
@@ -460,6 +515,7 @@ EOF
 QUICK_MODE=false
 VERBOSE=false
 AUTO_DETECT=false
+DAEMON_MODE=false
 
 while [[ $# -gt 0 ]]; do
     case $1 in
@@ -479,6 +535,10 @@ while [[ $# -gt 0 ]]; do
             AUTO_DETECT=true
             shift
             ;;
+        -d|--daemon)
+            DAEMON_MODE=true
+            shift
+            ;;
         --openwebui-url)
             OPENWEBUI_URL="$2"
             shift 2
@@ -507,10 +567,23 @@ while [[ $# -gt 0 ]]; do
     esac
 done
 
+# Daemon mode: keep status current from watch streams instead of one-shot checks
+if [ "$DAEMON_MODE" = true ]; then
+    export OPENWEBUI_URL GRAFANA_URL TAILSCALE_IP
+    exec python3 "$SCRIPT_DIR/health/health_daemon.py" \
+        --namespace "$NAMESPACE" \
+        --grafana-namespace "$GRAFANA_NAMESPACE" \
+        --deadline $((TIMEOUT * 2)) \
+        --retries "$RETRY_COUNT"
+fi
+
 # Main execution
 main() {
     local start_time=$(date +%s)
     
+    K8S_STATE_FILE=$(mktemp)
+    trap 'rm -f "$K8S_STATE_FILE"' EXIT
+    
     print_header "🏥 Ollama Stack Health Check - $(date)"
     
     check_prerequisites
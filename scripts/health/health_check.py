@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Ollama Stack Endpoint Health Check
+Probes every endpoint concurrently with asyncio over pooled keep-alive connections
+
+Each endpoint gets its own deadline covering all of its attempts; retries
+wait a jittered exponential backoff instead of a fixed delay, so a full run
+takes about as long as the slowest single probe.
+No external dependencies required.
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Same placeholders as health-check.sh
+PLACEHOLDER = "YOUR-"
+
+
+class Endpoint:
+    """An HTTP endpoint and the status code that counts as healthy"""
+
+    def __init__(self, name: str, url: str, expected_status: int = 200, icon: str = "🌐",
+                 required: bool = True):
+        self.name = name
+        self.url = url
+        self.expected_status = expected_status
+        self.icon = icon
+        self.required = required
+
+
+class ProbeResult:
+    """Outcome of probing one endpoint"""
+
+    def __init__(self, endpoint: Endpoint, ok: bool, status: Optional[int], elapsed: float,
+                 attempts: int, error: str = ""):
+        self.endpoint = endpoint
+        self.ok = ok
+        self.status = status
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.endpoint.name,
+            "url": self.endpoint.url,
+            "required": self.endpoint.required,
+            "ok": self.ok,
+            "status": self.status,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+class HttpError(Exception):
+    """Raised when a response cannot be read"""
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)"""
+
+    def __init__(self, max_idle: int = 4):
+        self.max_idle = max_idle
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+
+    async def acquire(self, scheme: str, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        """Return (reader, writer, reused)"""
+        idle = self._idle.get((scheme, host, port), [])
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        ssl_context = None
+        if scheme == "https":
+            import ssl
+            ssl_context = ssl.create_default_context()
+        reader, writer = await asyncio.open_connection(host, port, ssl=ssl_context)
+        return reader, writer, False
+
+    def release(self, key: Tuple[str, str, int], reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle and not writer.is_closing():
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 client that reuses connections between requests"""
+
+    def __init__(self, pool: Optional[ConnectionPool] = None, user_agent: str = "ollama-stack-health/1.0"):
+        self.pool = pool or ConnectionPool()
+        self.user_agent = user_agent
+        self.reused = 0
+
+    async def request(self, method: str, url: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request and return (status, lower-cased headers, body)"""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        host = parts.hostname or "localhost"
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        key = (scheme, host, port)
+
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}", f"User-Agent: {self.user_agent}",
+                 "Connection: keep-alive", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        payload = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+        reader, writer, reused = await self.pool.acquire(scheme, host, port)
+        try:
+            writer.write(payload)
+            await writer.drain()
+            status, response_headers, response_body = await self._read_response(reader, method)
+        except (OSError, asyncio.IncompleteReadError, HttpError):
+            writer.close()
+            if not reused:
+                raise
+            # A pooled connection went stale; retry once on a fresh one
+            return await self.request(method, url, body, headers)
+        except BaseException:
+            writer.close()
+            raise
+
+        self.reused += reused
+        if response_headers.get("connection", "").lower() == "close":
+            writer.close()
+        else:
+            self.pool.release(key, reader, writer)
+        return status, response_headers, response_body
+
+    async def _read_response(self, reader: asyncio.StreamReader, method: str) -> Tuple[int, Dict[str, str], bytes]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise HttpError("connection closed before response")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f"bad status line: {status_line!r}")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return status, headers, b""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            return status, headers, b"".join(chunks)
+        if "content-length" in headers:
+            return status, headers, await reader.readexactly(int(headers["content-length"]))
+        headers["connection"] = "close"
+        return status, headers, await reader.read()
+
+    async def get(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        return await self.request("GET", url)
+
+    async def close(self):
+        await self.pool.close()
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+async def probe(client: HttpClient, endpoint: Endpoint, deadline: float, retries: int = 3,
+                backoff_base: float = 0.5, backoff_cap: float = 5.0) -> ProbeResult:
+    """Probe one endpoint until it answers as expected, retries run out or its deadline passes"""
+    start = time.monotonic()
+    status: Optional[int] = None
+    error = ""
+    attempt = 0
+    while attempt < retries:
+        attempt += 1
+        remaining = deadline - (time.monotonic() - start)
+        if remaining <= 0:
+            error = error or "deadline exceeded"
+            break
+        try:
+            status, _, _ = await asyncio.wait_for(client.get(endpoint.url), remaining)
+            if status == endpoint.expected_status:
+                return ProbeResult(endpoint, True, status, time.monotonic() - start, attempt)
+            error = f"HTTP {status}"
+        except asyncio.TimeoutError:
+            error = "deadline exceeded"
+            break
+        except (OSError, HttpError, asyncio.IncompleteReadError) as e:
+            status = None
+            error = str(e) or type(e).__name__
+        if attempt < retries:
+            delay = backoff_delay(attempt - 1, backoff_base, backoff_cap)
+            remaining = deadline - (time.monotonic() - start)
+            if delay >= remaining:
+                break
+            await asyncio.sleep(delay)
+    return ProbeResult(endpoint, False, status, time.monotonic() - start, attempt, error)
+
+
+async def check_all(endpoints: List[Endpoint], deadline: float, retries: int = 3,
+                    backoff_base: float = 0.5, backoff_cap: float = 5.0,
+                    client: Optional[HttpClient] = None) -> List[ProbeResult]:
+    """Probe all endpoints concurrently on one shared client"""
+    own_client = client is None
+    client = client or HttpClient()
+    try:
+        return await asyncio.gather(*(probe(client, endpoint, deadline, retries, backoff_base, backoff_cap)
+                                      for endpoint in endpoints))
+    finally:
+        if own_client:
+            await client.close()
+
+
+async def tailnet_name(timeout: float = 3.0) -> Optional[str]:
+    """Tailnet name from `tailscale status --json`, or None when Tailscale is not available"""
+    import json
+    import shutil
+
+    if not shutil.which("tailscale"):
+        return None
+    try:
+        proc = await asyncio.create_subprocess_exec("tailscale", "status", "--json",
+                                                    stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.DEVNULL)
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        if proc.returncode != 0:
+            return None
+        status = json.loads(stdout)
+        return (status.get("CurrentTailnet") or {}).get("Name") or status.get("TailnetName")
+    except (OSError, ValueError, asyncio.TimeoutError):
+        return None
+
+
+def configured(value: Optional[str]) -> bool:
+    return bool(value) and PLACEHOLDER not in value
+
+
+def default_endpoints(openwebui_url: Optional[str], grafana_url: Optional[str],
+                      tailscale_ip: Optional[str], tailnet: Optional[str] = None) -> Tuple[List[Endpoint], List[str]]:
+    """Endpoints health-check.sh probes, plus warnings for the ones still unconfigured"""
+    endpoints = []
+    warnings = []
+    if configured(openwebui_url):
+        endpoints.append(Endpoint("OpenWebUI", openwebui_url, icon="🚀"))
+    else:
+        warnings.append("OpenWebUI URL not configured. Use --auto-detect or set OPENWEBUI_URL")
+    if configured(grafana_url):
+        # Health API avoids the login redirect
+        endpoints.append(Endpoint("Grafana Health API (MetalLB)", f"{grafana_url.rstrip('/')}/api/health", icon="📊"))
+        if tailnet:
+            endpoints.append(Endpoint("Grafana Health API (Tailscale)",
+                                      f"http://grafana-ollama.{tailnet}.ts.net:3000/api/health",
+                                      icon="🔒", required=False))
+    else:
+        warnings.append("Grafana URL not configured. Use --auto-detect or set GRAFANA_URL")
+    if configured(tailscale_ip):
+        endpoints.append(Endpoint("Tailscale WebUI", f"http://{tailscale_ip}:8080", icon="🔒", required=False))
+    return endpoints, warnings
+
+
+def print_results(results: List[ProbeResult]):
+    for result in results:
+        endpoint = result.endpoint
+        if result.ok:
+            print(f"{endpoint.icon} {endpoint.name} is responding ({result.status}, {result.elapsed:.3f}s)")
+        else:
+            icon = "❌" if endpoint.required else "⚠️"
+            print(f"{icon} {endpoint.name} failed after {result.attempts} attempt(s) "
+                  f"in {result.elapsed:.3f}s: {result.error}")
+            print(f"    {endpoint.url}")
+
+
+async def run(args) -> int:
+    tailnet = await tailnet_name() if configured(args.grafana_url) and not args.no_tailscale else None
+    endpoints, warnings = default_endpoints(args.openwebui_url, args.grafana_url, args.tailscale_ip, tailnet)
+    for warning in warnings:
+        print(f"⚠️  {warning}")
+
+    start = time.monotonic()
+    results = await check_all(endpoints, args.deadline, args.retries, args.backoff_base, args.backoff_cap)
+    elapsed = time.monotonic() - start
+
+    if args.json:
+        import json
+        print(json.dumps({"elapsed_ms": round(elapsed * 1000, 1),
+                          "endpoints": [r.to_dict() for r in results]}, indent=2))
+    else:
+        print_results(results)
+        print(f"\nℹ️  Probed {len(results)} endpoints concurrently in {elapsed:.2f}s")
+
+    failed = [r for r in results if not r.ok and r.endpoint.required]
+    return 1 if failed or warnings else 0
+
+
+def main():
+    """Probe all stack endpoints concurrently"""
+    import argparse
+
+    timeout = float(os.environ.get("HEALTH_CHECK_TIMEOUT", "10"))
+    parser = argparse.ArgumentParser(description='Concurrent endpoint health check for the Ollama stack')
+    parser.add_argument('--openwebui-url', default=os.environ.get("OPENWEBUI_URL"), help='OpenWebUI URL')
+    parser.add_argument('--grafana-url', default=os.environ.get("GRAFANA_URL"), help='Grafana URL')
+    parser.add_argument('--tailscale-ip', default=os.environ.get("TAILSCALE_IP"), help='Tailscale mesh IP')
+    parser.add_argument('--deadline', type=float, default=timeout * 2,
+                        help='Seconds allowed per endpoint, all attempts included (default: 2 x HEALTH_CHECK_TIMEOUT)')
+    parser.add_argument('--retries', type=int, default=int(os.environ.get("HEALTH_CHECK_RETRIES", "3")),
+                        help='Attempts per endpoint (default: HEALTH_CHECK_RETRIES or 3)')
+    parser.add_argument('--backoff-base', type=float, default=0.5, help='Backoff base in seconds (default: 0.5)')
+    parser.add_argument('--backoff-cap', type=float, default=float(os.environ.get("HEALTH_CHECK_DELAY", "5")),
+                        help='Largest backoff in seconds (default: HEALTH_CHECK_DELAY or 5)')
+    parser.add_argument('--no-tailscale', action='store_true', help='Skip the Grafana Tailscale endpoint')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Ollama Stack Health Daemon
+Keeps cluster state current from Kubernetes watch streams, probes endpoints
+on a schedule and serves the latest status from memory over HTTP/JSON
+
+    GET /status    full status document
+    GET /healthz   200 when the stack is healthy, 503 otherwise
+
+Resource checks and endpoint discovery are answered from the watched state,
+so reading health never triggers discovery or kubectl calls.
+No external dependencies required.
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import threading
+import subprocess
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Tuple
+
+from health_check import Endpoint, HttpClient, check_all, configured, default_endpoints
+from k8s_state import (KINDS, OBJECT_KINDS, KubeState, check_resources, check_storage_class, detect_endpoints,
+                       list_items)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def iter_json_stream(stream, chunk_size: int = 65536):
+    """Yield JSON documents from a stream of concatenated (possibly pretty-printed) objects"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while True:
+        chunk = stream.read1(chunk_size) if hasattr(stream, "read1") else stream.read(chunk_size)
+        if not chunk:
+            return
+        buffer += chunk.decode("utf-8") if isinstance(chunk, bytes) else chunk
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                break
+            try:
+                document, end = decoder.raw_decode(buffer)
+            except ValueError:
+                break
+            buffer = buffer[end:]
+            yield document
+
+
+class HealthDaemon:
+    """Watched cluster state, scheduled probes and the status document built from them"""
+
+    def __init__(self, namespace: str, grafana_namespace: str, kubectl: str = "kubectl",
+                 context: Optional[str] = None, probe_interval: float = 30.0, model_interval: float = 300.0,
+                 deadline: float = 20.0, retries: int = 3, overrides: Optional[Dict[str, str]] = None):
+        self.namespace = namespace
+        self.grafana_namespace = grafana_namespace
+        self.kubectl = kubectl.split() + (["--context", context] if context else [])
+        self.probe_interval = probe_interval
+        self.model_interval = model_interval
+        self.deadline = deadline
+        self.retries = retries
+        self.overrides = {key: value for key, value in (overrides or {}).items() if configured(value)}
+
+        self.state = KubeState()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        # One watch per kind and namespace (the namespaces themselves are watched by name); only Grafana's
+        # service is needed from its namespace
+        self.streams: Dict[Tuple[str, str], bool] = {(kind, namespace): False for kind in KINDS}
+        self.streams.update({(kind, grafana_namespace): False for kind in ("namespaces", "services")})
+        self.events = 0
+        self.probes: List[Dict[str, Any]] = []
+        self.last_probe_at: Optional[str] = None
+        self.models: Dict[str, Any] = {"names": [], "refreshed_at": None, "error": ""}
+        self._status = b"{}"
+        self._healthy = False
+        self.rebuild()
+
+    # --- watch streams -------------------------------------------------
+
+    def watching(self, kind: str) -> bool:
+        return all(up for (stream_kind, _), up in self.streams.items() if stream_kind == kind)
+
+    def _scope(self, kind: str, namespace: str) -> List[str]:
+        """kubectl get arguments for one stream: a namespace by name, or a kind within a namespace"""
+        return ["get", kind, namespace] if kind == "namespaces" else ["get", kind, "-n", namespace]
+
+    def watch(self, kind: str, namespace: str):
+        """List one kind in one namespace, then apply its watch events; relists and reconnects with jittered
+        backoff when the stream ends"""
+        attempt = 0
+        while not self.stop_event.is_set():
+            proc = None
+            if self.relist(kind, namespace):
+                cmd = self.kubectl + self._scope(kind, namespace) + ["-o", "json", "--watch", "--output-watch-events"]
+                try:
+                    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+                except OSError:
+                    proc = None
+            if proc is not None:
+                try:
+                    for event in iter_json_stream(proc.stdout):
+                        attempt = 0
+                        self.apply_event(event)
+                        if self.stop_event.is_set():
+                            break
+                finally:
+                    proc.kill()
+                    proc.wait()
+            self.streams[(kind, namespace)] = False
+            self.rebuild()
+            attempt += 1
+            self.stop_event.wait(random.uniform(0, min(30.0, 2 ** attempt)))
+
+    def relist(self, kind: str, namespace: str) -> bool:
+        """Replace the stream's objects with a fresh list, dropping those deleted while it was closed; the
+        stream counts as watched from here, even when it has no objects"""
+        cmd = self.kubectl + self._scope(kind, namespace) + ["--ignore-not-found", "-o", "json"]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            items = list_items(result.stdout) if result.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired, ValueError):
+            items = None
+        if items is None:
+            return False
+        with self.lock:
+            if kind == "namespaces":
+                self.state.replace(OBJECT_KINDS[kind], items, name=namespace)
+            else:
+                self.state.replace(OBJECT_KINDS[kind], items, namespace=namespace)
+        self.streams[(kind, namespace)] = True
+        self.rebuild()
+        return True
+
+    def apply_event(self, event: Dict[str, Any]):
+        obj = event.get("object") or {}
+        event_type = event.get("type")
+        if event_type not in ("ADDED", "MODIFIED", "DELETED"):
+            return
+        with self.lock:
+            if event_type == "DELETED":
+                self.state.remove(obj)
+            else:
+                self.state.put(obj)
+            self.events += 1
+        self.rebuild()
+
+    # --- scheduled work ------------------------------------------------
+
+    def endpoints(self) -> List[Endpoint]:
+        with self.lock:
+            detected = detect_endpoints(self.state, self.namespace, self.grafana_namespace)
+        detected.update(self.overrides)
+        endpoints, _ = default_endpoints(detected.get("OPENWEBUI_URL"), detected.get("GRAFANA_URL"),
+                                         detected.get("TAILSCALE_IP"))
+        return endpoints
+
+    async def probe_loop(self):
+        """Probe the current endpoints every probe_interval seconds on one keep-alive client"""
+        client = HttpClient()
+        try:
+            while not self.stop_event.is_set():
+                endpoints = self.endpoints()
+                results = await check_all(endpoints, self.deadline, self.retries, client=client) if endpoints else []
+                self.probes = [result.to_dict() for result in results]
+                self.last_probe_at = _now()
+                self.rebuild()
+                await asyncio.get_running_loop().run_in_executor(None, self.stop_event.wait, self.probe_interval)
+        finally:
+            await client.close()
+
+    def refresh_models(self):
+        """`ollama list` in the Ollama deployment, on its own slower schedule"""
+        # Wait for the pod watch so the first refresh sees the Ollama pod
+        while not self.watching("pods") and not self.stop_event.wait(0.5):
+            pass
+        while not self.stop_event.is_set():
+            with self.lock:
+                running = self.state.running_pods(self.namespace, "ollama")
+            if running:
+                cmd = self.kubectl + ["exec", "-n", self.namespace, "deployment/ollama", "--", "ollama", "list"]
+                try:
+                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+                    if result.returncode == 0:
+                        names = [line.split()[0] for line in result.stdout.splitlines()[1:] if line.strip()]
+                        self.models = {"names": names, "refreshed_at": _now(), "error": ""}
+                    else:
+                        self.models["error"] = result.stderr.strip()
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    self.models["error"] = str(e)
+            else:
+                self.models["error"] = "Ollama pod not running"
+            self.rebuild()
+            self.stop_event.wait(self.model_interval)
+
+    # --- status --------------------------------------------------------
+
+    def rebuild(self):
+        """Recompute the status document; readers get the cached bytes"""
+        with self.lock:
+            synced = all(self.streams.values())
+            watching = {kind: self.watching(kind) for kind in KINDS}
+            checks = [c.to_dict() for c in check_resources(self.state, self.namespace)]
+            storage = check_storage_class(self.state, self.namespace).to_dict()
+            events = self.events
+
+        statuses = [c["status"] for c in checks]
+        failed = [p for p in self.probes if not p["ok"] and p["required"]]
+        if "ERROR" in statuses or failed:
+            overall = "ERROR"
+        elif "WARN" in statuses or not synced or not self.last_probe_at:
+            overall = "WARN"
+        else:
+            overall = "OK"
+
+        status = {
+            "generated_at": _now(),
+            "overall": overall,
+            "namespace": self.namespace,
+            "kubernetes": {"watching": watching, "events": events, "checks": checks,
+                           "storage": storage},
+            "endpoints": {"last_probe_at": self.last_probe_at, "results": self.probes},
+            "models": self.models,
+        }
+        self._status = json.dumps(status, indent=2).encode("utf-8")
+        self._healthy = overall == "OK"
+
+    def status(self) -> bytes:
+        return self._status
+
+    def healthy(self) -> bool:
+        return self._healthy
+
+    # --- lifecycle -----------------------------------------------------
+
+    def start(self) -> List[threading.Thread]:
+        threads = [threading.Thread(target=self.watch, args=(kind, ns), name=f"watch-{kind}-{ns}", daemon=True)
+                   for kind, ns in self.streams]
+        threads.append(threading.Thread(target=self.refresh_models, name="models", daemon=True))
+        threads.append(threading.Thread(target=lambda: asyncio.run(self.probe_loop()), name="probes", daemon=True))
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def make_handler(daemon: HealthDaemon):
+    class StatusHandler(BaseHTTPRequestHandler):
+        """Serves the daemon's cached status"""
+
+        def do_GET(self):
+            if self.path in ("/", "/status"):
+                self._send(200, daemon.status())
+            elif self.path == "/healthz":
+                healthy = daemon.healthy()
+                self._send(200 if healthy else 503, b'{"healthy": %s}' % (b"true" if healthy else b"false"))
+            else:
+                self._send(404, b'{"error": "not found"}')
+
+        def _send(self, code: int, body: bytes):
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StatusHandler
+
+
+def main():
+    """Run the health daemon until interrupted"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Watch-based health daemon for the Ollama stack')
+    parser.add_argument('--listen', default='127.0.0.1', help='Address to serve status on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to serve status on (default: 8765)')
+    parser.add_argument('--namespace', '-n', default=os.environ.get("OLLAMA_NAMESPACE", "ollama-stack"),
+                        help='Stack namespace (default: OLLAMA_NAMESPACE or ollama-stack)')
+    parser.add_argument('--grafana-namespace', default=os.environ.get("GRAFANA_NAMESPACE", "observability"),
+                        help='Grafana namespace (default: GRAFANA_NAMESPACE or observability)')
+    parser.add_argument('--context', help='kubectl context')
+    parser.add_argument('--kubectl', default='kubectl', help="kubectl command (e.g. 'microk8s kubectl')")
+    parser.add_argument('--probe-interval', type=float, default=30.0, help='Seconds between endpoint probes (default: 30)')
+    parser.add_argument('--model-interval', type=float, default=300.0,
+                        help='Seconds between model list refreshes (default: 300)')
+    parser.add_argument('--deadline', type=float, default=float(os.environ.get("HEALTH_CHECK_TIMEOUT", "10")) * 2,
+                        help='Seconds allowed per endpoint probe (default: 2 x HEALTH_CHECK_TIMEOUT)')
+    parser.add_argument('--retries', type=int, default=int(os.environ.get("HEALTH_CHECK_RETRIES", "3")),
+                        help='Attempts per endpoint probe (default: HEALTH_CHECK_RETRIES or 3)')
+    args = parser.parse_args()
+
+    daemon = HealthDaemon(args.namespace, args.grafana_namespace, args.kubectl, args.context,
+                          args.probe_interval, args.model_interval, args.deadline, args.retries,
+                          overrides={"OPENWEBUI_URL": os.environ.get("OPENWEBUI_URL"),
+                                     "GRAFANA_URL": os.environ.get("GRAFANA_URL"),
+                                     "TAILSCALE_IP": os.environ.get("TAILSCALE_IP")})
+    daemon.start()
+
+    server = ThreadingHTTPServer((args.listen, args.port), make_handler(daemon))
+    print(f"🏥 Health daemon serving http://{args.listen}:{args.port}/status")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping health daemon")
+    finally:
+        daemon.stop()
+        server.server_close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
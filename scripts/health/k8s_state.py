@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Batched Kubernetes State for Health Checks
+Fetches every resource kind the health checks need with one kubectl call
+per namespace, indexes it by name in memory and answers all checks from
+that index
+
+A health run costs the same few API queries no matter how many
+deployments, services or PVCs are checked, and needs read access to the
+stack's namespaces only. health-check.sh shares one fetch between its
+sections through --state-file.
+No external dependencies required.
+"""
+
+import os
+import sys
+import json
+import subprocess
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+KINDS = ["namespaces", "deployments", "services", "persistentvolumeclaims", "pods"]
+# Listed together, one query per namespace; the namespaces themselves are fetched by name
+NAMESPACED_KINDS = KINDS[1:]
+# The kind field of each resource's objects
+OBJECT_KINDS = {"namespaces": "Namespace", "deployments": "Deployment", "services": "Service",
+                "persistentvolumeclaims": "PersistentVolumeClaim", "pods": "Pod"}
+
+DEFAULT_DEPLOYMENTS = ["ollama", "open-webui"]
+DEFAULT_SERVICES = ["ollama-service", "open-webui-service-local"]
+DEFAULT_PVCS = ["ollama-pvc", "open-webui-data-pvc"]
+
+
+class KubeStateError(Exception):
+    """Raised when the cluster cannot be queried"""
+
+
+def list_items(raw: str) -> List[Dict[str, Any]]:
+    """Objects of `kubectl get -o json` output: a List, a single object (one name asked for) or nothing"""
+    document = json.loads(raw) if raw.strip() else {}
+    if "items" in document:
+        return document["items"] or []
+    return [document] if document.get("kind") else []
+
+
+def kubectl_runner(kubectl: str = "kubectl", context: Optional[str] = None,
+                   timeout: int = 30) -> Callable[[List[str]], str]:
+    """Runner that executes kubectl with the given arguments"""
+    def run(args: List[str]) -> str:
+        cmd = kubectl.split() + (["--context", context] if context else []) + args
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise KubeStateError(str(e)) from e
+        if result.returncode != 0:
+            raise KubeStateError(result.stderr.strip())
+        return result.stdout
+    return run
+
+
+class Check:
+    """One health check outcome, printed like health-check.sh's print_status"""
+
+    ICONS = {"OK": "✅", "WARN": "⚠️", "ERROR": "❌", "INFO": "ℹ️"}
+
+    def __init__(self, status: str, message: str):
+        self.status = status
+        self.message = message
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"status": self.status, "message": self.message}
+
+    def __str__(self) -> str:
+        return f"{self.ICONS[self.status]} {self.message}"
+
+
+class KubeState:
+    """In-memory index of cluster objects by (kind, namespace, name)"""
+
+    def __init__(self, items: Optional[List[Dict[str, Any]]] = None):
+        self.objects: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.api_calls = 0
+        for item in items or []:
+            self.put(item)
+
+    @classmethod
+    def fetch(cls, namespaces: List[str], runner: Optional[Callable[[List[str]], str]] = None) -> "KubeState":
+        """Load every kind the checks use: the namespaces by name, then one list call for each that exists"""
+        runner = runner or kubectl_runner()
+        names = list(dict.fromkeys(namespaces))
+        raw = runner(["get", "namespaces"] + names + ["--ignore-not-found", "-o", "json"])
+        state = cls(list_items(raw))
+        state.api_calls = 1
+        for namespace in names:
+            if state.has_namespace(namespace):
+                raw = runner(["get", ",".join(NAMESPACED_KINDS), "-n", namespace, "-o", "json"])
+                for item in list_items(raw):
+                    state.put(item)
+                state.api_calls += 1
+        return state
+
+    @classmethod
+    def load(cls, path: str) -> "KubeState":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f).get("items", []))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"items": list(self.objects.values())}, f)
+
+    @staticmethod
+    def key(obj: Dict[str, Any]) -> Tuple[str, str, str]:
+        metadata = obj.get("metadata", {})
+        return obj.get("kind", ""), metadata.get("namespace", ""), metadata.get("name", "")
+
+    def put(self, obj: Dict[str, Any]):
+        self.objects[self.key(obj)] = obj
+
+    def remove(self, obj: Dict[str, Any]):
+        self.objects.pop(self.key(obj), None)
+
+    def replace(self, kind: str, items: List[Dict[str, Any]], namespace: Optional[str] = None,
+                name: Optional[str] = None):
+        """Make items the only objects of kind (in namespace, or with name, when given)"""
+        for key in [k for k in self.objects if k[0] == kind and namespace in (None, k[1]) and name in (None, k[2])]:
+            del self.objects[key]
+        for item in items:
+            self.put(dict(item, kind=item.get("kind") or kind))
+
+    def get(self, kind: str, name: str, namespace: str = "") -> Optional[Dict[str, Any]]:
+        return self.objects.get((kind, namespace, name))
+
+    def list(self, kind: str, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [obj for (k, ns, _), obj in self.objects.items()
+                if k == kind and (namespace is None or ns == namespace)]
+
+    def has_namespace(self, namespace: str) -> bool:
+        return self.get("Namespace", namespace) is not None
+
+    def deployment_replicas(self, name: str, namespace: str) -> Optional[Tuple[int, int]]:
+        """(ready, desired) replicas, or None if the deployment does not exist"""
+        deployment = self.get("Deployment", name, namespace)
+        if deployment is None:
+            return None
+        return (deployment.get("status", {}).get("readyReplicas", 0) or 0,
+                deployment.get("spec", {}).get("replicas", 0) or 0)
+
+    def service_external_ip(self, name: str, namespace: str) -> Optional[str]:
+        service = self.get("Service", name, namespace)
+        if service is None:
+            return None
+        ingress = service.get("status", {}).get("loadBalancer", {}).get("ingress") or [{}]
+        return ingress[0].get("ip") or ingress[0].get("hostname")
+
+    def pvc(self, name: str, namespace: str) -> Optional[Dict[str, Any]]:
+        """Phase, requested size and storage class of a PVC"""
+        claim = self.get("PersistentVolumeClaim", name, namespace)
+        if claim is None:
+            return None
+        return {
+            "phase": claim.get("status", {}).get("phase"),
+            "size": claim.get("spec", {}).get("resources", {}).get("requests", {}).get("storage"),
+            "storage_class": claim.get("spec", {}).get("storageClassName"),
+        }
+
+    def running_pods(self, namespace: str, app: str) -> List[Dict[str, Any]]:
+        return [pod for pod in self.list("Pod", namespace)
+                if pod.get("metadata", {}).get("labels", {}).get("app") == app
+                and pod.get("status", {}).get("phase") == "Running"]
+
+
+def check_resources(state: KubeState, namespace: str, deployments: List[str] = DEFAULT_DEPLOYMENTS,
+                    services: List[str] = DEFAULT_SERVICES, pvcs: List[str] = DEFAULT_PVCS) -> List[Check]:
+    """The checks of health-check.sh's check_kubernetes_resources, answered from the index"""
+    if not state.has_namespace(namespace):
+        return [Check("ERROR", f"Namespace '{namespace}' not found")]
+    checks = [Check("OK", f"Namespace '{namespace}' exists")]
+
+    for name in deployments:
+        replicas = state.deployment_replicas(name, namespace)
+        if replicas is None:
+            checks.append(Check("ERROR", f"Deployment '{name}' not found"))
+        elif replicas[0] == replicas[1] and replicas[0] > 0:
+            checks.append(Check("OK", f"Deployment '{name}' is ready ({replicas[0]}/{replicas[1]})"))
+        else:
+            checks.append(Check("WARN", f"Deployment '{name}' not ready ({replicas[0]}/{replicas[1]})"))
+
+    for name in services:
+        if state.get("Service", name, namespace) is None:
+            checks.append(Check("ERROR", f"Service '{name}' not found"))
+            continue
+        checks.append(Check("OK", f"Service '{name}' exists"))
+        external_ip = state.service_external_ip(name, namespace)
+        if external_ip:
+            checks.append(Check("INFO", f"  External IP: {external_ip}"))
+
+    for name in pvcs:
+        claim = state.pvc(name, namespace)
+        if claim is None:
+            checks.append(Check("ERROR", f"PVC '{name}' not found"))
+        elif claim["phase"] == "Bound":
+            checks.append(Check("OK", f"PVC '{name}' is bound ({claim['size']})"))
+        else:
+            checks.append(Check("WARN", f"PVC '{name}' status: {claim['phase']}"))
+    return checks
+
+
+def check_storage_class(state: KubeState, namespace: str, pvc: str = "ollama-pvc") -> Check:
+    claim = state.pvc(pvc, namespace)
+    if claim and claim["storage_class"]:
+        return Check("OK", f"Using storage class: {claim['storage_class']}")
+    return Check("WARN", "No storage class specified")
+
+
+def detect_endpoints(state: KubeState, namespace: str, grafana_namespace: str) -> Dict[str, str]:
+    """LoadBalancer URLs for OpenWebUI and Grafana, as health-check.sh's auto_detect_endpoints"""
+    endpoints = {}
+    openwebui_ip = state.service_external_ip("open-webui-service-local", namespace)
+    if openwebui_ip:
+        endpoints["OPENWEBUI_URL"] = f"http://{openwebui_ip}:8080"
+    grafana_ip = state.service_external_ip("grafana-external", grafana_namespace)
+    if grafana_ip:
+        endpoints["GRAFANA_URL"] = f"http://{grafana_ip}:3000"
+    return endpoints
+
+
+def main():
+    """Run the Kubernetes resource checks from one batched fetch"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Batched Kubernetes resource checks for the Ollama stack')
+    parser.add_argument('command', nargs='?', choices=['check', 'storage', 'endpoints'], default='check',
+                        help="'check' prints resource checks, 'storage' the storage class (exit 1 when no Ollama "
+                             "pod runs), 'endpoints' detected URLs as KEY=VALUE")
+    parser.add_argument('--namespace', '-n', default=os.environ.get("OLLAMA_NAMESPACE", "ollama-stack"),
+                        help='Stack namespace (default: OLLAMA_NAMESPACE or ollama-stack)')
+    parser.add_argument('--grafana-namespace', default=os.environ.get("GRAFANA_NAMESPACE", "observability"),
+                        help='Grafana namespace (default: GRAFANA_NAMESPACE or observability)')
+    parser.add_argument('--context', help='kubectl context')
+    parser.add_argument('--kubectl', default='kubectl', help="kubectl command (e.g. 'microk8s kubectl')")
+    parser.add_argument('--state-file', help='Reuse the state saved here when the file is not empty, else save it')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    try:
+        if args.state_file and os.path.isfile(args.state_file) and os.path.getsize(args.state_file):
+            state = KubeState.load(args.state_file)
+        else:
+            state = KubeState.fetch([args.namespace, args.grafana_namespace],
+                                    kubectl_runner(args.kubectl, args.context))
+            if args.state_file:
+                state.save(args.state_file)
+    except (KubeStateError, ValueError, OSError) as e:
+        print(f"❌ Could not query the cluster: {e}")
+        # As a missing namespace: health-check.sh cannot go on without the cluster
+        sys.exit(2)
+
+    if args.command == 'endpoints':
+        for key, value in detect_endpoints(state, args.namespace, args.grafana_namespace).items():
+            print(f"{key}={value}")
+        return
+
+    if args.command == 'storage':
+        print(check_storage_class(state, args.namespace))
+        sys.exit(0 if state.running_pods(args.namespace, "ollama") else 1)
+
+    checks = check_resources(state, args.namespace)
+    if args.json:
+        print(json.dumps({"api_calls": state.api_calls, "checks": [c.to_dict() for c in checks]}, indent=2))
+    else:
+        for check in checks:
+            print(check)
+    # 2: namespace missing (health-check.sh stops there), 1: other errors
+    if not state.has_namespace(args.namespace):
+        sys.exit(2)
+    sys.exit(1 if any(c.status == "ERROR" for c in checks) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Ollama Admission Control
+Priority classes, per-tenant quotas and weighted fair queueing in front of
+the Ollama API
+
+Ollama serves OLLAMA_NUM_PARALLEL requests at a time and queues the rest
+first come, first served, so one batch job's burst sits in front of every
+interactive chat. This proxy holds the queue instead: at most --slots
+inference requests are passed upstream, and a free slot goes to
+
+- the priority class with the lowest virtual time (stride scheduling: each
+  admission advances a class by 1/weight, so interactive at weight 10 gets
+  ten slots for every batch one while both are waiting), and within it
+- the tenant with the lowest virtual time, by tenant weight.
+
+A class may be capped at a share of the slots (batch: 0.75 by default) so
+a slot is always about to free up for interactive work. Tenants have
+token-bucket quotas on requests and on tokens (prompt + generated, charged
+when a request finishes); a tenant over quota gets 429 with Retry-After.
+
+The tenant comes from the X-Tenant header or a /tenant/<name>/ path prefix
+(for clients that cannot set headers), else it is the default tenant. The
+X-Priority header may move a request to a class of lower weight than its
+tenant's, never a higher one.
+
+    admission.py --upstream http://ollama-backend:11434 --slots 4 --config admission.json
+
+Queue depth, in-flight requests, queue wait and end-to-end latency per class
+are served at /metrics, the scheduler state at /admission/stats.
+No external dependencies required.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, Tuple
+
+from ollama_proxy import ProxyHandler, Upstream, serve
+from prom_metrics import CONTENT_TYPE, LATENCY_BUCKETS, Registry
+from router import INFERENCE_ENDPOINTS
+
+# Queue waits are often far below a second
+WAIT_BUCKETS = (0.005, 0.01, 0.025) + LATENCY_BUCKETS
+# Same shape and keys as ollama.admission in the chart's values.yaml
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "defaultClass": "interactive",
+    "classes": {
+        "interactive": {"weight": 10, "timeout": 120},
+        "batch": {"weight": 1, "maxShare": 0.75, "timeout": 1800},
+    },
+    "defaultTenant": {"requestsPerMinute": 0, "tokensPerMinute": 0},
+    "tenants": {},
+}
+
+
+class AdmissionError(Exception):
+    """A request that cannot be admitted; carries the HTTP status to answer with"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills at `rate` per second up to `capacity`; may be charged below zero after the fact"""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """0 when `amount` is available now, else the seconds until it will be"""
+        self._refill()
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+
+class ClassPolicy:
+    """A priority class: weight, share of slots it may hold, queue timeout and length"""
+
+    def __init__(self, name: str, weight: float = 1.0, max_share: float = 1.0, timeout: float = 300.0,
+                 max_queue: int = 0):
+        self.name = name
+        self.weight = float(weight)
+        self.max_share = float(max_share)
+        self.timeout = float(timeout)
+        self.max_queue = int(max_queue)
+
+
+class Tenant:
+    """A tenant's class, weight and quota buckets"""
+
+    def __init__(self, name: str, klass: str, weight: float = 1.0, requests_per_minute: float = 0,
+                 tokens_per_minute: float = 0):
+        self.name = name
+        self.klass = klass
+        self.weight = float(weight)
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+
+class Ticket:
+    """One request's place in the queue"""
+
+    def __init__(self, tenant: Tenant, klass: str):
+        self.tenant = tenant
+        self.klass = klass
+        self.event = threading.Event()
+        self.admitted = False
+        self.enqueued_at = time.perf_counter()
+        self.admitted_at = 0.0
+
+
+class Flow:
+    """A queue with a virtual time, for stride scheduling"""
+
+    def __init__(self, weight: float, vtime: float):
+        self.weight = weight
+        self.vtime = vtime
+        self.queue: deque = deque()
+
+
+class ClassState(Flow):
+    """A class's flow plus its per-tenant flows and running count"""
+
+    def __init__(self, policy: ClassPolicy):
+        super().__init__(policy.weight, 0.0)
+        self.policy = policy
+        self.tenants: "OrderedDict[str, Flow]" = OrderedDict()
+        self.clock = 0.0
+        self.in_flight = 0
+        self.queued = 0
+
+
+class Scheduler:
+    """Slots, queues and quotas; every method is thread-safe"""
+
+    def __init__(self, slots: int, config: Dict[str, Any]):
+        self.slots = slots
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.clock = 0.0
+        self.classes: "OrderedDict[str, ClassState]" = OrderedDict()
+        for name, spec in config["classes"].items():
+            self.classes[name] = ClassState(ClassPolicy(
+                name, spec.get("weight", 1), spec.get("maxShare", 1.0), spec.get("timeout", 300),
+                spec.get("maxQueue", 0)))
+        self.default_class = config.get("defaultClass") or next(iter(self.classes))
+        if self.default_class not in self.classes:
+            raise ValueError(f"defaultClass {self.default_class!r} is not one of {list(self.classes)}")
+        self.tenants = {name: self._tenant(name, spec) for name, spec in (config.get("tenants") or {}).items()}
+        self.default_tenant = self._tenant("default", config.get("defaultTenant") or {})
+
+        self.registry = Registry()
+        self.queue_depth = self.registry.gauge(
+            "ollama_admission_queue_depth", "Requests waiting for a slot", ("class",))
+        self.running = self.registry.gauge(
+            "ollama_admission_in_flight", "Requests holding a slot", ("class",))
+        self.slot_gauge = self.registry.gauge("ollama_admission_slots", "Inference slots passed upstream")
+        self.wait = self.registry.histogram(
+            "ollama_admission_wait_seconds", "Time queued before getting a slot", ("class",), WAIT_BUCKETS)
+        self.latency = self.registry.histogram(
+            "ollama_admission_request_duration_seconds", "Arrival to response end, queueing included", ("class",))
+        self.requests = self.registry.counter(
+            "ollama_admission_requests_total", "Inference requests by outcome (admitted, throttled, rejected, timeout)",
+            ("class", "tenant", "result"))
+        self.charged = self.registry.counter(
+            "ollama_admission_tokens_total", "Prompt and generated tokens charged to tenant quotas", ("tenant",))
+        self.slot_gauge.set(slots)
+        for name in self.classes:
+            self.queue_depth.set(0, **{"class": name})
+            self.running.set(0, **{"class": name})
+
+    def _tenant(self, name: str, spec: Dict[str, Any]) -> Tenant:
+        klass = spec.get("class") or self.default_class
+        if klass not in self.classes:
+            raise ValueError(f"tenant {name!r}: unknown class {klass!r}")
+        return Tenant(name, klass, spec.get("weight", 1), spec.get("requestsPerMinute", 0),
+                      spec.get("tokensPerMinute", 0))
+
+    def classify(self, tenant_name: str, priority: str = "") -> Tuple[Tenant, str]:
+        """The tenant and class for a request; X-Priority may only lower the class"""
+        tenant = self.tenants.get(tenant_name, self.default_tenant)
+        klass = tenant.klass
+        if priority in self.classes and self.classes[priority].weight <= self.classes[klass].weight:
+            klass = priority
+        return tenant, klass
+
+    def _label(self, tenant: Tenant) -> str:
+        # Configured tenants only, so client-chosen names cannot grow the metric series
+        return tenant.name if tenant.name in self.tenants else "default"
+
+    def admit(self, tenant: Tenant, klass: str) -> Ticket:
+        """Wait for a slot; raises AdmissionError when over quota, the queue is full or the wait times out"""
+        state = self.classes[klass]
+        label = self._label(tenant)
+        with self.lock:
+            retry = max(tenant.requests.wait_time(1) if tenant.requests else 0.0,
+                        tenant.tokens.wait_time(1e-9) if tenant.tokens else 0.0)
+            if retry > 0:
+                self.requests.inc(**{"class": klass, "tenant": label, "result": "throttled"})
+                raise AdmissionError(429, f"tenant {tenant.name!r} is over its quota", retry)
+            if state.policy.max_queue and state.queued >= state.policy.max_queue:
+                self.requests.inc(**{"class": klass, "tenant": label, "result": "rejected"})
+                raise AdmissionError(503, f"{klass} queue is full ({state.policy.max_queue} waiting)", 1.0)
+            if tenant.requests:
+                tenant.requests.take(1)
+            ticket = Ticket(tenant, klass)
+            self._enqueue(state, ticket)
+            self._dispatch()
+        if not ticket.event.wait(state.policy.timeout):
+            with self.lock:
+                if not ticket.admitted:
+                    self._withdraw(state, ticket)
+                    self.requests.inc(**{"class": klass, "tenant": label, "result": "timeout"})
+                    raise AdmissionError(503, f"no Ollama slot free for {klass} after {state.policy.timeout:.0f}s")
+        self.requests.inc(**{"class": klass, "tenant": label, "result": "admitted"})
+        self.wait.observe(ticket.admitted_at - ticket.enqueued_at, **{"class": klass})
+        return ticket
+
+    def finish(self, ticket: Ticket, tokens: int = 0):
+        """Free the slot and charge the tokens the request used"""
+        with self.lock:
+            state = self.classes[ticket.klass]
+            state.in_flight -= 1
+            self.in_flight -= 1
+            self.running.set(state.in_flight, **{"class": ticket.klass})
+            if tokens and ticket.tenant.tokens:
+                ticket.tenant.tokens.take(tokens)
+            self._dispatch()
+        if tokens:
+            self.charged.inc(tokens, tenant=self._label(ticket.tenant))
+        self.latency.observe(time.perf_counter() - ticket.enqueued_at, **{"class": ticket.klass})
+
+    def _enqueue(self, state: ClassState, ticket: Ticket):
+        """Queue a ticket (lock held); a flow that was idle starts at the current virtual time"""
+        if not state.queued:
+            state.vtime = max(state.vtime, self.clock)
+        flow = state.tenants.get(ticket.tenant.name)
+        if flow is None:
+            flow = state.tenants[ticket.tenant.name] = Flow(ticket.tenant.weight, state.clock)
+        flow.queue.append(ticket)
+        state.queued += 1
+        self.queue_depth.set(state.queued, **{"class": state.policy.name})
+
+    def _withdraw(self, state: ClassState, ticket: Ticket):
+        flow = state.tenants.get(ticket.tenant.name)
+        if flow is not None and ticket in flow.queue:
+            flow.queue.remove(ticket)
+            state.queued -= 1
+            if not flow.queue:
+                del state.tenants[ticket.tenant.name]
+            self.queue_depth.set(state.queued, **{"class": state.policy.name})
+
+    def _dispatch(self):
+        """Hand free slots to the waiting flows with the lowest virtual time (lock held)"""
+        while self.in_flight < self.slots:
+            eligible = [state for state in self.classes.values()
+                        if state.queued and state.in_flight < max(1, int(state.policy.max_share * self.slots))]
+            if not eligible:
+                return
+            state = min(eligible, key=lambda s: s.vtime)
+            name, flow = min(state.tenants.items(), key=lambda item: item[1].vtime)
+            ticket = flow.queue.popleft()
+            state.queued -= 1
+            self.clock = state.vtime
+            state.clock = flow.vtime
+            state.vtime += 1.0 / state.weight
+            flow.vtime += 1.0 / flow.weight
+            if not flow.queue:
+                del state.tenants[name]
+            state.in_flight += 1
+            self.in_flight += 1
+            ticket.admitted = True
+            ticket.admitted_at = time.perf_counter()
+            ticket.event.set()
+            self.queue_depth.set(state.queued, **{"class": state.policy.name})
+            self.running.set(state.in_flight, **{"class": state.policy.name})
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            classes = {name: {"weight": state.weight, "max_in_flight": max(1, int(state.policy.max_share * self.slots)),
+                              "in_flight": state.in_flight, "queued": state.queued,
+                              "waiting_tenants": {t: len(f.queue) for t, f in state.tenants.items()}}
+                       for name, state in self.classes.items()}
+            tenants = {}
+            for tenant in list(self.tenants.values()) + [self.default_tenant]:
+                for bucket in (tenant.requests, tenant.tokens):
+                    if bucket:
+                        bucket._refill()
+                tenants[tenant.name] = {
+                    "class": tenant.klass, "weight": tenant.weight,
+                    "requests_available": round(tenant.requests.level, 1) if tenant.requests else None,
+                    "tokens_available": round(tenant.tokens.level) if tenant.tokens else None}
+        return {"slots": self.slots, "in_flight": self.in_flight, "classes": classes, "tenants": tenants}
+
+
+def load_config(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return DEFAULT_CONFIG
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return dict(DEFAULT_CONFIG, **config)
+
+
+def make_handler(scheduler: Scheduler, upstream: Upstream, tenant_header: str = "X-Tenant"):
+    class AdmissionHandler(ProxyHandler):
+        """Queues inference requests for a slot and proxies everything else straight through"""
+
+        tenant = ""
+
+        def handle_local(self, body: bytes) -> bool:
+            if self.command == "GET" and self.path == "/metrics":
+                self.send_bytes(200, scheduler.registry.render(), CONTENT_TYPE)
+                return True
+            if self.command == "GET" and self.path == "/admission/stats":
+                self.send_json(200, scheduler.stats())
+                return True
+            self.tenant = self.headers.get(tenant_header, "").strip()
+            if self.path.startswith("/tenant/"):
+                # /tenant/<name>/api/chat -> /api/chat for tenant <name>
+                _, _, name, rest = self.path.split("/", 3) if self.path.count("/") >= 3 else ("", "", "", "")
+                self.tenant = self.tenant or name
+                self.path = "/" + rest
+            return False
+
+        def proxy(self, body: bytes, upstream: Optional[Upstream] = None, on_document=None, record: bool = False):
+            endpoint = self.path.split("?", 1)[0]
+            if self.command != "POST" or endpoint not in INFERENCE_ENDPOINTS:
+                return super().proxy(body, upstream, on_document, record)
+            tenant, klass = scheduler.classify(self.tenant, self.headers.get("X-Priority", "").strip().lower())
+            try:
+                ticket = scheduler.admit(tenant, klass)
+            except AdmissionError as e:
+                self.refuse(e)
+                return e.status, None
+            observer = None
+            try:
+                status, observer = super().proxy(body, upstream, on_document, record)
+                return status, observer
+            finally:
+                final = observer.last if observer is not None else None
+                usage = (final or {}).get("usage") or {}
+                tokens = ((final or {}).get("prompt_eval_count", usage.get("prompt_tokens")) or 0) + \
+                         ((final or {}).get("eval_count", usage.get("completion_tokens")) or 0)
+                scheduler.finish(ticket, tokens)
+
+        def refuse(self, error: AdmissionError):
+            body = json.dumps({"error": str(error)}).encode("utf-8")
+            self.send_response(error.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if error.retry_after is not None:
+                self.send_header("Retry-After", str(max(1, int(error.retry_after + 0.999))))
+            self.end_headers()
+            self.wfile.write(body)
+
+    AdmissionHandler.upstream = upstream
+    return AdmissionHandler
+
+
+def main():
+    """Run the admission controller"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Priority classes, tenant quotas and fair queueing for Ollama')
+    parser.add_argument('--listen', default='0.0.0.0', help='Listen address (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get("ADMISSION_PORT", "11438")),
+                        help='Listen port (default: 11438)')
+    parser.add_argument('--upstream', default=os.environ.get("OLLAMA_UPSTREAM", "http://127.0.0.1:11434"),
+                        help='Ollama API to admit requests to (default: http://127.0.0.1:11434)')
+    parser.add_argument('--slots', type=int, default=int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")),
+                        help='Inference requests passed upstream at once: OLLAMA_NUM_PARALLEL x replicas (default: 4)')
+    parser.add_argument('--config', default=os.environ.get("ADMISSION_CONFIG"),
+                        help='JSON with classes, tenants and defaultTenant, as in values.yaml (default: interactive + batch)')
+    parser.add_argument('--tenant-header', default='X-Tenant', help='Header naming the tenant (default: X-Tenant)')
+    args = parser.parse_args()
+
+    try:
+        scheduler = Scheduler(args.slots, load_config(args.config))
+    except (OSError, ValueError, TypeError) as e:
+        print(f"❌ Invalid admission config: {e}")
+        sys.exit(1)
+    upstream = Upstream(args.upstream)
+    server = serve(make_handler(scheduler, upstream, args.tenant_header), args.listen, args.port)
+    classes = ", ".join(f"{name} x{state.weight:g}" for name, state in scheduler.classes.items())
+    print(f"🚦 Admission control on http://{args.listen}:{args.port} in front of {upstream.url}"
+          f" ({args.slots} slots; {classes}; {len(scheduler.tenants)} tenant(s))")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping admission control")
+    finally:
+        server.server_close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
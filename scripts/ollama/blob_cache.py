@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Ollama Blob Cache
+Pull-through cache for the Ollama registry, serving model manifests and
+blobs to Ollama pods from a shared content-addressed store
+
+    GET/HEAD /v2/<name>/manifests/<tag>    cached per tag for --manifest-ttl
+    GET/HEAD /v2/<name>/blobs/sha256:<hex> cached by digest, Range supported
+
+Blobs are fetched from the upstream in fixed-size segments on demand, one
+fetch per segment however many clients ask for it, and hashed as they
+complete; a blob enters the store only when its digest verifies. The store
+is bounded by --max-size and evicts least recently used blobs.
+
+Ollama pods pull through it with an insecure registry prefix, e.g.
+`ollama pull --insecure ollama-blob-cache:5000/library/codellama:13b`
+(model_sync.py --registry does this and re-tags to the plain name).
+No external dependencies required.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+from model_sync import parse_size
+
+DEFAULT_UPSTREAM = "https://registry.ollama.ai"
+SEGMENT_SIZE = 32 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+ROUTE = re.compile(r"^/v2/(?P<name>.+)/(?P<kind>manifests|blobs)/(?P<ref>[^/]+)$")
+DIGEST = re.compile(r"^sha256:[0-9a-f]{64}$")
+
+
+class CacheError(Exception):
+    """Raised when the upstream cannot provide a manifest or blob"""
+
+    def __init__(self, message: str, status: int = 502):
+        super().__init__(message)
+        self.status = status
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised for a well-formed range that selects no byte of the blob (answered 416)"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single-range `bytes=` header, or None for the whole blob; a header that
+    does not parse is ignored, as RFC 9110 allows"""
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[6:].split(",")[0].strip()
+    start, _, end = spec.partition("-")
+    if (start and not start.isdigit()) or (end and not end.isdigit()) or not (start or end):
+        return None
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    if end and int(end) < int(start):
+        return None
+    if int(start) >= size:
+        raise RangeNotSatisfiable(header)
+    end_value = int(end) if end else size - 1
+    return int(start), min(end_value, size - 1)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Surfaces redirects as HTTPError; urllib would turn a redirected HEAD into a full GET"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class BlobStore:
+    """Content-addressed blob files with least-recently-used eviction"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.index: "OrderedDict[str, int]" = OrderedDict()
+        self.reserved = 0
+        self.evictions = 0
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(root, "partial"), exist_ok=True)
+        entries = []
+        for filename in os.listdir(os.path.join(root, "blobs")):
+            path = os.path.join(root, "blobs", filename)
+            entries.append((os.stat(path).st_mtime, filename.replace("sha256-", "sha256:", 1),
+                            os.path.getsize(path)))
+        for _, digest, size in sorted(entries):
+            self.index[digest] = size
+        # Partial fills do not survive a restart
+        for filename in os.listdir(os.path.join(root, "partial")):
+            os.remove(os.path.join(root, "partial", filename))
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest.replace(":", "-"))
+
+    def partial_path(self, digest: str) -> str:
+        return os.path.join(self.root, "partial", digest.replace(":", "-"))
+
+    @property
+    def used(self) -> int:
+        return sum(self.index.values())
+
+    def get(self, digest: str) -> Optional[int]:
+        """Size of a stored blob, marking it most recently used"""
+        with self.lock:
+            size = self.index.get(digest)
+            if size is None:
+                return None
+            self.index.move_to_end(digest)
+        try:
+            os.utime(self.path(digest))
+        except OSError:
+            with self.lock:
+                self.index.pop(digest, None)
+            return None
+        return size
+
+    def reserve(self, size: int) -> bool:
+        """Make room for a blob about to be filled; False when it can never fit"""
+        if size > self.max_bytes:
+            return False
+        with self.lock:
+            self.reserved += size
+            self._evict()
+        return True
+
+    def release(self, size: int):
+        with self.lock:
+            self.reserved -= size
+
+    def commit(self, digest: str, source: str, size: int):
+        """Move a verified file into the store"""
+        os.replace(source, self.path(digest))
+        with self.lock:
+            self.reserved -= size
+            self.index[digest] = size
+            self.index.move_to_end(digest)
+            self._evict()
+
+    def put_bytes(self, digest: str, data: bytes):
+        tmp = self.partial_path(digest) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        with self.lock:
+            self.reserved += len(data)
+        self.commit(digest, tmp, len(data))
+
+    def read_bytes(self, digest: str) -> Optional[bytes]:
+        if self.get(digest) is None:
+            return None
+        with open(self.path(digest), "rb") as f:
+            return f.read()
+
+    def _evict(self):
+        # Open readers keep their file handles, so eviction never interrupts a transfer
+        while self.index and sum(self.index.values()) + self.reserved > self.max_bytes:
+            digest, _ = self.index.popitem(last=False)
+            try:
+                os.remove(self.path(digest))
+            except OSError:
+                pass
+            self.evictions += 1
+
+
+class Fill:
+    """A blob being fetched from upstream segment by segment"""
+
+    def __init__(self, cache: "BlobCache", name: str, digest: str, size: int):
+        self.cache = cache
+        self.name = name
+        self.digest = digest
+        self.size = size
+        self.path = cache.store.partial_path(digest)
+        self.count = max(1, -(-size // SEGMENT_SIZE))
+        self.done = [False] * self.count
+        self.fetching = [False] * self.count
+        self.cond = threading.Condition()
+        self.hash_lock = threading.Lock()
+        self.hasher = hashlib.sha256()
+        self.hashed = 0  # segments folded into the hash so far
+        self.failed: Optional[str] = None
+        # Readers keep using this descriptor after the file moves into the store
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.ftruncate(self.fd, size)
+
+    def __del__(self):
+        try:
+            os.close(self.fd)
+        except (OSError, AttributeError):
+            pass
+
+    def read(self, start: int, length: int) -> bytes:
+        return os.pread(self.fd, length, start)
+
+    def segment_range(self, index: int) -> Tuple[int, int]:
+        start = index * SEGMENT_SIZE
+        return start, min(self.size, start + SEGMENT_SIZE) - 1
+
+    def ensure(self, index: int):
+        """Block until a segment is on disk, fetching it if no other request is"""
+        with self.cond:
+            while not self.done[index]:
+                if self.failed:
+                    raise CacheError(self.failed)
+                if not self.fetching[index]:
+                    self.fetching[index] = True
+                    break
+                self.cond.wait()
+            else:
+                return
+        try:
+            start, end = self.segment_range(index)
+            data = self.cache.fetch_range(self.name, self.digest, start, end)
+            if len(data) != end - start + 1:
+                raise CacheError(f"short segment {index} of {self.digest}")
+            os.pwrite(self.fd, data, start)
+        except Exception as e:
+            with self.cond:
+                self.fetching[index] = False
+                self.cond.notify_all()
+            raise e if isinstance(e, CacheError) else CacheError(str(e))
+        with self.cond:
+            self.done[index] = True
+            self.cond.notify_all()
+        self._advance_hash()
+
+    def _advance_hash(self):
+        """Hash the contiguous completed prefix; commit once the whole blob verifies"""
+        with self.hash_lock:
+            while True:
+                with self.cond:
+                    if self.hashed == self.count or not self.done[self.hashed]:
+                        return
+                    index = self.hashed
+                start, end = self.segment_range(index)
+                for offset in range(start, end + 1, READ_SIZE):
+                    self.hasher.update(self.read(offset, min(READ_SIZE, end + 1 - offset)))
+                self.hashed += 1
+                if self.hashed == self.count:
+                    self.cache.finish(self, "sha256:" + self.hasher.hexdigest())
+
+    def fill_all(self):
+        """Fetch every remaining segment (used after a client disconnects mid-blob)"""
+        for index in range(self.count):
+            self.ensure(index)
+
+
+class BlobCache:
+    """Manifests by tag and blobs by digest, pulled through from one upstream registry"""
+
+    def __init__(self, store: BlobStore, upstream: str = DEFAULT_UPSTREAM, manifest_ttl: float = 300.0,
+                 timeout: float = 60.0):
+        self.store = store
+        self.upstream = upstream.rstrip("/")
+        self.manifest_ttl = manifest_ttl
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.fills: Dict[str, Fill] = {}
+        # Blob sizes from the layers of manifests seen, so a miss needs no upstream round trip for its size
+        self.sizes: Dict[str, int] = {}
+        self.tags_path = os.path.join(store.root, "manifests.json")
+        self.tags: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.tags_path):
+            try:
+                with open(self.tags_path, "r", encoding="utf-8") as f:
+                    self.tags = json.load(f)
+            except (OSError, ValueError):
+                self.tags = {}
+        self.stats = {"manifest_hits": 0, "manifest_misses": 0, "blob_hits": 0, "blob_misses": 0,
+                      "upstream_bytes": 0, "served_bytes": 0}
+
+    # --- upstream ------------------------------------------------------
+
+    def _open(self, method: str, path: str, headers: Optional[Dict[str, str]] = None):
+        request = urllib.request.Request(self.upstream + path, method=method, headers=headers or {})
+        try:
+            # Blob requests redirect to a CDN; urllib follows and keeps the Range header
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise CacheError(f"upstream {method} {path}: {e.code}", 404 if e.code == 404 else 502) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise CacheError(f"upstream {method} {path}: {e}") from e
+
+    def fetch_range(self, name: str, digest: str, start: int, end: int) -> bytes:
+        with self._open("GET", f"/v2/{name}/blobs/{digest}", {"Range": f"bytes={start}-{end}"}) as response:
+            data = response.read()
+            if response.status == 200:
+                # Upstream ignored the range
+                data = data[start:end + 1]
+        with self.lock:
+            self.stats["upstream_bytes"] += len(data)
+        return data
+
+    def blob_size(self, name: str, digest: str) -> int:
+        """Size from a manifest already fetched, else a HEAD that follows redirects as HEADs"""
+        with self.lock:
+            size = self.sizes.get(digest)
+        if size is not None:
+            return size
+        opener = urllib.request.build_opener(_NoRedirect)
+        url = f"{self.upstream}/v2/{name}/blobs/{digest}"
+        for _ in range(5):
+            try:
+                with opener.open(urllib.request.Request(url, method="HEAD"), timeout=self.timeout) as response:
+                    length = response.headers.get("Content-Length")
+                break
+            except urllib.error.HTTPError as e:
+                if e.code not in (301, 302, 303, 307, 308) or not e.headers.get("Location"):
+                    raise CacheError(f"upstream HEAD {digest}: {e.code}", 404 if e.code == 404 else 502) from e
+                url = urllib.parse.urljoin(url, e.headers["Location"])
+            except (urllib.error.URLError, OSError) as e:
+                raise CacheError(f"upstream HEAD {digest}: {e}") from e
+        else:
+            raise CacheError(f"upstream HEAD {digest}: too many redirects")
+        if length is None:
+            raise CacheError(f"upstream did not report the size of {digest}")
+        return int(length)
+
+    def _learn_sizes(self, body: bytes):
+        try:
+            manifest = json.loads(body)
+            layers = list(manifest.get("layers") or []) + [manifest.get("config") or {}]
+        except (ValueError, AttributeError, TypeError):
+            return
+        with self.lock:
+            for layer in layers:
+                if isinstance(layer, dict) and isinstance(layer.get("size"), int) and layer.get("digest"):
+                    self.sizes[layer["digest"]] = layer["size"]
+
+    # --- manifests -----------------------------------------------------
+
+    def manifest(self, name: str, ref: str) -> Tuple[bytes, str, str]:
+        """(body, content type, digest) for a manifest by tag or digest"""
+        key = f"{name}:{ref}"
+        entry = self.tags.get(key)
+        fresh = entry and (DIGEST.match(ref) or time.time() - entry["fetched_at"] < self.manifest_ttl)
+        if entry and fresh:
+            body = self.store.read_bytes(entry["digest"])
+            if body is not None:
+                self.stats["manifest_hits"] += 1
+                self._learn_sizes(body)
+                return body, entry["content_type"], entry["digest"]
+        try:
+            with self._open("GET", f"/v2/{name}/manifests/{ref}",
+                            {"Accept": "application/vnd.docker.distribution.manifest.v2+json"}) as response:
+                body = response.read()
+                content_type = response.headers.get("Content-Type", "application/json")
+        except CacheError as e:
+            # Registry unreachable: a stale manifest still lets nodes rebuild offline
+            stale = self.store.read_bytes(entry["digest"]) if entry and e.status != 404 else None
+            if stale is None:
+                raise
+            self._learn_sizes(stale)
+            return stale, entry["content_type"], entry["digest"]
+        digest = "sha256:" + hashlib.sha256(body).hexdigest()
+        self.store.put_bytes(digest, body)
+        self._learn_sizes(body)
+        with self.lock:
+            self.tags[key] = {"digest": digest, "content_type": content_type, "fetched_at": time.time()}
+            tmp = self.tags_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.tags, f, indent=2)
+            os.replace(tmp, self.tags_path)
+        self.stats["manifest_misses"] += 1
+        return body, content_type, digest
+
+    # --- blobs ---------------------------------------------------------
+
+    def fill(self, name: str, digest: str) -> Optional[Fill]:
+        """The in-progress fill for a digest, starting one if needed; None when the blob cannot be cached"""
+        with self.lock:
+            fill = self.fills.get(digest)
+            if fill is not None:
+                return fill
+        size = self.blob_size(name, digest)
+        with self.lock:
+            if digest in self.fills:
+                return self.fills[digest]
+            if not self.store.reserve(size):
+                return None
+            fill = self.fills[digest] = Fill(self, name, digest, size)
+        return fill
+
+    def finish(self, fill: Fill, actual: str):
+        with self.lock:
+            self.fills.pop(fill.digest, None)
+        if actual == fill.digest:
+            self.store.commit(fill.digest, fill.path, fill.size)
+            return
+        self.store.release(fill.size)
+        fill.failed = f"digest mismatch for {fill.digest}: got {actual}"
+        try:
+            os.remove(fill.path)
+        except OSError:
+            pass
+
+
+def make_handler(cache: BlobCache):
+    class BlobCacheHandler(BaseHTTPRequestHandler):
+        """Registry v2 read API served from the cache"""
+
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            self.route()
+
+        def do_GET(self):
+            self.route()
+
+        def route(self):
+            if self.path in ("/v2", "/v2/"):
+                return self._send(200, b"{}", "application/json")
+            if self.path == "/stats":
+                stats = dict(cache.stats, stored_bytes=cache.store.used, stored_blobs=len(cache.store.index),
+                             max_bytes=cache.store.max_bytes, evictions=cache.store.evictions,
+                             filling=len(cache.fills))
+                return self._send(200, json.dumps(stats, indent=2).encode("utf-8"), "application/json")
+            match = ROUTE.match(self.path.split("?", 1)[0])
+            if not match:
+                return self._send(404, b'{"errors": [{"code": "NOT_FOUND"}]}', "application/json")
+            try:
+                if match.group("kind") == "manifests":
+                    body, content_type, digest = cache.manifest(match.group("name"), match.group("ref"))
+                    self._send(200, body, content_type, {"Docker-Content-Digest": digest})
+                elif DIGEST.match(match.group("ref")):
+                    self.blob(match.group("name"), match.group("ref"))
+                else:
+                    self._send(400, b'{"errors": [{"code": "DIGEST_INVALID"}]}', "application/json")
+            except CacheError as e:
+                self._send(e.status, json.dumps({"errors": [{"code": "UNAVAILABLE", "message": str(e)}]}).encode(),
+                           "application/json")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+        def blob(self, name: str, digest: str):
+            size = cache.store.get(digest)
+            if size is not None:
+                cache.stats["blob_hits"] += 1
+                span = self._headers_for(size)
+                if span is None:
+                    return
+                start, end = span
+                if self.command == "GET":
+                    with open(cache.store.path(digest), "rb") as f:
+                        self.wfile.flush()
+                        self.connection.sendfile(f, start, end - start + 1)
+                    cache.stats["served_bytes"] += end - start + 1
+                return
+
+            fill = cache.fill(name, digest)
+            cache.stats["blob_misses"] += 1
+            if fill is None:
+                return self.passthrough(name, digest)
+            span = self._headers_for(fill.size)
+            if span is None or self.command != "GET":
+                return
+            start, end = span
+            first, last = start // SEGMENT_SIZE, end // SEGMENT_SIZE
+            try:
+                for index in range(first, last + 1):
+                    fill.ensure(index)
+                    seg_start, seg_end = fill.segment_range(index)
+                    lo, hi = max(start, seg_start), min(end, seg_end)
+                    for offset in range(lo, hi + 1, READ_SIZE):
+                        self.wfile.write(fill.read(offset, min(READ_SIZE, hi + 1 - offset)))
+                    cache.stats["served_bytes"] += hi - lo + 1
+            except (BrokenPipeError, ConnectionResetError):
+                # Keep filling so the bytes already paid for are not wasted
+                threading.Thread(target=self._finish_quietly, args=(fill,), daemon=True).start()
+                raise
+
+        def passthrough(self, name: str, digest: str):
+            """Relay a blob too large for the store straight from upstream"""
+            headers = {"Range": self.headers["Range"]} if self.headers.get("Range") else {}
+            with cache._open(self.command, f"/v2/{name}/blobs/{digest}", headers) as response:
+                self.send_response(response.status)
+                for header in ("Content-Type", "Content-Length", "Content-Range", "Accept-Ranges"):
+                    if response.headers.get(header):
+                        self.send_header(header, response.headers[header])
+                self.end_headers()
+                while self.command == "GET":
+                    piece = response.read(READ_SIZE)
+                    if not piece:
+                        break
+                    self.wfile.write(piece)
+
+        @staticmethod
+        def _finish_quietly(fill: Fill):
+            try:
+                fill.fill_all()
+            except CacheError:
+                pass
+
+        def _headers_for(self, size: int) -> Optional[Tuple[int, int]]:
+            """Send the headers for the requested part of a blob; None when 416 was answered instead"""
+            try:
+                requested = parse_range(self.headers.get("Range"), size)
+            except RangeNotSatisfiable:
+                self._send(416, b"", "application/octet-stream", {"Content-Range": f"bytes */{size}"})
+                return None
+            start, end = requested or (0, size - 1)
+            self.send_response(206 if requested else 200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            if requested:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            return start, end
+
+        def _send(self, code: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+    return BlobCacheHandler
+
+
+def main():
+    """Run the pull-through blob cache"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pull-through cache for Ollama model manifests and blobs')
+    parser.add_argument('--listen', default='0.0.0.0', help='Listen address (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get("BLOB_CACHE_PORT", "5000")),
+                        help='Listen port (default: 5000)')
+    parser.add_argument('--upstream', default=os.environ.get("BLOB_CACHE_UPSTREAM", DEFAULT_UPSTREAM),
+                        help=f'Registry to pull through (default: {DEFAULT_UPSTREAM})')
+    parser.add_argument('--root', default=os.environ.get("BLOB_CACHE_ROOT", "/var/cache/ollama-blobs"),
+                        help='Store directory (default: /var/cache/ollama-blobs)')
+    parser.add_argument('--max-size', default=os.environ.get("BLOB_CACHE_MAX_SIZE", "200Gi"),
+                        help='Store size limit, e.g. 200Gi (default: 200Gi)')
+    parser.add_argument('--manifest-ttl', type=float, default=300.0,
+                        help='Seconds a cached tag is served before revalidating (default: 300)')
+    args = parser.parse_args()
+
+    store = BlobStore(args.root, parse_size(args.max_size))
+    cache = BlobCache(store, args.upstream, args.manifest_ttl)
+    server = ThreadingHTTPServer((args.listen, args.port), make_handler(cache))
+    server.daemon_threads = True
+    print(f"📦 Blob cache on http://{args.listen}:{args.port} for {cache.upstream} "
+          f"({len(store.index)} blobs, {store.used / 1e9:.1f}GB of {store.max_bytes / 1e9:.0f}GB)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping blob cache")
+    finally:
+        server.server_close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
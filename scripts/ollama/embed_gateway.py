@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Ollama Embedding Gateway
+Batches, deduplicates and caches /api/embed calls
+
+- Texts from concurrent requests for the same model and options are
+  coalesced into one /api/embed call per batch window (or max batch size)
+- Identical texts, within a request or across requests in flight, are
+  embedded once
+- Vectors are kept in memory-mapped float32 files keyed by content hash,
+  one table per model digest and options, so re-embedding a corpus only
+  computes the chunks that changed and a re-pulled model starts fresh
+
+Other requests are proxied unchanged. Counters are served at /metrics and
+/embed/stats. No external dependencies required.
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import hashlib
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+from model_sync import ModelDigests
+from ollama_proxy import ProxyHandler, Upstream, UpstreamError, serve
+from prom_metrics import CONTENT_TYPE, Registry
+
+DEFAULT_ROOT = os.path.expanduser("~/.cache/ollama-stack/embeddings")
+KEY_BYTES = 32
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+# Request fields that do not change the vectors
+IGNORED_FIELDS = ("model", "input", "keep_alive")
+
+
+class VectorTable:
+    """Append-only float32 rows in a memory-mapped file, with a parallel file of content hashes"""
+
+    def __init__(self, prefix: str, dim: int):
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.lock = threading.Lock()
+        self.keys = open(prefix + ".keys", "a+b")
+        self.vectors = open(prefix + ".f32", "a+b")
+        self.keys.seek(0)
+        data = self.keys.read()
+        size = os.fstat(self.vectors.fileno()).st_size
+        # A crash between the vector and key writes leaves a key-less row; it is simply reused
+        self.rows = min(len(data) // KEY_BYTES, size // self.row_bytes)
+        self.index = {data[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(self.rows)}
+        if len(data) != self.rows * KEY_BYTES:
+            self.keys.truncate(self.rows * KEY_BYTES)
+        self.map: Optional[mmap.mmap] = None
+        self._grow(max(size, self.row_bytes * 1024))
+
+    def _grow(self, size: int):
+        if self.map is not None:
+            self.map.close()
+        if os.fstat(self.vectors.fileno()).st_size < size:
+            self.vectors.truncate(size)
+        self.map = mmap.mmap(self.vectors.fileno(), size)
+
+    def get(self, key: bytes) -> Optional[List[float]]:
+        with self.lock:
+            row = self.index.get(key)
+            if row is None:
+                return None
+            offset = row * self.row_bytes
+            return array("f", self.map[offset:offset + self.row_bytes]).tolist()
+
+    def put(self, key: bytes, vector: List[float]) -> List[float]:
+        """Store a vector; returns it as stored (float32), so hits and misses answer alike"""
+        packed = array("f", vector)
+        if len(packed) != self.dim:
+            raise ValueError(f"expected {self.dim} dimensions, got {len(packed)}")
+        with self.lock:
+            row = self.index.get(key)
+            if row is None:
+                row = self.rows
+                if (row + 1) * self.row_bytes > len(self.map):
+                    self._grow(len(self.map) * 2)
+                offset = row * self.row_bytes
+                self.map[offset:offset + self.row_bytes] = packed.tobytes()
+                self.keys.write(key)
+                self.keys.flush()
+                self.index[key] = row
+                self.rows += 1
+        return packed.tolist()
+
+    def close(self):
+        with self.lock:
+            self.map.flush()
+            self.map.close()
+            self.keys.close()
+            self.vectors.close()
+
+
+class VectorStore:
+    """VectorTables by (model, digest, options), created on first write"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.tables: Dict[str, VectorTable] = {}
+        self.lock = threading.Lock()
+
+    def _prefix(self, group: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(group.encode("utf-8")).hexdigest()[:24])
+
+    def table(self, group: str, dim: int = 0) -> Optional[VectorTable]:
+        """The table for a group; opened from disk if it exists, created when dim is given"""
+        with self.lock:
+            table = self.tables.get(group)
+            if table is not None:
+                return table
+            prefix = self._prefix(group)
+            meta_path = prefix + ".json"
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    dim = json.load(f)["dim"]
+            elif not dim:
+                return None
+            else:
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"group": group, "dim": dim}, f)
+            table = self.tables[group] = VectorTable(prefix, dim)
+            return table
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"tables": len(self.tables), "vectors": sum(t.rows for t in self.tables.values()),
+                    "bytes": sum(t.rows * t.row_bytes for t in self.tables.values())}
+
+    def close(self):
+        with self.lock:
+            for table in self.tables.values():
+                table.close()
+            self.tables.clear()
+
+
+class Slot:
+    """One text being embedded; every request that asked for it waits on the same slot"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.event = threading.Event()
+        self.vector: Optional[List[float]] = None
+        self.error = ""
+
+
+class Batch:
+    def __init__(self, model: str, params: Dict[str, Any], deadline: float):
+        self.model = model
+        self.params = params
+        self.deadline = deadline
+        self.slots: List[Tuple[bytes, Slot]] = []
+
+
+class Batcher:
+    """Coalesces texts into batched /api/embed calls and serves repeats from the store"""
+
+    def __init__(self, upstream: Upstream, store: VectorStore, window: float = 0.01,
+                 max_batch: int = 64, concurrency: int = 2, timeout: float = 600.0):
+        self.upstream = upstream
+        self.store = store
+        self.digests = ModelDigests(upstream)
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.cond = threading.Condition()
+        self.batches: Dict[str, Batch] = {}
+        self.pending: Dict[Tuple[str, bytes], Slot] = {}
+        self.pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="embed")
+
+        self.registry = Registry()
+        self.texts = self.registry.counter(
+            "ollama_embed_texts_total", "Texts by outcome (cached, shared, computed, failed)", ("result",))
+        self.batch_size = self.registry.histogram(
+            "ollama_embed_batch_size", "Texts per upstream /api/embed call", (), BATCH_BUCKETS)
+        self.upstream_seconds = self.registry.histogram(
+            "ollama_embed_upstream_seconds", "Duration of upstream /api/embed calls")
+        threading.Thread(target=self._flusher, name="embed-flush", daemon=True).start()
+
+    @staticmethod
+    def group(model: str, digest: str, params: Dict[str, Any]) -> str:
+        return f"{model}@{digest}#" + json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+    def embed(self, model: str, params: Dict[str, Any], texts: List[str]) -> List[List[float]]:
+        """Vectors for texts in order; raises UpstreamError when Ollama fails or timeout passes"""
+        digest = self.digests.get(model)
+        if not digest:
+            raise LookupError(model)
+        group = self.group(model, digest, params)
+        table = self.store.table(group)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        waits: List[Tuple[int, Slot]] = []
+        with self.cond:
+            for i, text in enumerate(texts):
+                key = hashlib.sha256(text.encode("utf-8")).digest()
+                vector = table.get(key) if table else None
+                if vector is not None:
+                    vectors[i] = vector
+                    self.texts.inc(result="cached")
+                    continue
+                slot = self.pending.get((group, key))
+                if slot is not None:
+                    self.texts.inc(result="shared")
+                else:
+                    slot = self.pending[(group, key)] = Slot(text)
+                    batch = self.batches.get(group)
+                    if batch is None:
+                        batch = self.batches[group] = Batch(model, params, time.monotonic() + self.window)
+                    batch.slots.append((key, slot))
+                    if len(batch.slots) >= self.max_batch:
+                        batch.deadline = 0.0
+                    self.cond.notify()
+                waits.append((i, slot))
+        deadline = time.monotonic() + self.timeout
+        for i, slot in waits:
+            if not slot.event.wait(max(0.0, deadline - time.monotonic())):
+                raise UpstreamError(f"no embeddings from {self.upstream.url} within {self.timeout:g}s")
+            if slot.error:
+                raise UpstreamError(slot.error)
+            vectors[i] = slot.vector
+        return vectors
+
+    def _flusher(self):
+        while True:
+            with self.cond:
+                now = time.monotonic()
+                due = [g for g, b in self.batches.items() if b.deadline <= now]
+                if not due:
+                    soonest = min((b.deadline for b in self.batches.values()), default=now + 1.0)
+                    self.cond.wait(max(0.0, soonest - now))
+                    continue
+                for group in due:
+                    batch = self.batches.pop(group)
+                    for start in range(0, len(batch.slots), self.max_batch):
+                        part = Batch(batch.model, batch.params, 0.0)
+                        part.slots = batch.slots[start:start + self.max_batch]
+                        self.pool.submit(self._send, group, part)
+
+    def _send(self, group: str, batch: Batch):
+        started = time.perf_counter()
+        payload = dict(batch.params, model=batch.model, input=[slot.text for _, slot in batch.slots])
+        error = "embedding failed"
+        try:
+            embeddings = self.upstream.json("POST", "/api/embed", payload).get("embeddings") or []
+            if len(embeddings) != len(batch.slots):
+                raise UpstreamError(f"expected {len(batch.slots)} embeddings, got {len(embeddings)}")
+            table = self.store.table(group, len(embeddings[0]))
+            for (key, slot), vector in zip(batch.slots, embeddings):
+                slot.vector = table.put(key, vector)
+            error = ""
+        except (UpstreamError, ValueError, OSError) as e:
+            error = str(e)
+        finally:
+            # Whatever went wrong, every waiter is released
+            failed = [slot for _, slot in batch.slots if error and slot.vector is None]
+            for slot in failed:
+                slot.error = error
+            self.texts.inc(len(batch.slots) - len(failed), result="computed")
+            self.texts.inc(len(failed), result="failed")
+            self.batch_size.observe(len(batch.slots))
+            self.upstream_seconds.observe(time.perf_counter() - started)
+            with self.cond:
+                for key, slot in batch.slots:
+                    self.pending.pop((group, key), None)
+                    slot.event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {result: int(self.texts.get(result=result)) for result in ("cached", "shared", "computed", "failed")}
+        batches = self.batch_size.count()
+        stats.update(batches=batches, mean_batch=round(stats["computed"] / batches, 2) if batches else 0.0)
+        stats.update(self.store.stats())
+        return stats
+
+
+def make_handler(batcher: Batcher):
+    class EmbedHandler(ProxyHandler):
+        """Answers /api/embed through the batcher and proxies everything else"""
+
+        def handle_local(self, body: bytes) -> bool:
+            if self.command == "GET" and self.path == "/metrics":
+                self.send_bytes(200, batcher.registry.render(), CONTENT_TYPE)
+                return True
+            if self.command == "GET" and self.path == "/embed/stats":
+                self.send_json(200, batcher.stats())
+                return True
+            if self.command != "POST" or self.path.split("?", 1)[0] != "/api/embed":
+                return False
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                return False
+            if not isinstance(payload, dict):
+                return False
+            texts = payload.get("input")
+            texts = [texts] if isinstance(texts, str) else texts
+            if not payload.get("model") or not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                return False
+            params = {k: v for k, v in payload.items() if k not in IGNORED_FIELDS}
+            started = time.perf_counter()
+            try:
+                vectors = batcher.embed(payload["model"], params, texts)
+            except LookupError:
+                # Not installed (or Ollama unreachable): let Ollama give its own answer
+                return False
+            self.send_json(200, {"model": payload["model"], "embeddings": vectors,
+                                 "total_duration": int((time.perf_counter() - started) * 1e9)})
+            return True
+
+    EmbedHandler.upstream = batcher.upstream
+    return EmbedHandler
+
+
+def main():
+    """Run the embedding gateway"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Batching, caching gateway for Ollama embeddings')
+    parser.add_argument('--listen', default='0.0.0.0', help='Listen address (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get("EMBED_PORT", "11437")),
+                        help='Listen port (default: 11437)')
+    parser.add_argument('--upstream', default=os.environ.get("OLLAMA_UPSTREAM", "http://127.0.0.1:11434"),
+                        help='Ollama API (default: http://127.0.0.1:11434)')
+    parser.add_argument('--root', default=os.environ.get("EMBED_ROOT", DEFAULT_ROOT),
+                        help=f'Vector store directory (default: {DEFAULT_ROOT})')
+    parser.add_argument('--window', type=float, default=10.0, help='Milliseconds to gather a batch (default: 10)')
+    parser.add_argument('--max-batch', type=int, default=64, help='Texts per upstream call (default: 64)')
+    parser.add_argument('--concurrency', type=int, default=2, help='Upstream calls in parallel (default: 2)')
+    parser.add_argument('--timeout', type=float, default=600.0,
+                        help='Seconds a request waits for its embeddings (default: 600)')
+    args = parser.parse_args()
+
+    upstream = Upstream(args.upstream)
+    store = VectorStore(args.root)
+    batcher = Batcher(upstream, store, args.window / 1000.0, args.max_batch, args.concurrency, args.timeout)
+    server = serve(make_handler(batcher), args.listen, args.port)
+    print(f"🧮 Embedding gateway on http://{args.listen}:{args.port} in front of {upstream.url}"
+          f" (store {args.root}, batches of {args.max_batch} within {args.window:.0f}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping embedding gateway")
+    finally:
+        server.server_close()
+        store.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
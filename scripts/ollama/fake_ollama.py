@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Fake Ollama Server
+Speaks enough of the Ollama HTTP API to exercise the stack tooling locally
+
+Generation streams NDJSON tokens with a configurable per-token delay and
+reports the same timing fields as Ollama (total/load/prompt_eval/eval
+durations, eval_count). Pulls stream progress and add the model; a
+semaphore of --num-parallel slots makes extra requests queue like
+OLLAMA_NUM_PARALLEL does.
+No external dependencies required.
+"""
+
+import json
+import time
+import struct
+import random
+import hashlib
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional
+
+DEFAULT_MODELS = ["llama3.2:3b", "codellama:13b", "gemma2:2b"]
+
+# Rough download sizes used when a size is not given
+SIZE_BY_PARAMS = {"1b": 0.8e9, "2b": 1.6e9, "3b": 2.0e9, "7b": 3.8e9, "8b": 4.7e9, "13b": 7.4e9,
+                  "32b": 19e9, "33b": 19e9, "34b": 19e9, "70b": 40e9}
+
+
+# (block_count, embedding_length, head_count, head_count_kv) by parameter size, for fake GGUF headers
+SHAPES = {"1b": (16, 2048, 32, 8), "2b": (26, 2304, 8, 4), "3b": (28, 3072, 24, 8), "7b": (32, 4096, 32, 8),
+          "8b": (32, 4096, 32, 8), "13b": (40, 5120, 40, 40), "32b": (64, 5120, 40, 8),
+          "33b": (62, 7168, 56, 8), "34b": (48, 8192, 64, 8), "70b": (80, 8192, 64, 8)}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def guess_size(name: str) -> int:
+    tag = name.split(":", 1)[1] if ":" in name else ""
+    for params, size in SIZE_BY_PARAMS.items():
+        if tag.startswith(params):
+            return int(size)
+    return int(2e9)
+
+
+class FakeOllama:
+    """Model store, loaded-model set and timing knobs shared by request handlers"""
+
+    def __init__(self, models: List[str] = DEFAULT_MODELS, token_delay: float = 0.01, load_delay: float = 0.2,
+                 num_parallel: int = 4, max_loaded: int = 2, pull_rate: float = 2e9, fail_rate: float = 0.0,
+                 contention: float = 0.0):
+        self.token_delay = token_delay
+        # Each extra concurrent generation slows every token by this fraction, as on shared CPU cores
+        self.contention = contention
+        self.generating = 0
+        self.load_delay = load_delay
+        self.max_loaded = max_loaded
+        self.pull_rate = pull_rate
+        self.fail_rate = fail_rate
+        self.slots = threading.BoundedSemaphore(num_parallel)
+        self.lock = threading.Lock()
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.loaded: Dict[str, Dict[str, Any]] = {}
+        # Bytes already downloaded by interrupted pulls, resumed like Ollama's partial blobs
+        self.partial: Dict[str, int] = {}
+        self.requests = 0
+        for name in models:
+            self.add_model(name)
+
+    def add_model(self, name: str, size: Optional[int] = None, digest: Optional[str] = None):
+        name = name if ":" in name else f"{name}:latest"
+        size = size or guess_size(name)
+        self.models[name] = {
+            "name": name,
+            "model": name,
+            "modified_at": _now(),
+            "size": size,
+            "digest": digest or _digest(name),
+            "details": {"format": "gguf", "family": name.split(":")[0].rstrip("0123456789."),
+                        "parameter_size": name.split(":")[-1].upper(), "quantization_level": "Q4_0"},
+        }
+
+    def resolve(self, name: str) -> Optional[str]:
+        if name in self.models:
+            return name
+        if f"{name}:latest" in self.models:
+            return f"{name}:latest"
+        return None
+
+    def load(self, name: str, keep_alive: float = 300.0) -> float:
+        """Load a model, evicting the least recently used beyond max_loaded; returns load seconds"""
+        with self.lock:
+            for stale in [n for n, m in self.loaded.items() if m["expires_at"] <= time.time()]:
+                del self.loaded[stale]
+            if name in self.loaded:
+                self.loaded[name]["expires_at"] = time.time() + keep_alive
+                return 0.0
+            while len(self.loaded) >= self.max_loaded:
+                oldest = min(self.loaded, key=lambda n: self.loaded[n]["expires_at"])
+                del self.loaded[oldest]
+            size = self.models[name]["size"]
+            self.loaded[name] = {"name": name, "model": name, "size": size, "size_vram": 0,
+                                 "digest": self.models[name]["digest"], "expires_at": time.time() + keep_alive}
+        time.sleep(self.load_delay)
+        return self.load_delay
+
+    def unload(self, name: str):
+        with self.lock:
+            self.loaded.pop(name, None)
+
+    def ps(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [dict(model, expires_at=datetime.fromtimestamp(model["expires_at"], timezone.utc).isoformat())
+                    for model in self.loaded.values()]
+
+
+def keep_alive_seconds(value: Any) -> float:
+    """Ollama keep_alive: seconds as a number, or a duration such as '30m'; negative keeps forever"""
+    if value is None:
+        return 300.0
+    if isinstance(value, str) and value[-1:] in "smh" and value[:-1]:
+        value = float(value[:-1]) * {"s": 1, "m": 60, "h": 3600}[value[-1]]
+    value = float(value)
+    return 10 ** 9 if value < 0 else value
+
+
+def embedding(text: str, dims: int = 16) -> List[float]:
+    """Deterministic unit vector derived from the text"""
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    values = [(byte - 127.5) / 127.5 for byte in (seed * (dims // len(seed) + 1))[:dims]]
+    norm = sum(v * v for v in values) ** 0.5 or 1.0
+    return [v / norm for v in values]
+
+
+def make_handler(fake: FakeOllama):
+    class FakeOllamaHandler(BaseHTTPRequestHandler):
+        """Request handler for the fake API"""
+
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            return json.loads(raw) if raw else {}
+
+        def _json(self, code: int, payload: Any):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _start_stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+        def _chunk(self, payload: Dict[str, Any]):
+            data = json.dumps(payload).encode("utf-8") + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _end_stream(self):
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path == "/":
+                body = b"Ollama is running"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == "/api/tags":
+                self._json(200, {"models": list(fake.models.values())})
+            elif self.path == "/api/ps":
+                self._json(200, {"models": fake.ps()})
+            elif self.path == "/api/version":
+                self._json(200, {"version": "0.0.0-fake"})
+            else:
+                self._json(404, {"error": "not found"})
+
+        def do_DELETE(self):
+            if self.path != "/api/delete":
+                return self._json(404, {"error": "not found"})
+            name = fake.resolve(self._body().get("model") or "")
+            if name is None:
+                return self._json(404, {"error": "model not found"})
+            with fake.lock:
+                fake.models.pop(name, None)
+                fake.loaded.pop(name, None)
+            self._json(200, {})
+
+        def do_POST(self):
+            fake.requests += 1
+            routes = {
+                "/api/generate": self.generate,
+                "/api/chat": self.generate,
+                "/api/embed": self.embed,
+                "/api/embeddings": self.embed,
+                "/api/pull": self.pull,
+                "/api/copy": self.copy,
+                "/api/show": self.show,
+            }
+            handler = routes.get(self.path)
+            if handler is None:
+                return self._json(404, {"error": "not found"})
+            handler(self._body())
+
+        def generate(self, request: Dict[str, Any]):
+            name = fake.resolve(request.get("model") or "")
+            if name is None:
+                return self._json(404, {"error": f"model '{request.get('model')}' not found, try pulling it first"})
+            if fake.fail_rate and random.random() < fake.fail_rate:
+                return self._json(500, {"error": "simulated failure"})
+            chat = self.path == "/api/chat"
+            prompt = request.get("prompt") or " ".join(m.get("content", "") for m in request.get("messages", []))
+            tokens = int(request.get("options", {}).get("num_predict") or 12)
+            stream = request.get("stream", True)
+            keep_alive = keep_alive_seconds(request.get("keep_alive"))
+
+            if not prompt:
+                # No prompt: only load (or with keep_alive 0, unload) the model, as Ollama does
+                if keep_alive == 0:
+                    fake.unload(name)
+                    return self._json(200, {"model": name, "created_at": _now(), "response": "",
+                                            "done": True, "done_reason": "unload"})
+                load = fake.load(name, keep_alive)
+                return self._json(200, {"model": name, "created_at": _now(), "response": "", "done": True,
+                                        "done_reason": "load", "load_duration": int(load * 1e9)})
+
+            # Like Ollama, total_duration starts before the scheduler, and load_duration runs from asking the
+            # scheduler for a runner until it is ready, so both include the wait for a free slot
+            start = time.perf_counter()
+            with fake.slots:
+                fake.load(name, keep_alive)
+                load = time.perf_counter() - start
+                prompt_eval = 0.002 * len(prompt.split())
+                time.sleep(prompt_eval)
+                words = [f"tok{i} " for i in range(tokens)]
+                if stream:
+                    self._start_stream()
+                eval_start = time.perf_counter()
+                with fake.lock:
+                    fake.generating += 1
+                try:
+                    for word in words:
+                        time.sleep(fake.token_delay * (1 + fake.contention * (fake.generating - 1)))
+                        if stream:
+                            piece = {"message": {"role": "assistant", "content": word}} if chat else {"response": word}
+                            self._chunk(dict(piece, model=name, created_at=_now(), done=False))
+                finally:
+                    with fake.lock:
+                        fake.generating -= 1
+                eval_duration = time.perf_counter() - eval_start
+
+            final = {
+                "model": name,
+                "created_at": _now(),
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": int((time.perf_counter() - start) * 1e9),
+                "load_duration": int(load * 1e9),
+                "prompt_eval_count": len(prompt.split()),
+                "prompt_eval_duration": int(prompt_eval * 1e9),
+                "eval_count": tokens,
+                "eval_duration": int(eval_duration * 1e9),
+            }
+            if stream:
+                final.update({"message": {"role": "assistant", "content": ""}} if chat else {"response": ""})
+                self._chunk(final)
+                self._end_stream()
+            else:
+                text = "".join(words)
+                final.update({"message": {"role": "assistant", "content": text}} if chat else {"response": text})
+                self._json(200, final)
+
+        def embed(self, request: Dict[str, Any]):
+            name = fake.resolve(request.get("model") or "")
+            if name is None:
+                return self._json(404, {"error": "model not found"})
+            with fake.slots:
+                fake.load(name)
+                if self.path == "/api/embeddings":
+                    return self._json(200, {"embedding": embedding(request.get("prompt", ""))})
+                inputs = request.get("input", "")
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                time.sleep(fake.token_delay)
+                self._json(200, {"model": name, "embeddings": [embedding(text) for text in inputs]})
+
+        def pull(self, request: Dict[str, Any]):
+            name = request.get("model") or request.get("name") or ""
+            name = name if ":" in name else f"{name}:latest"
+            size = guess_size(name)
+            digest = _digest(name)
+            stream = request.get("stream", True)
+            if stream:
+                self._start_stream()
+                self._chunk({"status": "pulling manifest"})
+            completed = fake.partial.get(name, 0)
+            step = max(1, size // 20)
+            try:
+                while completed < size:
+                    time.sleep(step / fake.pull_rate)
+                    completed = min(size, completed + step)
+                    fake.partial[name] = completed
+                    if stream:
+                        self._chunk({"status": f"pulling {digest[:12]}", "digest": f"sha256:{digest}",
+                                     "total": size, "completed": completed})
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+                return
+            with fake.lock:
+                fake.partial.pop(name, None)
+                fake.add_model(name, size, digest)
+            if stream:
+                for status in ("verifying sha256 digest", "writing manifest", "success"):
+                    self._chunk({"status": status})
+                self._end_stream()
+            else:
+                self._json(200, {"status": "success"})
+
+        def copy(self, request: Dict[str, Any]):
+            source = fake.resolve(request.get("source") or "")
+            if source is None:
+                return self._json(404, {"error": "model not found"})
+            with fake.lock:
+                model = fake.models[source]
+                fake.add_model(request["destination"], model["size"], model["digest"])
+            self._json(200, {})
+
+        def show(self, request: Dict[str, Any]):
+            name = fake.resolve(request.get("model") or request.get("name") or "")
+            if name is None:
+                return self._json(404, {"error": "model not found"})
+            model = fake.models[name]
+            self._json(200, {"details": model["details"], "model_info": {}, "modified_at": model["modified_at"]})
+
+    return FakeOllamaHandler
+
+
+def gguf_header(name: str, context_length: int = 16384, file_type: int = 2) -> bytes:
+    """A GGUF header shaped like a llama model of the name's parameter size (no tensor data)"""
+    tag = name.split(":", 1)[1] if ":" in name else ""
+    params = next((p for p in SHAPES if tag.startswith(p)), "3b")
+    blocks, embedding, heads, heads_kv = SHAPES[params]
+    total = int(float(params[:-1]) * 1e9)
+
+    def string(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return struct.pack("<Q", len(data)) + data
+
+    metadata = [("general.architecture", 8, string("llama")), ("general.name", 8, string(name)),
+                ("general.file_type", 4, struct.pack("<I", file_type)),
+                ("llama.context_length", 4, struct.pack("<I", context_length)),
+                ("llama.block_count", 4, struct.pack("<I", blocks)),
+                ("llama.embedding_length", 4, struct.pack("<I", embedding)),
+                ("llama.attention.head_count", 4, struct.pack("<I", heads)),
+                ("llama.attention.head_count_kv", 4, struct.pack("<I", heads_kv)),
+                ("tokenizer.ggml.tokens", 9, struct.pack("<IQ", 8, 3000)
+                 + b"".join(string(f"<tok{i}>") for i in range(3000)))]
+    body = b"GGUF" + struct.pack("<IQQ", 3, blocks, len(metadata))
+    for key, value_type, value in metadata:
+        body += string(key) + struct.pack("<I", value_type) + value
+    per_block = total // (blocks * embedding)
+    for i in range(blocks):
+        body += string(f"blk.{i}.weight") + struct.pack("<IQQIQ", 2, embedding, per_block, file_type, 0)
+    return body
+
+
+class FakeRegistry:
+    """Registry v2 read API with generated blobs; blob requests redirect to a /cdn path like registry.ollama.ai"""
+
+    def __init__(self, models: List[str] = DEFAULT_MODELS, blob_size: int = 4 * 1024 * 1024):
+        self.blobs: Dict[str, bytes] = {}
+        self.manifests: Dict[str, bytes] = {}
+        self.requests: Dict[str, int] = {"manifests": 0, "blobs": 0, "cdn": 0}
+        self.bytes_served = 0
+        # A shared license layer, as many Ollama models have
+        shared = self._blob(b"LICENSE shared by every model\n")
+        for name in models:
+            name = name if ":" in name else f"{name}:latest"
+            header = gguf_header(name)
+            weights = self._blob(header + random.Random(name).randbytes(max(0, blob_size - len(header))))
+            config = self._blob(json.dumps({"model_format": "gguf", "name": name}).encode("utf-8"))
+            repo, tag = name.split(":", 1)
+            manifest = {
+                "schemaVersion": 2,
+                "mediaType": "application/vnd.docker.distribution.manifest.v2+json",
+                "config": {"mediaType": "application/vnd.docker.container.image.v1+json",
+                           "digest": config, "size": len(self.blobs[config])},
+                "layers": [{"mediaType": "application/vnd.ollama.image.model", "digest": weights,
+                            "size": len(self.blobs[weights])},
+                           {"mediaType": "application/vnd.ollama.image.license", "digest": shared,
+                            "size": len(self.blobs[shared])}],
+            }
+            self.manifests[f"library/{repo}:{tag}"] = json.dumps(manifest).encode("utf-8")
+
+    def _blob(self, data: bytes) -> str:
+        digest = "sha256:" + hashlib.sha256(data).hexdigest()
+        self.blobs[digest] = data
+        return digest
+
+
+def make_registry_handler(registry: FakeRegistry):
+    class FakeRegistryHandler(BaseHTTPRequestHandler):
+        """Request handler for the fake registry"""
+
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            self.route()
+
+        def do_GET(self):
+            self.route()
+
+        def _send(self, code: int, body: bytes, content_type: str = "application/json", headers=None):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+                registry.bytes_served += len(body)
+
+        def route(self):
+            parts = self.path.split("/")
+            if self.path.startswith("/cdn/"):
+                registry.requests["cdn"] += 1
+                data = registry.blobs.get(parts[2])
+                if data is None:
+                    return self._send(404, b"{}")
+                header = self.headers.get("Range")
+                if header:
+                    start, _, end = header[6:].partition("-")
+                    start, end = int(start), min(int(end or len(data) - 1), len(data) - 1)
+                    return self._send(206, data[start:end + 1], "application/octet-stream",
+                                      {"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+                return self._send(200, data, "application/octet-stream")
+            if "manifests" in parts:
+                registry.requests["manifests"] += 1
+                i = parts.index("manifests")
+                body = registry.manifests.get(f"{'/'.join(parts[2:i])}:{parts[i + 1]}")
+                if body is None:
+                    return self._send(404, b'{"errors": [{"code": "MANIFEST_UNKNOWN"}]}')
+                return self._send(200, body, "application/vnd.docker.distribution.manifest.v2+json")
+            if "blobs" in parts:
+                registry.requests["blobs"] += 1
+                if parts[-1] not in registry.blobs:
+                    return self._send(404, b'{"errors": [{"code": "BLOB_UNKNOWN"}]}')
+                return self._send(307, b"", headers={"Location": f"/cdn/{parts[-1]}"})
+            self._send(404, b"{}")
+
+    return FakeRegistryHandler
+
+
+def serve(fake: FakeOllama, host: str = "127.0.0.1", port: int = 11434) -> ThreadingHTTPServer:
+    """Start the fake server on a background thread and return it"""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+def main():
+    """Run a fake Ollama API server"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fake Ollama API server for local testing')
+    parser.add_argument('--host', default='127.0.0.1', help='Listen address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=11434, help='Listen port (default: 11434)')
+    parser.add_argument('--models', nargs='*', default=DEFAULT_MODELS, help='Models installed at start')
+    parser.add_argument('--token-delay', type=float, default=0.01, help='Seconds per generated token')
+    parser.add_argument('--load-delay', type=float, default=0.2, help='Seconds to load a model')
+    parser.add_argument('--num-parallel', type=int, default=4, help='Concurrent requests before queueing')
+    parser.add_argument('--max-loaded', type=int, default=2, help='Models kept loaded at once')
+    parser.add_argument('--pull-rate', type=float, default=2e9, help='Simulated pull speed in bytes/second')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of generations that fail')
+    parser.add_argument('--contention', type=float, default=0.0,
+                        help='Per-token slowdown per extra concurrent generation (e.g. 0.5)')
+    parser.add_argument('--registry', action='store_true', help='Serve a fake model registry (/v2/) instead')
+    parser.add_argument('--blob-size', type=int, default=4 * 1024 * 1024, help='Registry weight blob size in bytes')
+    args = parser.parse_args()
+
+    if args.registry:
+        registry = FakeRegistry(args.models, args.blob_size)
+        server = ThreadingHTTPServer((args.host, args.port), make_registry_handler(registry))
+        print(f"📦 Fake registry listening on http://{args.host}:{args.port} with {len(registry.manifests)} models")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Stopping fake registry")
+        finally:
+            server.server_close()
+        return
+
+    fake = FakeOllama(args.models, args.token_delay, args.load_delay, args.num_parallel,
+                      args.max_loaded, args.pull_rate, args.fail_rate, args.contention)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    print(f"🤖 Fake Ollama listening on http://{args.host}:{args.port} with {len(fake.models)} models")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping fake Ollama")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Ollama Load Generator
+Replays a prompt corpus against the Ollama API and records what the
+client sees, to measure the effect of numParallel, flashAttention or
+resource changes in values.yaml
+
+    loadgen.py run --prompts prompts.jsonl --model codellama:13b --concurrency 4 --requests 200 -o base.json
+    loadgen.py run --rate 2.5 --duration 300 -o open-loop.json
+    loadgen.py compare base.json tuned.json
+    loadgen.py run --fake --requests 50          # against a bundled fake server, offline
+
+- Closed loop (--concurrency): N clients each send the next request as
+  soon as their last one finishes
+- Open loop (--rate): Poisson arrivals at a fixed mean rate; latency is
+  measured from the scheduled arrival, so a slow server cannot hide its
+  queueing by slowing the client down
+- Per request: time to first token, inter-token gaps, end-to-end latency,
+  server-side tokens/sec and queue wait, errors
+- Results are JSON (config, percentile summary, every request), and
+  compare prints the change in each summary metric between runs
+
+No external dependencies required.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Any, Optional
+
+from ollama_proxy import Upstream, UpstreamError, queue_wait
+
+BUILTIN_PROMPTS = [
+    "Write a Python function that checks whether a string is a palindrome.",
+    "Explain the difference between a Kubernetes Deployment and a StatefulSet.",
+    "Refactor this loop into a list comprehension: result = []\nfor x in items:\n    if x > 0:\n        result.append(x * 2)",
+    "Write a bash script that prints the five largest files in a directory.",
+    "What does the Go keyword `defer` do? Give a short example.",
+    "Write a SQL query returning the ten customers with the highest total order value.",
+    "Summarize what a Helm chart is in three sentences.",
+    "Implement binary search in Rust.",
+]
+PERCENTILES = (50, 90, 95, 99)
+# Values kept per summary series; percentiles are exact below this, sampled above
+RESERVOIR_SIZE = 100_000
+SERIES = ("ttft", "latency", "itl", "queue_wait", "tokens_per_second")
+# Summary metrics where a larger value is better (the rest are latencies)
+HIGHER_IS_BETTER = {"throughput_rps", "output_tokens_per_second"} | {f"tokens_per_second_p{q}" for q in PERCENTILES}
+
+
+def load_corpus(path: Optional[str]) -> List[Dict[str, Any]]:
+    """Prompts from JSONL ({"prompt"|"messages", "model"?, "options"?}) or plain text, one per line"""
+    if not path:
+        return [{"prompt": prompt} for prompt in BUILTIN_PROMPTS]
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                if entry.get("prompt") or entry.get("messages"):
+                    corpus.append(entry)
+            else:
+                corpus.append({"prompt": line})
+    if not corpus:
+        raise ValueError(f"no prompts in {path}")
+    return corpus
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (q in 0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Reservoir:
+    """Uniform sample of at most size values (Algorithm R), so percentiles of any run fit in bounded memory"""
+
+    def __init__(self, size: int = RESERVOIR_SIZE, seed: Optional[int] = None):
+        self.size = size
+        self.values: List[float] = []
+        self.seen = 0
+        self.random = random.Random(seed)
+
+    def add(self, value: float):
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+            return
+        slot = self.random.randrange(self.seen)
+        if slot < self.size:
+            self.values[slot] = value
+
+
+class LoadGenerator:
+    """Sends the corpus at a fixed concurrency or arrival rate; keeps per-request results unless keep is False
+    (each result then only goes to sink), and summary statistics in bounded memory"""
+
+    def __init__(self, url: str, corpus: List[Dict[str, Any]], model: Optional[str] = None,
+                 max_tokens: int = 128, timeout: float = 600.0, seed: Optional[int] = None,
+                 keep: bool = True, sink: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.url = url
+        self.corpus = corpus
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.seed = seed
+        self.keep = keep
+        self.sink = sink
+        self.results: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.reset()
+        self.upstream = Upstream(url, timeout=timeout)
+        self.issued = 0
+        self.limit: Optional[int] = None
+        self.deadline: Optional[float] = None
+        self.started = self.finished = 0.0
+
+    def reset(self):
+        """Forget results so far (warm-up requests)"""
+        with self.lock:
+            self.results.clear()
+            self.count = self.ok = self.tokens = 0
+            self.series = {name: Reservoir(seed=self.seed) for name in SERIES}
+
+    def record(self, result: Dict[str, Any], gaps: Optional[List[float]] = None):
+        """Account one finished (or refused) request"""
+        with self.lock:
+            if self.keep:
+                self.results.append(result)
+            if self.sink is not None:
+                self.sink(result)
+            self.count += 1
+            for gap in gaps or ():
+                self.series["itl"].add(gap)
+            if not result.get("ok"):
+                return
+            self.ok += 1
+            self.tokens += result.get("tokens", 0)
+            for name in ("ttft", "latency", "queue_wait", "tokens_per_second"):
+                if name in result:
+                    self.series[name].add(result[name])
+
+    def _next(self) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            if self.limit is not None and self.issued >= self.limit:
+                return None
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                return None
+            entry = self.corpus[self.issued % len(self.corpus)]
+            self.issued += 1
+            return dict(entry, _id=self.issued - 1)
+
+    def send(self, entry: Dict[str, Any], scheduled: Optional[float] = None) -> Dict[str, Any]:
+        """One streamed request; times are measured from the scheduled start when given"""
+        endpoint = "/api/chat" if entry.get("messages") else "/api/generate"
+        payload: Dict[str, Any] = {"model": entry.get("model") or self.model, "stream": True,
+                                   "options": dict({"num_predict": self.max_tokens}, **(entry.get("options") or {}))}
+        if entry.get("messages"):
+            payload["messages"] = entry["messages"]
+        else:
+            payload["prompt"] = entry["prompt"]
+        start = time.perf_counter()
+        origin = scheduled if scheduled is not None else start
+        record: Dict[str, Any] = {"id": entry["_id"], "model": payload["model"], "endpoint": endpoint,
+                                  "offset": round(origin - self.started, 4), "ok": False}
+        gaps: List[float] = []
+        first = last = None
+        final: Dict[str, Any] = {}
+        try:
+            for document in self.upstream.stream("POST", endpoint, payload):
+                now = time.perf_counter()
+                if document.get("error"):
+                    raise UpstreamError(document["error"])
+                if first is None:
+                    first = now
+                elif not document.get("done"):
+                    gaps.append(now - last)
+                last = now
+                if document.get("done"):
+                    final = document
+            if not final:
+                raise UpstreamError("stream ended without a final chunk")
+            record["ok"] = True
+        except (UpstreamError, ValueError) as e:
+            record["error"] = str(e)[:300]
+        end = time.perf_counter()
+        record["latency"] = round(end - origin, 4)
+        if scheduled is not None:
+            record["client_delay"] = round(start - scheduled, 4)
+        if first is not None:
+            record["ttft"] = round(first - origin, 4)
+        if gaps:
+            record["itl_mean"] = round(sum(gaps) / len(gaps), 5)
+            record["itl_max"] = round(max(gaps), 5)
+        if final:
+            record["tokens"] = final.get("eval_count", 0)
+            record["prompt_tokens"] = final.get("prompt_eval_count", 0)
+            if final.get("eval_count") and final.get("eval_duration"):
+                record["tokens_per_second"] = round(final["eval_count"] / (final["eval_duration"] / 1e9), 2)
+            wait = queue_wait(final)
+            if wait is not None:
+                record["queue_wait"] = round(wait, 4)
+            if final.get("load_duration"):
+                record["load"] = round(final["load_duration"] / 1e9, 4)
+        self.record(record, gaps)
+        return record
+
+    def run_closed(self, concurrency: int, requests: Optional[int], duration: Optional[float]):
+        self._begin(requests, duration)
+
+        def client():
+            while True:
+                entry = self._next()
+                if entry is None:
+                    return
+                self.send(entry)
+
+        threads = [threading.Thread(target=client, name=f"client-{i}", daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.finished = time.perf_counter()
+
+    def run_open(self, rate: float, requests: Optional[int], duration: Optional[float],
+                 max_in_flight: int = 256, uniform: bool = False):
+        self._begin(requests, duration)
+        in_flight = threading.BoundedSemaphore(max_in_flight)
+        threads: List[threading.Thread] = []
+        scheduled = self.started
+
+        def fire(entry: Dict[str, Any], at: float):
+            try:
+                self.send(entry, at)
+            finally:
+                in_flight.release()
+
+        while True:
+            scheduled += 1.0 / rate if uniform else self.random.expovariate(rate)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            entry = self._next()
+            if entry is None:
+                break
+            if not in_flight.acquire(blocking=False):
+                # The client itself is the bottleneck: record it rather than silently slowing down
+                self.record({"id": entry["_id"], "offset": round(scheduled - self.started, 4),
+                             "ok": False, "error": "client: too many requests in flight"})
+                continue
+            thread = threading.Thread(target=fire, args=(entry, scheduled), daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        self.finished = time.perf_counter()
+
+    def _begin(self, requests: Optional[int], duration: Optional[float]):
+        self.limit = requests
+        self.started = time.perf_counter()
+        self.deadline = self.started + duration if duration else None
+        self.finished = self.started
+
+    def summary(self) -> Dict[str, Any]:
+        wall = max(self.finished - self.started, 1e-9)
+        with self.lock:
+            summary: Dict[str, Any] = {
+                "requests": self.count, "errors": self.count - self.ok,
+                "error_rate": round((self.count - self.ok) / self.count, 4) if self.count else 0.0,
+                "wall_seconds": round(wall, 3),
+                "throughput_rps": round(self.ok / wall, 3),
+                "output_tokens_per_second": round(self.tokens / wall, 2),
+            }
+            for name, reservoir in self.series.items():
+                for q in PERCENTILES:
+                    value = percentile(reservoir.values, q)
+                    summary[f"{name}_p{q}"] = None if value is None else round(value, 5)
+        return summary
+
+
+def print_summary(summary: Dict[str, Any], title: str = ""):
+    if title:
+        print(f"📈 {title}")
+    print(f"   {summary['requests']} requests, {summary['errors']} errors ({100 * summary['error_rate']:.1f}%),"
+          f" {summary['wall_seconds']:.1f}s")
+    print(f"   {summary['throughput_rps']:.2f} req/s, {summary['output_tokens_per_second']:.1f} output tokens/s")
+    print(f"   {'':26}" + "".join(f"{'p' + str(q):>10}" for q in PERCENTILES))
+    for name, unit, scale in (("ttft", "ms", 1000), ("itl", "ms", 1000), ("latency", "s", 1),
+                              ("queue_wait", "s", 1), ("tokens_per_second", "tok/s", 1)):
+        cells = []
+        for q in PERCENTILES:
+            value = summary.get(f"{name}_p{q}")
+            cells.append(f"{'-':>10}" if value is None else f"{value * scale:>10.1f}")
+        print(f"   {name + ' (' + unit + ')':26}" + "".join(cells))
+
+
+def compare(paths: List[str]) -> List[Dict[str, Any]]:
+    """Summary metrics of each run next to the first (baseline), with the relative change"""
+    runs = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            runs.append(json.load(f)["summary"])
+    base = runs[0]
+    rows = []
+    for key, value in base.items():
+        if not isinstance(value, (int, float)) or key in ("requests", "wall_seconds"):
+            continue
+        row = {"metric": key, "values": [run.get(key) for run in runs], "change": []}
+        for run in runs[1:]:
+            other = run.get(key)
+            row["change"].append(None if other is None or not value else round((other - value) / value, 4))
+        rows.append(row)
+    return rows
+
+
+def start_fake(models: List[str], token_delay: float, num_parallel: int) -> str:
+    """A fake Ollama server on a free local port; returns its URL"""
+    from fake_ollama import FakeOllama, serve as serve_fake
+
+    fake = FakeOllama(models, token_delay=token_delay, load_delay=0.05, num_parallel=num_parallel,
+                      max_loaded=max(2, len(models)))
+    server = serve_fake(fake, "127.0.0.1", 0)
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    """Run a load test or compare results"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Load generator and benchmark harness for the Ollama API')
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help='Send load and record results')
+    run.add_argument('--url', default=os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434"),
+                     help='Ollama API URL (default: OLLAMA_URL or http://127.0.0.1:11434)')
+    run.add_argument('--model', default=os.environ.get("LOADGEN_MODEL", "codellama:13b"),
+                     help='Model for prompts that do not name one (default: codellama:13b)')
+    run.add_argument('--prompts', help='Prompt corpus: JSONL or one prompt per line (default: built-in)')
+    run.add_argument('--concurrency', '-c', type=int, default=4, help='Closed-loop clients (default: 4)')
+    run.add_argument('--rate', type=float, help='Open loop: mean arrivals per second instead of --concurrency')
+    run.add_argument('--uniform', action='store_true', help='Open loop: evenly spaced instead of Poisson arrivals')
+    run.add_argument('--requests', '-n', type=int, help='Stop after this many requests')
+    run.add_argument('--duration', type=float, help='Stop issuing requests after this many seconds')
+    run.add_argument('--max-tokens', type=int, default=128, help='num_predict per request (default: 128)')
+    run.add_argument('--warmup', type=int, default=1, help='Unrecorded requests sent first to load the model')
+    run.add_argument('--seed', type=int, help='Seed for Poisson arrivals')
+    run.add_argument('--label', help='Name for this run in the results (default: the settings)')
+    run.add_argument('--output', '-o', help='Write results JSON here')
+    run.add_argument('--fake', action='store_true', help='Run against a bundled fake Ollama server (offline)')
+    run.add_argument('--fake-token-delay', type=float, default=0.01, help='Fake server seconds per token')
+    run.add_argument('--fake-num-parallel', type=int, default=4, help='Fake server OLLAMA_NUM_PARALLEL')
+    cmp = sub.add_parser('compare', help='Compare result files against the first one')
+    cmp.add_argument('results', nargs='+', help='Result JSON files; the first is the baseline')
+    cmp.add_argument('--json', action='store_true', help='Print the comparison as JSON')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        rows = compare(args.results)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return
+        names = [os.path.basename(path) for path in args.results]
+        print(f"{'metric':28}" + "".join(f"{name[:16]:>18}" for name in names))
+        for row in rows:
+            cells = []
+            for i, value in enumerate(row["values"]):
+                text = "-" if value is None else f"{value:.4g}"
+                change = row["change"][i - 1] if i else None
+                if change is not None:
+                    better = change > 0 if row["metric"] in HIGHER_IS_BETTER else change < 0
+                    text += f" ({'+' if change >= 0 else ''}{100 * change:.0f}%{'✅' if better and abs(change) >= 0.05 else ''})"
+                cells.append(f"{text:>18}")
+            print(f"{row['metric']:28}" + "".join(cells))
+        return
+
+    if not args.requests and not args.duration:
+        args.requests = 50
+    corpus = load_corpus(args.prompts)
+    models = sorted({entry.get("model") or args.model for entry in corpus})
+    url = args.url
+    if args.fake:
+        url = start_fake(models, args.fake_token_delay, args.fake_num_parallel)
+        print(f"🤖 Fake Ollama on {url}")
+
+    generator = LoadGenerator(url, corpus, args.model, args.max_tokens, seed=args.seed)
+    for model in models:
+        for _ in range(args.warmup):
+            generator.send({"prompt": "hi", "model": model, "_id": -1})
+    generator.reset()
+
+    mode = f"open loop {args.rate}/s" if args.rate else f"closed loop x{args.concurrency}"
+    limit = f"{args.requests} requests" if args.requests else f"{args.duration:.0f}s"
+    print(f"🚀 {mode}, {limit}, {len(corpus)} prompts against {url}", flush=True)
+    try:
+        if args.rate:
+            generator.run_open(args.rate, args.requests, args.duration, uniform=args.uniform)
+        else:
+            generator.run_closed(args.concurrency, args.requests, args.duration)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; summarizing what finished")
+        generator.finished = time.perf_counter()
+    summary = generator.summary()
+    print_summary(summary, args.label or mode)
+
+    if args.output:
+        config = {"url": url, "model": args.model, "prompts": args.prompts or "built-in", "mode": mode,
+                  "concurrency": None if args.rate else args.concurrency, "rate": args.rate,
+                  "max_tokens": args.max_tokens, "fake": args.fake}
+        results = {"label": args.label or mode, "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                   "config": config, "summary": summary,
+                   "requests": sorted(generator.results, key=lambda r: r["id"])}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"💾 Results written to {args.output}")
+    sys.exit(1 if summary["requests"] and summary["errors"] == summary["requests"] else 0)
+
+
+if __name__ == "__main__":
+    main()
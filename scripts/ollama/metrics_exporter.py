@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Ollama Metrics Exporter
+Sidecar that proxies the Ollama API and publishes Prometheus metrics for it
+
+Every request is forwarded unchanged (streams stay streams) while the
+exporter records, per model and endpoint:
+
+    ollama_request_duration_seconds       wall time of the whole request
+    ollama_time_to_first_token_seconds    until the first streamed chunk
+    ollama_tokens_per_second              eval_count / eval_duration
+    ollama_queue_wait_seconds             until Ollama started evaluating the prompt
+    ollama_requests_total                 by status code
+    ollama_cold_loads_total               loads caused by requests for a model not in memory
+
+and, from a background poll of /api/ps, the loaded-model count and memory.
+Models that are not installed and paths that are not Ollama API routes are
+labelled "other".
+Served on GET /metrics. With --request-log every inference request is also
+appended to a JSONL file (see request_log.py). No external dependencies required.
+"""
+
+import os
+import sys
+import time
+import socket
+import threading
+from typing import Optional, Tuple
+
+from model_sync import ModelDigests, normalize, parse_size
+from ollama_proxy import ProxyHandler, Upstream, UpstreamError, model_of, queue_wait, serve
+from prom_metrics import CONTENT_TYPE, RATE_BUCKETS, Registry
+from request_log import RequestLog
+
+# Inference endpoints whose responses carry Ollama's timing fields
+TIMED_ENDPOINTS = {"/api/generate", "/api/chat", "/api/embed", "/api/embeddings"}
+# Paths labelled by name; any other path is counted as "other"
+KNOWN_ENDPOINTS = TIMED_ENDPOINTS | {
+    "/", "/api/tags", "/api/ps", "/api/show", "/api/pull", "/api/push", "/api/create", "/api/copy",
+    "/api/delete", "/api/version", "/v1/chat/completions", "/v1/completions", "/v1/embeddings", "/v1/models"}
+
+
+class OllamaMetrics:
+    """The exporter's metric families and how Ollama responses feed them"""
+
+    def __init__(self, installed: ModelDigests):
+        self.installed = installed
+        self.registry = Registry()
+        labels = ("model", "endpoint")
+        self.duration = self.registry.histogram(
+            "ollama_request_duration_seconds", "Wall time of proxied Ollama requests", labels)
+        self.ttft = self.registry.histogram(
+            "ollama_time_to_first_token_seconds", "Time until the first streamed response chunk", labels)
+        self.tokens_per_second = self.registry.histogram(
+            "ollama_tokens_per_second", "Generation throughput reported by Ollama", labels, RATE_BUCKETS)
+        self.queue_wait = self.registry.histogram(
+            "ollama_queue_wait_seconds", "Time before prompt evaluation started (slot wait, and the load when cold)",
+            labels)
+        self.load = self.registry.histogram(
+            "ollama_model_load_seconds", "load_duration of requests whose model was not resident", labels)
+        self.requests = self.registry.counter(
+            "ollama_requests_total", "Proxied Ollama requests", labels + ("status",))
+        self.cold_loads = self.registry.counter(
+            "ollama_cold_loads_total", "Model loads caused by requests for a model that was not resident", ("model",))
+        self.tokens = self.registry.counter(
+            "ollama_generated_tokens_total", "Tokens generated", labels)
+        self.in_flight = self.registry.gauge(
+            "ollama_requests_in_flight", "Requests currently being proxied", ("endpoint",))
+        self.loaded_models = self.registry.gauge(
+            "ollama_loaded_models", "Models currently loaded in memory")
+        self.model_memory = self.registry.gauge(
+            "ollama_loaded_model_bytes", "Memory held by each loaded model", ("model", "memory"))
+        self.up = self.registry.gauge(
+            "ollama_up", "1 when the last /api/ps poll succeeded")
+        # Models in memory per the last /api/ps poll and the loads claimed since; None until the first poll
+        self.resident: Optional[set] = None
+        self.lock = threading.Lock()
+
+    def labels(self, model: str, endpoint: str) -> Tuple[str, str]:
+        """Installed models and known endpoints only, so client-chosen names and paths cannot grow the
+        metric series"""
+        if model:
+            model = normalize(model) if self.installed.get(model) else "other"
+        return model, endpoint if endpoint in KNOWN_ENDPOINTS else "other"
+
+    def claim_load(self, model: str) -> bool:
+        """Whether a request for model arriving now makes Ollama load it; requests arriving during that
+        load find the model already claimed, so one load is counted once"""
+        with self.lock:
+            if not model or self.resident is None or normalize(model) in self.resident:
+                return False
+            self.resident.add(normalize(model))
+            return True
+
+    def observe(self, model: str, endpoint: str, status: int, started: float, observer=None, cold: bool = False):
+        """Record one finished request from its wall time and the StreamObserver that relayed it; cold
+        when it caused its model to be loaded"""
+        elapsed = time.perf_counter() - started
+        model, endpoint = self.labels(model, endpoint)
+        self.requests.inc(model=model, endpoint=endpoint, status=str(status))
+        self.duration.observe(elapsed, model=model, endpoint=endpoint)
+        final = observer.last if observer else None
+        if endpoint not in TIMED_ENDPOINTS or status >= 400 or not final:
+            return
+        if observer.documents > 1:
+            # Streamed: the first chunk carries the first token
+            self.ttft.observe(observer.first_chunk_at - started, model=model, endpoint=endpoint)
+        wait = queue_wait(final)
+        if wait is not None:
+            self.queue_wait.observe(wait, model=model, endpoint=endpoint)
+        # load_duration includes the wait for a slot, so it only measures a load when the model was not resident
+        if cold:
+            self.cold_loads.inc(model=model)
+            if final.get("load_duration"):
+                self.load.observe(final["load_duration"] / 1e9, model=model, endpoint=endpoint)
+        eval_count, eval_duration = final.get("eval_count"), final.get("eval_duration")
+        if eval_count and eval_duration:
+            self.tokens.inc(eval_count, model=model, endpoint=endpoint)
+            self.tokens_per_second.observe(eval_count / (eval_duration / 1e9), model=model, endpoint=endpoint)
+
+    def update_loaded(self, models: list):
+        """Replace the loaded-model gauges with the current /api/ps listing"""
+        memory = {}
+        for model in models:
+            name = model.get("name") or model.get("model", "")
+            size, vram = model.get("size", 0) or 0, model.get("size_vram", 0) or 0
+            memory[(name, "total")] = size
+            memory[(name, "vram")] = vram
+            memory[(name, "ram")] = max(0, size - vram)
+        self.model_memory.replace(memory)
+        self.loaded_models.set(len(models))
+        with self.lock:
+            self.resident = {normalize(name) for name, _ in memory}
+        self.up.set(1)
+
+
+def poll_loaded(upstream: Upstream, metrics: OllamaMetrics, interval: float, stop: threading.Event):
+    """Refresh loaded-model metrics from /api/ps every interval seconds"""
+    while not stop.is_set():
+        try:
+            metrics.update_loaded(upstream.json("GET", "/api/ps").get("models") or [])
+        except (UpstreamError, ValueError):
+            metrics.up.set(0)
+        stop.wait(interval)
+
+
+def make_handler(upstream: Upstream, metrics: OllamaMetrics, request_log: Optional[RequestLog] = None,
+                 replica: str = ""):
+    class ExporterHandler(ProxyHandler):
+        """Proxies to Ollama and serves /metrics locally"""
+
+        def handle_local(self, body: bytes) -> bool:
+            if self.command == "GET" and self.path == "/metrics":
+                self.send_bytes(200, metrics.registry.render(), CONTENT_TYPE)
+                return True
+            return False
+
+        def proxy(self, body: bytes, upstream: Optional[Upstream] = None, on_document=None, record: bool = False):
+            endpoint = self.path.split("?", 1)[0]
+            model = model_of(body) if self.command == "POST" else ""
+            arrived, started = time.time(), time.perf_counter()
+            cold = endpoint in TIMED_ENDPOINTS and metrics.claim_load(model)
+            endpoint_label = metrics.labels("", endpoint)[1]
+            metrics.in_flight.inc(endpoint=endpoint_label)
+            status, observer = 502, None
+            try:
+                status, observer = super().proxy(body, upstream, on_document, record)
+                return status, observer
+            finally:
+                metrics.in_flight.dec(endpoint=endpoint_label)
+                if not model and observer and observer.last:
+                    model = observer.last.get("model", "")
+                metrics.observe(model, endpoint, status, started, observer, cold)
+                if request_log is not None:
+                    client = self.headers.get("X-Forwarded-For", self.client_address[0]).split(",")[0].strip()
+                    request_log.log(endpoint, body, status, arrived, started, observer, replica, client)
+
+    ExporterHandler.upstream = upstream
+    return ExporterHandler
+
+
+def main():
+    """Run the metrics exporter sidecar"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Prometheus metrics exporter sidecar for Ollama')
+    parser.add_argument('--listen', default=os.environ.get("EXPORTER_LISTEN", "0.0.0.0"),
+                        help='Listen address (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get("EXPORTER_PORT", "11435")),
+                        help='Listen port for the proxy and /metrics (default: 11435)')
+    parser.add_argument('--upstream', default=os.environ.get("OLLAMA_UPSTREAM", "http://127.0.0.1:11434"),
+                        help='Ollama API to proxy (default: http://127.0.0.1:11434)')
+    parser.add_argument('--poll-interval', type=float, default=float(os.environ.get("EXPORTER_POLL_INTERVAL", "15")),
+                        help='Seconds between /api/ps polls (default: 15)')
+    parser.add_argument('--request-log', default=os.environ.get("REQUEST_LOG"),
+                        help='Append one JSON line per inference request to this file')
+    parser.add_argument('--request-log-size', default=os.environ.get("REQUEST_LOG_SIZE", "100Mi"),
+                        help='Rotate the request log past this size (default: 100Mi)')
+    parser.add_argument('--request-log-keep', type=int, default=int(os.environ.get("REQUEST_LOG_KEEP", "10")),
+                        help='Rotated, gzipped request logs to keep (default: 10)')
+    args = parser.parse_args()
+
+    upstream = Upstream(args.upstream)
+    metrics = OllamaMetrics(ModelDigests(Upstream(args.upstream)))
+    request_log = None
+    if args.request_log:
+        request_log = RequestLog(args.request_log, parse_size(args.request_log_size), args.request_log_keep)
+    stop = threading.Event()
+    threading.Thread(target=poll_loaded, args=(Upstream(args.upstream), metrics, args.poll_interval, stop),
+                     name="ps-poll", daemon=True).start()
+
+    # The pod name, so records from several replicas can be told apart
+    server = serve(make_handler(upstream, metrics, request_log, socket.gethostname()), args.listen, args.port)
+    print(f"📊 Metrics exporter on http://{args.listen}:{args.port}/metrics proxying {upstream.url}")
+    if request_log is not None:
+        print(f"📜 Logging inference requests to {request_log.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping metrics exporter")
+    finally:
+        stop.set()
+        server.server_close()
+        if request_log is not None:
+            request_log.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Ollama Model Estimator
+Predicts disk size and peak memory of a model before it is pulled, from its
+registry manifest and the GGUF header at the start of its weights blob
+
+Only the header is downloaded (a ranged request, grown until the metadata
+and tensor table fit). Parameter count, quantization, context length and
+attention shape come from the header; disk size is the sum of the manifest
+layers. Peak memory is the weights plus the KV cache Ollama allocates for
+num_ctx x num_parallel, plus compute buffers.
+
+Parsed headers are cached per blob digest, so repeated estimates cost one
+manifest request.
+No external dependencies required.
+"""
+
+import os
+import sys
+import json
+import struct
+import shutil
+import urllib.error
+import urllib.request
+from typing import Dict, List, Any, Optional, Tuple
+
+from model_sync import parse_size
+
+DEFAULT_REGISTRY = "https://registry.ollama.ai"
+DEFAULT_CACHE = os.path.expanduser("~/.cache/ollama-stack/estimates.json")
+MODEL_MEDIA_TYPE = "application/vnd.ollama.image.model"
+
+# llama.cpp general.file_type values
+FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1", 10: "Q2_K",
+    11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S", 15: "Q4_K_M", 16: "Q5_K_S",
+    17: "Q5_K_M", 18: "Q6_K", 19: "IQ2_XXS", 20: "IQ2_XS", 21: "Q2_K_S", 22: "IQ3_XS",
+    23: "IQ3_XXS", 24: "IQ1_S", 25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M", 28: "IQ2_S",
+    29: "IQ2_M", 30: "IQ4_XS", 31: "IQ1_M", 32: "BF16",
+}
+
+# GGUF metadata value types: struct format for scalars
+_SCALARS = {0: "<B", 1: "<b", 2: "<H", 3: "<h", 4: "<I", 5: "<i", 6: "<f", 7: "<?", 10: "<Q", 11: "<q", 12: "<d"}
+_STRING, _ARRAY = 8, 9
+
+
+class EstimateError(Exception):
+    """Raised when a manifest or header cannot be fetched or parsed"""
+
+
+class _NeedMore(Exception):
+    """The header extends past the bytes fetched so far"""
+
+
+class GGUFHeader:
+    """Metadata and tensor shapes from the start of a GGUF file"""
+
+    def __init__(self, metadata: Dict[str, Any], tensors: List[Tuple[str, List[int], int]], version: int):
+        self.metadata = metadata
+        self.tensors = tensors
+        self.version = version
+
+    @classmethod
+    def parse(cls, data: bytes) -> "GGUFHeader":
+        """Parse the header; raises _NeedMore when data is a too-short prefix"""
+        reader = _Reader(data)
+        if reader.take(4) != b"GGUF":
+            raise EstimateError("not a GGUF file")
+        version = reader.unpack("<I")
+        tensor_count, kv_count = reader.unpack("<Q"), reader.unpack("<Q")
+        metadata = {}
+        for _ in range(kv_count):
+            key = reader.string()
+            metadata[key] = reader.value(reader.unpack("<I"))
+        tensors = []
+        for _ in range(tensor_count):
+            name = reader.string()
+            dims = [reader.unpack("<Q") for _ in range(reader.unpack("<I"))]
+            tensor_type = reader.unpack("<I")
+            reader.unpack("<Q")  # data offset
+            tensors.append((name, dims, tensor_type))
+        return cls(metadata, tensors, version)
+
+    @property
+    def architecture(self) -> str:
+        return self.metadata.get("general.architecture", "llama")
+
+    def arch(self, key: str, default: Any = None) -> Any:
+        return self.metadata.get(f"{self.architecture}.{key}", default)
+
+    @property
+    def parameters(self) -> int:
+        count = 0
+        for _, dims, _ in self.tensors:
+            size = 1
+            for dim in dims:
+                size *= dim
+            count += size
+        return count or int(self.metadata.get("general.parameter_count", 0))
+
+    def summary(self) -> Dict[str, Any]:
+        """The fields estimates need, small enough to cache"""
+        heads = self.arch("attention.head_count", 0) or 0
+        embedding = self.arch("embedding_length", 0) or 0
+        head_dim = self.arch("attention.key_length") or (embedding // heads if heads else 0)
+        return {
+            "architecture": self.architecture,
+            "parameters": self.parameters,
+            "file_type": FILE_TYPES.get(self.metadata.get("general.file_type"), "unknown"),
+            "context_length": self.arch("context_length", 0),
+            "block_count": self.arch("block_count", 0),
+            "embedding_length": embedding,
+            "head_count": heads,
+            "head_count_kv": self.arch("attention.head_count_kv") or heads,
+            "head_dim": head_dim,
+            "value_dim": self.arch("attention.value_length") or head_dim,
+        }
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def take(self, size: int) -> bytes:
+        if self.offset + size > len(self.data):
+            raise _NeedMore()
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def unpack(self, fmt: str):
+        size = struct.calcsize(fmt)
+        if self.offset + size > len(self.data):
+            raise _NeedMore()
+        value = struct.unpack_from(fmt, self.data, self.offset)[0]
+        self.offset += size
+        return value
+
+    def string(self) -> str:
+        return self.take(self.unpack("<Q")).decode("utf-8", "replace")
+
+    def value(self, value_type: int) -> Any:
+        if value_type in _SCALARS:
+            return self.unpack(_SCALARS[value_type])
+        if value_type == _STRING:
+            return self.string()
+        if value_type == _ARRAY:
+            item_type, count = self.unpack("<I"), self.unpack("<Q")
+            if item_type in _SCALARS:
+                # Skip numeric arrays (token scores, types) without decoding them
+                self.take(struct.calcsize(_SCALARS[item_type]) * count)
+                return {"array": item_type, "count": count}
+            if item_type == _STRING:
+                for _ in range(count):
+                    self.take(self.unpack("<Q"))
+                return {"array": item_type, "count": count}
+            return [self.value(item_type) for _ in range(count)]
+        raise EstimateError(f"unknown GGUF value type {value_type}")
+
+
+def split_name(name: str) -> Tuple[str, str]:
+    """Registry repository and tag for a model name"""
+    repository, _, tag = name.partition(":")
+    if "/" not in repository:
+        repository = f"library/{repository}"
+    return repository, tag or "latest"
+
+
+class Estimator:
+    """Manifests from a registry, GGUF headers cached by digest"""
+
+    def __init__(self, registry: str = DEFAULT_REGISTRY, cache_path: Optional[str] = DEFAULT_CACHE,
+                 timeout: float = 30.0):
+        self.registry = registry.rstrip("/") if "://" in registry else f"http://{registry.rstrip('/')}"
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.cache: Dict[str, Any] = {}
+        self.fetched_bytes = 0
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    self.cache = json.load(f)
+            except (OSError, ValueError):
+                self.cache = {}
+
+    def _get(self, path: str, headers: Optional[Dict[str, str]] = None) -> bytes:
+        request = urllib.request.Request(self.registry + path, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = response.read()
+        except urllib.error.HTTPError as e:
+            raise EstimateError(f"{path}: HTTP {e.code}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise EstimateError(f"{path}: {e}") from e
+        self.fetched_bytes += len(data)
+        return data
+
+    def manifest(self, name: str) -> Dict[str, Any]:
+        repository, tag = split_name(name)
+        body = self._get(f"/v2/{repository}/manifests/{tag}",
+                         {"Accept": "application/vnd.docker.distribution.manifest.v2+json"})
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise EstimateError(f"invalid manifest for {name}") from e
+
+    def header(self, name: str, digest: str) -> Dict[str, Any]:
+        """GGUF summary for a weights blob, from the cache or a growing ranged read"""
+        if digest in self.cache:
+            return self.cache[digest]
+        repository, _ = split_name(name)
+        size = 2 * 1024 * 1024
+        while True:
+            data = self._get(f"/v2/{repository}/blobs/{digest}", {"Range": f"bytes=0-{size - 1}"})
+            try:
+                summary = GGUFHeader.parse(data).summary()
+                break
+            except _NeedMore:
+                if len(data) < size or size >= 256 * 1024 * 1024:
+                    raise EstimateError(f"GGUF header of {digest} is truncated")
+                size *= 4
+        self.cache[digest] = summary
+        self._save()
+        return summary
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, indent=2)
+        os.replace(tmp, self.cache_path)
+
+    def estimate(self, name: str, num_ctx: int = 2048, num_parallel: int = 1,
+                 kv_bytes: float = 2.0) -> Dict[str, Any]:
+        """Disk and memory estimate for a model name"""
+        manifest = self.manifest(name)
+        layers = manifest.get("layers", [])
+        weights = next((layer for layer in layers if layer.get("mediaType") == MODEL_MEDIA_TYPE), None)
+        if weights is None:
+            raise EstimateError(f"{name} has no model layer")
+        summary = self.header(name, weights["digest"])
+        return estimate_from(summary, weights["size"],
+                             sum(layer.get("size", 0) for layer in layers) + manifest.get("config", {}).get("size", 0),
+                             num_ctx, num_parallel, kv_bytes, name=name, digest=weights["digest"])
+
+
+def estimate_from(summary: Dict[str, Any], weights_bytes: int, disk_bytes: int, num_ctx: int = 2048,
+                  num_parallel: int = 1, kv_bytes: float = 2.0, **extra) -> Dict[str, Any]:
+    """Memory model: mmap'd weights + KV cache for every parallel slot + compute buffers"""
+    context = min(num_ctx, summary.get("context_length") or num_ctx)
+    kv_cache = int(summary["block_count"] * context * num_parallel * summary["head_count_kv"]
+                   * (summary["head_dim"] + summary["value_dim"]) * kv_bytes)
+    # Compute graph scratch grows with batch x embedding; a floor covers small models
+    compute = int(max(256 * 2 ** 20, 512 * summary["embedding_length"] * 4 * 8))
+    parameters = summary["parameters"]
+    return dict(extra, **{
+        "parameters": parameters,
+        "parameters_human": f"{parameters / 1e9:.1f}B" if parameters >= 1e9 else f"{parameters / 1e6:.0f}M",
+        "quantization": summary["file_type"],
+        "bits_per_weight": round(weights_bytes * 8 / parameters, 2) if parameters else None,
+        "context_length": summary.get("context_length"),
+        "num_ctx": context,
+        "num_parallel": num_parallel,
+        "disk_bytes": disk_bytes,
+        "weights_bytes": weights_bytes,
+        "kv_cache_bytes": kv_cache,
+        "compute_bytes": compute,
+        "peak_memory_bytes": weights_bytes + kv_cache + compute,
+    })
+
+
+def fits(estimate: Dict[str, Any], disk_path: Optional[str], memory_limit: Optional[int],
+         headroom: float = 0.1) -> List[str]:
+    """Reasons the model will not fit; empty when it does"""
+    problems = []
+    if disk_path and os.path.exists(disk_path):
+        free = shutil.disk_usage(disk_path).free
+        if estimate["disk_bytes"] * (1 + headroom) > free:
+            problems.append(f"needs {gb(estimate['disk_bytes'])} on disk but {disk_path} has {gb(free)} free")
+    if memory_limit and estimate["peak_memory_bytes"] > memory_limit:
+        problems.append(f"needs about {gb(estimate['peak_memory_bytes'])} of memory at num_ctx="
+                        f"{estimate['num_ctx']} x {estimate['num_parallel']} parallel, "
+                        f"over the {gb(memory_limit)} limit")
+    return problems
+
+
+def gb(size: float) -> str:
+    return f"{size / 1e9:.1f}GB"
+
+
+def main():
+    """Estimate a model's disk and memory needs from its manifest and GGUF header"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Estimate Ollama model disk size and peak memory before pulling')
+    parser.add_argument('model', help='Model name (e.g. codellama:13b)')
+    parser.add_argument('--registry', default=os.environ.get("OLLAMA_REGISTRY_MIRROR", DEFAULT_REGISTRY),
+                        help=f'Registry or mirror to read from (default: {DEFAULT_REGISTRY})')
+    parser.add_argument('--num-ctx', type=int, default=int(os.environ.get("OLLAMA_CONTEXT_LENGTH", "2048")),
+                        help='Context length per request (default: 2048)')
+    parser.add_argument('--num-parallel', type=int, default=int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")),
+                        help='Parallel requests Ollama allocates KV cache for (default: 4)')
+    parser.add_argument('--kv-type', choices=['f16', 'q8_0', 'q4_0'], default='f16',
+                        help='KV cache type (OLLAMA_KV_CACHE_TYPE, default: f16)')
+    parser.add_argument('--check', action='store_true', help='Exit 1 when the model will not fit')
+    parser.add_argument('--disk-path', default='/mnt/evo4t', help='Filesystem models are stored on (default: /mnt/evo4t)')
+    parser.add_argument('--memory-limit', default='64Gi', help='Pod memory limit (default: 64Gi)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help=f'Header cache (default: {DEFAULT_CACHE})')
+    parser.add_argument('--format', choices=['text', 'json', 'size'], default='text',
+                        help="'size' prints only the rounded disk size, e.g. ~19GB")
+    args = parser.parse_args()
+
+    estimator = Estimator(args.registry, args.cache)
+    kv_bytes = {"f16": 2.0, "q8_0": 1.0625, "q4_0": 0.5625}[args.kv_type]
+    try:
+        estimate = estimator.estimate(args.model, args.num_ctx, args.num_parallel, kv_bytes)
+    except EstimateError as e:
+        if args.format == 'size':
+            print("Unknown")
+        else:
+            print(f"❌ Could not estimate {args.model}: {e}")
+        sys.exit(2)
+
+    problems = fits(estimate, args.disk_path, parse_size(args.memory_limit)) if args.check else []
+    if args.format == 'json':
+        print(json.dumps(dict(estimate, problems=problems), indent=2))
+    elif args.format == 'size':
+        print(f"~{max(1, round(estimate['disk_bytes'] / 1e9))}GB")
+    else:
+        print(f"📦 {args.model}: {estimate['parameters_human']} parameters, {estimate['quantization']} "
+              f"({estimate['bits_per_weight']} bits/weight), context {estimate['context_length']}")
+        print(f"💾 Disk: {gb(estimate['disk_bytes'])}")
+        print(f"🧠 Peak memory: {gb(estimate['peak_memory_bytes'])} = weights {gb(estimate['weights_bytes'])}"
+              f" + KV cache {gb(estimate['kv_cache_bytes'])} (num_ctx {estimate['num_ctx']} x"
+              f" {estimate['num_parallel']}) + compute {gb(estimate['compute_bytes'])}")
+        for problem in problems:
+            print(f"❌ {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
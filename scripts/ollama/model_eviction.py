@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Ollama Storage Manager
+Keeps the model volume below a high-water mark by deleting the least
+valuable models, using per-model usage scraped from the metrics exporter
+
+- Usage: request counts and last-used times come from the exporter's
+  ollama_requests_total counters (and /api/ps for loaded models), kept in
+  a state file so history survives restarts
+- Policy: lru (oldest last use first) or lfu (fewest requests first)
+- Pinned models, models declared in ollama.models and loaded models are
+  never evicted
+- Outside business hours usage is brought down to --offhours-target, so
+  daytime pulls find room without waiting on eviction; during business
+  hours crossing --high-water evicts immediately down to --low-water
+
+No external dependencies required.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from ollama_proxy import Upstream, UpstreamError
+from model_sync import normalize, human_bytes, parse_size
+
+SAMPLE = re.compile(r'^(?P<name>\w+)\{(?P<labels>[^}]*)\}\s+(?P<value>[0-9.eE+-]+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def scrape_counts(text: str, metric: str = "ollama_requests_total") -> Dict[str, float]:
+    """A per-model counter from exporter metrics, summed over its other labels (requests by default)"""
+    counts: Dict[str, float] = {}
+    for line in text.splitlines():
+        match = SAMPLE.match(line.strip())
+        if not match or match.group("name") != metric:
+            continue
+        labels = dict(LABEL.findall(match.group("labels")))
+        model = labels.get("model")
+        if model:
+            model = normalize(model)
+            counts[model] = counts.get(model, 0.0) + float(match.group("value"))
+    return counts
+
+
+class BusinessHours:
+    """Weekly window such as 'Mon-Fri 08:00-18:00'"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        days, _, hours = spec.strip().rpartition(" ")
+        if days:
+            first, _, last = days.lower().partition("-")
+            start, end = DAYS.index(first[:3]), DAYS.index((last or first)[:3])
+            self.days = set(range(start, end + 1)) if start <= end else set(range(start, 7)) | set(range(0, end + 1))
+        else:
+            self.days = set(range(7))
+        opens, _, closes = hours.partition("-")
+        self.opens = tuple(int(part) for part in opens.split(":"))
+        self.closes = tuple(int(part) for part in closes.split(":"))
+
+    def __contains__(self, moment: datetime) -> bool:
+        return moment.weekday() in self.days and self.opens <= (moment.hour, moment.minute) < self.closes
+
+
+class UsageTracker:
+    """Per-model request counts and last-used times, persisted as JSON"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.models: Dict[str, Dict[str, float]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.models = json.load(f).get("models", {})
+            except (OSError, ValueError):
+                self.models = {}
+
+    def entry(self, name: str, now: float) -> Dict[str, float]:
+        # Models first seen count as used now, so fresh pulls are not evicted straight away
+        return self.models.setdefault(name, {"count": 0, "last_used": now, "counter": 0})
+
+    def update(self, counters: Dict[str, float], loaded: List[str], now: float):
+        for name, value in counters.items():
+            entry = self.entry(name, now)
+            # A smaller counter means the exporter restarted
+            delta = value - entry["counter"] if value >= entry["counter"] else value
+            if delta > 0:
+                entry["count"] += delta
+                entry["last_used"] = now
+            entry["counter"] = value
+        for name in loaded:
+            self.entry(name, now)["last_used"] = now
+
+    def forget(self, name: str):
+        self.models.pop(name, None)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "models": self.models}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class StorageManager:
+    """Watermark-driven eviction of installed models"""
+
+    def __init__(self, upstream: Upstream, tracker: UsageTracker, metrics_url: Optional[str] = None,
+                 disk_path: Optional[str] = None, capacity: int = 0, high_water: float = 0.85,
+                 low_water: float = 0.75, offhours_target: Optional[float] = None,
+                 business_hours: Optional[BusinessHours] = None, policy: str = "lru",
+                 pinned: Optional[List[str]] = None, dry_run: bool = False):
+        self.upstream = upstream
+        self.tracker = tracker
+        self.metrics_url = metrics_url
+        self.disk_path = disk_path
+        self.capacity = capacity
+        self.high_water = high_water
+        self.low_water = low_water
+        self.offhours_target = offhours_target
+        self.business_hours = business_hours
+        self.policy = policy
+        self.pinned = {normalize(name) for name in pinned or []}
+        self.dry_run = dry_run
+
+    def installed(self) -> Dict[str, int]:
+        models = self.upstream.json("GET", "/api/tags").get("models") or []
+        return {normalize(m.get("name") or m.get("model", "")): m.get("size", 0) for m in models}
+
+    def loaded(self) -> List[str]:
+        models = self.upstream.json("GET", "/api/ps").get("models") or []
+        return [normalize(m.get("name") or m.get("model", "")) for m in models]
+
+    def refresh_usage(self, now: float) -> List[str]:
+        """Fold the latest exporter counters and loaded models into the tracker; returns loaded models"""
+        counters = {}
+        if self.metrics_url:
+            try:
+                with urllib.request.urlopen(self.metrics_url, timeout=10) as response:
+                    counters = scrape_counts(response.read().decode("utf-8", "replace"))
+            except (urllib.error.URLError, OSError):
+                counters = {}
+        loaded = self.loaded()
+        self.tracker.update(counters, loaded, now)
+        return loaded
+
+    def usage(self, installed: Dict[str, int]) -> Tuple[int, int]:
+        """(used, total) bytes: the model blobs (else the /api/tags sizes) against --capacity"""
+        # Not the filesystem's usage: hostpath volumes share it with unrelated data, which must not evict models
+        blobs = os.path.join(self.disk_path, "models", "blobs") if self.disk_path else ""
+        if blobs and os.path.isdir(blobs):
+            used = sum(entry.stat().st_size for entry in os.scandir(blobs) if entry.is_file())
+        else:
+            used = sum(installed.values())
+        total = self.capacity
+        if not total and self.disk_path and os.path.exists(self.disk_path):
+            total = shutil.disk_usage(self.disk_path).total
+        return used, total
+
+    def target(self, used: int, total: int, moment: datetime) -> Optional[float]:
+        """Fraction to evict down to, or None when no eviction is due"""
+        if not total:
+            return None
+        fraction = used / total
+        if self.business_hours and moment not in self.business_hours and self.offhours_target is not None:
+            return self.offhours_target if fraction > self.offhours_target else None
+        return self.low_water if fraction > self.high_water else None
+
+    def candidates(self, installed: Dict[str, int], loaded: List[str], now: float) -> List[str]:
+        """Evictable models, least valuable first"""
+        names = [name for name in installed if name not in self.pinned and name not in loaded]
+
+        def key(name: str):
+            entry = self.tracker.entry(name, now)
+            if self.policy == "lfu":
+                return entry["count"], entry["last_used"]
+            return entry["last_used"], entry["count"]
+        return sorted(names, key=key)
+
+    def run_once(self, moment: Optional[datetime] = None, reserve: int = 0) -> List[Dict[str, Any]]:
+        """Evict until usage (plus `reserve` bytes for an incoming pull) is under the target"""
+        moment = moment or datetime.now()
+        now = moment.timestamp()
+        loaded = self.refresh_usage(now)
+        installed = self.installed()
+        used, total = self.usage(installed)
+        target = self.target(used + reserve, total, moment)
+        if reserve and target is None and total and used + reserve > total * self.high_water:
+            target = self.low_water
+        evicted = []
+        if target is not None:
+            goal = int(total * target) - reserve
+            for name in self.candidates(installed, loaded, now):
+                if used <= goal:
+                    break
+                entry = self.tracker.entry(name, now)
+                record = {"model": name, "size": installed[name], "count": entry["count"],
+                          "last_used": datetime.fromtimestamp(entry["last_used"]).isoformat(timespec="seconds")}
+                if not self.dry_run:
+                    try:
+                        self.upstream.json("DELETE", "/api/delete", {"model": name})
+                    except UpstreamError as e:
+                        record["error"] = str(e)
+                        evicted.append(record)
+                        continue
+                    self.tracker.forget(name)
+                    del installed[name]
+                    # Shared blobs stay behind, so measure rather than assume the model's size was freed
+                    used = self.usage(installed)[0] if self.disk_path else used - record["size"]
+                else:
+                    used -= record["size"]
+                evicted.append(record)
+        self.tracker.save()
+        return evicted
+
+
+def declared_models(spec_path: Optional[str]) -> List[str]:
+    """Models listed in the reconciler spec (the chart's ollama-models ConfigMap), pinned by default"""
+    if not spec_path or not os.path.exists(spec_path):
+        return []
+    with open(spec_path, "r", encoding="utf-8") as f:
+        block = json.load(f)
+    names = []
+    for entry in block.get("list") or []:
+        if isinstance(entry, str):
+            names.append(entry)
+        else:
+            names.extend(filter(None, [entry.get("name"), entry.get("from")]))
+    return names
+
+
+def main():
+    """Evict models when the model volume crosses its high-water mark"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Watermark-based model eviction for Ollama')
+    parser.add_argument('command', nargs='?', choices=['run', 'once', 'plan'], default='plan',
+                        help="'run' loops, 'once' evicts once, 'plan' shows what would be evicted")
+    parser.add_argument('--url', default=os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434"),
+                        help='Ollama API URL (default: OLLAMA_URL or http://127.0.0.1:11434)')
+    parser.add_argument('--metrics-url', default=os.environ.get("EXPORTER_METRICS_URL", "http://127.0.0.1:11435/metrics"),
+                        help='Metrics exporter endpoint for request counts')
+    parser.add_argument('--path', default=os.environ.get("OLLAMA_MODELS_PATH", "/root/.ollama"),
+                        help='Ollama data directory whose models/blobs are measured (default: /root/.ollama)')
+    parser.add_argument('--capacity', default='0',
+                        help='Space the models may use, e.g. the volume size 1Ti (default: size of the filesystem)')
+    parser.add_argument('--high-water', type=float, default=0.85, help='Evict above this fraction (default: 0.85)')
+    parser.add_argument('--low-water', type=float, default=0.75, help='Evict down to this fraction (default: 0.75)')
+    parser.add_argument('--business-hours', help="Window such as 'Mon-Fri 08:00-18:00'")
+    parser.add_argument('--offhours-target', type=float,
+                        help='Outside business hours, evict down to this fraction to leave daytime headroom')
+    parser.add_argument('--policy', choices=['lru', 'lfu'], default='lru', help='Eviction order (default: lru)')
+    parser.add_argument('--pin', action='append', default=[], help='Model that is never evicted (repeatable)')
+    parser.add_argument('--models-spec', help='Reconciler spec whose declared models are pinned')
+    parser.add_argument('--reserve', default='0', help='Also make room for this many bytes (e.g. 20G)')
+    parser.add_argument('--state', default=os.environ.get("STORAGE_MANAGER_STATE",
+                                                         os.path.expanduser("~/.cache/ollama-stack/usage.json")),
+                        help='Usage history file')
+    parser.add_argument('--interval', type=float, default=300.0, help="Seconds between checks for 'run'")
+    parser.add_argument('--json', action='store_true', help='Print evictions as JSON')
+    args = parser.parse_args()
+
+
+    manager = StorageManager(
+        Upstream(args.url, timeout=60), UsageTracker(args.state), args.metrics_url, args.path,
+        parse_size(args.capacity), args.high_water, args.low_water, args.offhours_target,
+        BusinessHours(args.business_hours) if args.business_hours else None, args.policy,
+        args.pin + declared_models(args.models_spec), dry_run=args.command == 'plan')
+
+    def report(evicted: List[Dict[str, Any]]):
+        if args.json:
+            print(json.dumps(evicted, indent=2), flush=True)
+            return
+        verb = "would evict" if manager.dry_run else "evicted"
+        for record in evicted:
+            if record.get("error"):
+                print(f"❌ {record['model']}: {record['error']}", flush=True)
+            else:
+                print(f"🗑️  {verb} {record['model']} ({human_bytes(record['size'])}, {int(record['count'])} requests,"
+                      f" last used {record['last_used']})", flush=True)
+
+    try:
+        if args.command != 'run':
+            evicted = manager.run_once(reserve=parse_size(args.reserve))
+            installed = manager.installed()
+            used, total = manager.usage(installed)
+            if not args.json:
+                share = f" ({100 * used / total:.0f}%)" if total else ""
+                print(f"💾 {human_bytes(used)} of {human_bytes(total)} used{share}, {len(installed)} models")
+                if not evicted:
+                    print("✅ Below the high-water mark; nothing to evict")
+            report(evicted)
+            return
+        print(f"🧹 Storage manager watching {args.path} every {args.interval:.0f}s ({args.policy})", flush=True)
+        while True:
+            try:
+                report(manager.run_once())
+            except (UpstreamError, ValueError, OSError) as e:
+                # Includes an unwritable state file: keep running and say so rather than crashloop
+                print(f"⚠️  {e}", flush=True)
+            time.sleep(args.interval)
+    except (UpstreamError, ValueError) as e:
+        print(f"❌ Could not reach Ollama at {args.url}: {e}")
+        sys.exit(1)
+    except OSError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n👋 Stopping storage manager")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Ollama Model Reconciler
+Makes the installed models match the declarative list in the chart's
+values.yaml (`ollama.models`)
+
+    ollama:
+      models:
+        prune: false            # remove installed models that are not listed
+        list:
+          - name: codellama:13b
+          - name: coder           # extra tag for another model (re-tag)
+            from: deepseek-coder:33b
+
+The installed set is read with a single /api/tags call and diffed against
+the list; only the differences are pulled, copied or deleted, in parallel.
+When nothing differs the run ends after that one call.
+PyYAML is needed only to read values files; JSON specs work without it.
+"""
+
+import os
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+from ollama_proxy import Upstream, UpstreamError
+from model_sync import DEFAULT_STATE, ModelSync, SyncState, normalize
+
+DEFAULT_VALUES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "..", "..", "charts", "ollama-stack", "values.yaml")
+
+
+class ModelSpec:
+    """One declared model: pulled by name, or a tag copied from another model"""
+
+    def __init__(self, name: str, source: Optional[str] = None):
+        self.name = normalize(name)
+        self.source = normalize(source) if source else None
+
+    def __repr__(self) -> str:
+        return f"ModelSpec({self.name!r}, source={self.source!r})"
+
+
+class Plan:
+    """The changes that bring the installed set to the declared one"""
+
+    def __init__(self):
+        self.pull: List[str] = []
+        self.copy: List[Tuple[str, str]] = []  # (source, destination)
+        self.remove: List[str] = []
+
+    def empty(self) -> bool:
+        return not (self.pull or self.copy or self.remove)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"pull": self.pull, "copy": [{"from": s, "to": d} for s, d in self.copy], "remove": self.remove}
+
+
+def _merge(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """Deep merge like helm's -f layering; lists are replaced, not appended"""
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_values(paths: List[str]) -> Dict[str, Any]:
+    """The `ollama.models` block from layered values files (YAML or JSON)"""
+    values: Dict[str, Any] = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        if path.endswith(".json"):
+            data = json.loads(text)
+        else:
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("❌ PyYAML is required to read values files (pip install pyyaml), "
+                                 "or pass a JSON spec with --spec")
+            data = yaml.safe_load(text) or {}
+        values = _merge(values, data)
+    return (values.get("ollama") or {}).get("models") or {}
+
+
+def parse_models(block: Dict[str, Any]) -> List[ModelSpec]:
+    specs = []
+    for entry in block.get("list") or []:
+        if isinstance(entry, str):
+            specs.append(ModelSpec(entry))
+        elif entry.get("name"):
+            specs.append(ModelSpec(entry["name"], entry.get("from")))
+    return specs
+
+
+def make_plan(specs: List[ModelSpec], installed: Dict[str, Dict[str, Any]], prune: bool = False) -> Plan:
+    """Diff the declared models against the installed ones (name -> /api/tags entry)"""
+    plan = Plan()
+    wanted = set()
+    for spec in specs:
+        wanted.add(spec.name)
+        source = spec.source or spec.name
+        wanted.add(source)
+        if source not in installed and source not in plan.pull:
+            plan.pull.append(source)
+        if spec.source:
+            current = installed.get(spec.name, {}).get("digest")
+            # A tag pointing at an older digest of its source is re-tagged too
+            if source in plan.pull or current != installed[source].get("digest"):
+                plan.copy.append((source, spec.name))
+    if prune:
+        plan.remove = sorted(name for name in installed if name not in wanted)
+    return plan
+
+
+class Reconciler:
+    """Applies plans against one Ollama server"""
+
+    def __init__(self, upstream: Upstream, sync: ModelSync, concurrency: int = 4):
+        self.upstream = upstream
+        self.sync = sync
+        self.concurrency = max(1, concurrency)
+
+    def installed(self, wait: float = 0.0) -> Dict[str, Dict[str, Any]]:
+        """One /api/tags call; with wait, retried until Ollama answers or the wait runs out"""
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                return self.sync.installed()
+            except (UpstreamError, ValueError):
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(2)
+
+    def apply(self, plan: Plan, installed: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """Run the plan; returns an outcome ('ok' or an error) per action"""
+        outcomes: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            # Deletions and pulls are independent; copies wait for their source
+            removals = {name: pool.submit(self._delete, name) for name in plan.remove}
+            if plan.pull:
+                for name, progress in self.sync.sync(plan.pull, installed=installed).items():
+                    outcomes[f"pull {name}"] = "ok" if progress.status in ("done", "present") else progress.error
+            copies = {f"copy {src} -> {dst}": pool.submit(self._copy, src, dst) for src, dst in plan.copy
+                      if outcomes.get(f"pull {src}", "ok") == "ok"}
+            for key, future in list(removals.items()) + list(copies.items()):
+                label = key if key.startswith("copy") else f"remove {key}"
+                try:
+                    future.result()
+                    outcomes[label] = "ok"
+                except (UpstreamError, ValueError) as e:
+                    outcomes[label] = str(e)
+        return outcomes
+
+    def _delete(self, name: str):
+        self.upstream.json("DELETE", "/api/delete", {"model": name})
+
+    def _copy(self, source: str, destination: str):
+        self.upstream.json("POST", "/api/copy", {"source": source, "destination": destination})
+
+
+def main():
+    """Reconcile installed Ollama models with the declared list"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reconcile Ollama models with ollama.models in values.yaml')
+    parser.add_argument('-f', '--values', action='append',
+                        help='Values file, repeatable and layered like helm -f (default: chart values.yaml)')
+    parser.add_argument('--spec', help='JSON models block ({"prune": ..., "list": [...]}) instead of values files')
+    parser.add_argument('--url', default=os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434"),
+                        help='Ollama API URL (default: OLLAMA_URL or http://127.0.0.1:11434)')
+    parser.add_argument('--prune', action='store_true', default=None, help='Remove models that are not declared')
+    parser.add_argument('--concurrency', '-j', type=int, help='Parallel operations (default: from values or 2)')
+    parser.add_argument('--registry', default=os.environ.get("OLLAMA_REGISTRY_MIRROR"),
+                        help='Pull through this registry mirror, e.g. ollama-blob-cache:5000 (blob_cache.py)')
+    parser.add_argument('--wait', type=float, default=0.0, help='Seconds to wait for Ollama to become reachable')
+    parser.add_argument('--state', default=DEFAULT_STATE, help=f'Pull progress file (default: {DEFAULT_STATE})')
+    parser.add_argument('--dry-run', action='store_true', help='Print the plan without applying it')
+    parser.add_argument('--json', action='store_true', help='Print plan and outcomes as JSON')
+    args = parser.parse_args()
+
+    if args.spec:
+        with open(args.spec, "r", encoding="utf-8") as f:
+            block = json.load(f)
+    else:
+        block = load_values(args.values or [DEFAULT_VALUES])
+    specs = parse_models(block)
+    prune = block.get("prune", False) if args.prune is None else args.prune
+    concurrency = args.concurrency or block.get("concurrency") or 2
+
+    upstream = Upstream(args.url, timeout=120)
+    sync = ModelSync(upstream, SyncState(args.state, upstream.url), concurrency, quiet=args.json,
+                     registry=args.registry)
+    reconciler = Reconciler(upstream, sync, concurrency)
+    try:
+        installed = reconciler.installed(args.wait)
+    except (UpstreamError, ValueError) as e:
+        print(f"❌ Could not reach Ollama at {upstream.url}: {e}")
+        sys.exit(1)
+
+    plan = make_plan(specs, installed, prune)
+    if plan.empty() or args.dry_run:
+        if args.json:
+            print(json.dumps({"plan": plan.to_dict(), "applied": False}, indent=2))
+        elif plan.empty():
+            print(f"✅ {len(specs)} declared model(s) already in sync")
+        else:
+            for name in plan.pull:
+                print(f"📥 pull {name}")
+            for source, destination in plan.copy:
+                print(f"🏷️  copy {source} -> {destination}")
+            for name in plan.remove:
+                print(f"🗑️  remove {name}")
+        return
+
+    outcomes = reconciler.apply(plan, installed)
+    failed = {action: outcome for action, outcome in outcomes.items() if outcome != "ok"}
+    if args.json:
+        print(json.dumps({"plan": plan.to_dict(), "applied": True, "outcomes": outcomes}, indent=2))
+    else:
+        for action, outcome in outcomes.items():
+            print(f"{'✅' if outcome == 'ok' else '❌'} {action}" + ("" if outcome == "ok" else f": {outcome}"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
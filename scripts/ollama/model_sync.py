@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Ollama Model Sync
+Pulls several models concurrently through the Ollama API with a
+concurrency cap, persisting progress between runs
+
+- Models already installed (one /api/tags call) are skipped
+- Interrupted pulls are retried; Ollama keeps partial blobs, so a rerun
+  resumes them instead of starting over
+- Progress is saved to a state file after every update (at most once a
+  second), and aggregate throughput is reported while pulling
+- With --start-below-mbps a further pull is started only while aggregate
+  throughput is below the threshold. Ollama downloads the bytes itself and
+  only reports progress here, so running pulls are not slowed down
+
+No external dependencies required.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+
+from ollama_proxy import Upstream, UpstreamError
+
+DEFAULT_STATE = os.path.expanduser("~/.cache/ollama-stack/model-sync.json")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def normalize(name: str) -> str:
+    """Model reference with an explicit tag, as /api/tags reports it"""
+    return name if ":" in name.rsplit("/", 1)[-1] else f"{name}:latest"
+
+
+class ModelDigests:
+    """Installed model digests from /api/tags, refreshed at most every ttl seconds"""
+
+    def __init__(self, upstream: Upstream, ttl: float = 30.0):
+        self.upstream = upstream
+        self.ttl = ttl
+        self.digests: Dict[str, str] = {}
+        self.fetched_at = float("-inf")
+        self.lock = threading.Lock()
+
+    def get(self, model: str) -> str:
+        """Digest of an installed model, or '' when it is unknown or Ollama cannot be reached"""
+        with self.lock:
+            if time.monotonic() - self.fetched_at > self.ttl:
+                try:
+                    models = self.upstream.json("GET", "/api/tags").get("models") or []
+                    self.digests = {normalize(m.get("name") or m.get("model", "")): m.get("digest", "")
+                                    for m in models}
+                    self.fetched_at = time.monotonic()
+                except (UpstreamError, ValueError):
+                    pass
+            return self.digests.get(normalize(model), "")
+
+
+def human_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(size) < 1024 or unit == "TB":
+            return f"{size:.1f}{unit}" if unit != "B" else f"{int(size)}B"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+def parse_size(text: str) -> int:
+    """Bytes from Kubernetes-style sizes (64Gi, 500G) or plain numbers"""
+    units = {"k": 1e3, "m": 1e6, "g": 1e9, "t": 1e12, "ki": 2 ** 10, "mi": 2 ** 20, "gi": 2 ** 30, "ti": 2 ** 40}
+    match = re.match(r"^\s*([\d.]+)\s*([a-zA-Z]*)\s*$", text)
+    unit = match.group(2).lower().rstrip("b") if match else ""
+    if not match or (unit and unit not in units):
+        raise ValueError(f"invalid size: {text}")
+    return int(float(match.group(1)) * units.get(unit, 1))
+
+
+class PullProgress:
+    """Progress of one model pull, kept across runs"""
+
+    def __init__(self, name: str, status: str = "pending"):
+        self.name = name
+        self.status = status  # pending, pulling, done, present, failed
+        self.layers: Dict[str, List[int]] = {}  # digest -> [completed, total]
+        self.attempts = 0
+        self.error = ""
+        self.updated_at = _now()
+
+    @property
+    def completed(self) -> int:
+        return sum(layer[0] for layer in list(self.layers.values()))
+
+    @property
+    def total(self) -> int:
+        return sum(layer[1] for layer in list(self.layers.values()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"status": self.status, "layers": {digest: list(layer) for digest, layer in self.layers.items()},
+                "attempts": self.attempts,
+                "error": self.error, "updated_at": self.updated_at}
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "PullProgress":
+        progress = cls(name, data.get("status", "pending"))
+        progress.layers = {digest: list(layer) for digest, layer in data.get("layers", {}).items()}
+        progress.attempts = data.get("attempts", 0)
+        progress.error = data.get("error", "")
+        progress.updated_at = data.get("updated_at", progress.updated_at)
+        return progress
+
+
+class SyncState:
+    """Per-model progress persisted as JSON, written atomically"""
+
+    def __init__(self, path: Optional[str], url: str):
+        self.path = path
+        self.url = url
+        self.lock = threading.Lock()
+        self.models: Dict[str, PullProgress] = {}
+        self._saved_at = 0.0
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            # Progress recorded against another server says nothing about this one
+            if data.get("url") == url:
+                self.models = {name: PullProgress.from_dict(name, entry)
+                               for name, entry in data.get("models", {}).items()}
+
+    def get(self, name: str) -> PullProgress:
+        with self.lock:
+            if name not in self.models:
+                self.models[name] = PullProgress(name)
+            return self.models[name]
+
+    def save(self, force: bool = False):
+        if not self.path or (not force and time.monotonic() - self._saved_at < 1.0):
+            return
+        with self.lock:
+            data = {"url": self.url, "saved_at": _now(),
+                    "models": {name: progress.to_dict() for name, progress in self.models.items()}}
+            self._saved_at = time.monotonic()
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+class ModelSync:
+    """Concurrent, capped, resumable pulls against one Ollama server"""
+
+    def __init__(self, upstream: Upstream, state: SyncState, concurrency: int = 2,
+                 start_below_bytes_per_sec: float = 0.0, retries: int = 3, quiet: bool = False,
+                 registry: Optional[str] = None):
+        self.upstream = upstream
+        self.registry = registry.rstrip("/") if registry else None
+        self.state = state
+        self.concurrency = max(1, concurrency)
+        self.start_below_bytes_per_sec = start_below_bytes_per_sec
+        self.retries = retries
+        self.quiet = quiet
+        self.downloaded = 0  # bytes transferred in this run (not counting resumed data)
+        self.samples: deque = deque(maxlen=64)
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def log(self, message: str):
+        if not self.quiet:
+            print(message, flush=True)
+
+    def installed(self) -> Dict[str, Dict[str, Any]]:
+        """Installed models by name, from a single /api/tags call"""
+        models = self.upstream.json("GET", "/api/tags").get("models") or []
+        return {normalize(model.get("name") or model.get("model", "")): model for model in models}
+
+    # --- throughput ----------------------------------------------------
+
+    def _count(self, amount: int):
+        with self.lock:
+            self.downloaded += amount
+            self.samples.append((time.monotonic(), self.downloaded))
+
+    def throughput(self, window: float = 5.0) -> float:
+        """Aggregate bytes/second over the last few seconds"""
+        with self.lock:
+            now = time.monotonic()
+            recent = [(t, total) for t, total in self.samples if now - t <= window]
+            if len(recent) < 2:
+                return 0.0
+            span = max(now - recent[0][0], 0.5)
+            return (recent[-1][1] - recent[0][1]) / span
+
+    def average_throughput(self) -> float:
+        return self.downloaded / max(time.monotonic() - self.started, 1e-6)
+
+    # --- pulling -------------------------------------------------------
+
+    def pull(self, name: str) -> PullProgress:
+        """Pull one model, retrying interrupted transfers with jittered backoff"""
+        progress = self.state.get(name)
+        while True:
+            progress.status = "pulling"
+            progress.attempts += 1
+            self.state.save()
+            try:
+                self._stream_pull(progress)
+                progress.status, progress.error = "done", ""
+                break
+            except (UpstreamError, OSError, ValueError) as e:
+                progress.error = str(e)
+                if progress.attempts >= self.retries:
+                    progress.status = "failed"
+                    break
+                self.log(f"⚠️  {name}: {e}; retrying")
+                time.sleep(random.uniform(0, min(30.0, 2 ** progress.attempts)))
+        progress.updated_at = _now()
+        self.state.save(force=True)
+        return progress
+
+    def via_registry(self, name: str) -> str:
+        """The reference to pull from the registry mirror (blob_cache.py) for a model"""
+        repository = name if "/" in name else f"library/{name}"
+        return f"{self.registry}/{repository}"
+
+    def _stream_pull(self, progress: PullProgress):
+        seen = set()
+        source = self.via_registry(progress.name) if self.registry else progress.name
+        payload = {"model": source, "stream": True, "insecure": bool(self.registry)}
+        succeeded = False
+        for event in self.upstream.stream("POST", "/api/pull", payload):
+            if event.get("error"):
+                raise UpstreamError(event["error"])
+            digest = event.get("digest")
+            if digest and event.get("total"):
+                completed = event.get("completed") or 0
+                # Under the state lock: save() serializes every model's layers from other pull threads
+                with self.state.lock:
+                    layer = progress.layers.setdefault(digest, [0, event["total"]])
+                    if digest not in seen:
+                        # First report of a layer in this attempt: bytes already on disk were resumed, not downloaded
+                        seen.add(digest)
+                        downloaded = None
+                        layer[0] = completed
+                    else:
+                        downloaded = max(0, completed - layer[0])
+                        layer[0] = max(layer[0], completed)
+                    layer[1] = event["total"]
+                    progress.updated_at = _now()
+                if downloaded is not None:
+                    self._count(downloaded)
+                self.state.save()
+            if event.get("status") == "success":
+                succeeded = True
+        if not succeeded:
+            raise UpstreamError(f"pull of {progress.name} ended before success")
+        if self.registry:
+            # Keep only the plain name; the blobs are shared, so this copies nothing
+            self.upstream.json("POST", "/api/copy", {"source": source, "destination": progress.name})
+            self.upstream.json("DELETE", "/api/delete", {"model": source})
+
+    def _admit(self, active: List[threading.Thread]):
+        """Wait until a slot is free and, with a throughput threshold, until throughput is below it"""
+        while True:
+            active[:] = [t for t in active if t.is_alive()]
+            if len(active) < self.concurrency and not (
+                    active and self.start_below_bytes_per_sec
+                    and self.throughput() >= self.start_below_bytes_per_sec):
+                return
+            time.sleep(0.2)
+
+    def sync(self, models: List[str], report_interval: float = 5.0,
+             installed: Optional[Dict[str, Any]] = None) -> Dict[str, PullProgress]:
+        """Pull every missing model; returns the progress of each requested model"""
+        installed = self.installed() if installed is None else installed
+        results: Dict[str, PullProgress] = {}
+        queue = []
+        for name in (normalize(m) for m in models):
+            progress = self.state.get(name)
+            if name in installed:
+                progress.status = "present"
+                progress.error = ""
+            else:
+                if progress.status in ("present", "done"):
+                    # Removed since the last run: nothing of it is left to resume
+                    progress.layers = {}
+                progress.status, progress.attempts = "pending", 0
+                queue.append(name)
+            results[name] = progress
+        self.state.save(force=True)
+
+        skipped = len(results) - len(queue)
+        if skipped:
+            self.log(f"⏭️  Skipping {skipped} model(s) already present")
+        if not queue:
+            return results
+
+        self.started = time.monotonic()
+        active: List[threading.Thread] = []
+        reporter_stop = threading.Event()
+        reporter = threading.Thread(target=self._report_loop, args=(queue, report_interval, reporter_stop),
+                                    name="sync-report", daemon=True)
+        reporter.start()
+        for name in queue:
+            self._admit(active)
+            resumed = results[name].completed
+            self.log(f"📥 Pulling {name}" + (f" (resuming {human_bytes(resumed)})" if resumed else ""))
+            thread = threading.Thread(target=self.pull, args=(name,), name=f"pull-{name}", daemon=True)
+            thread.start()
+            active.append(thread)
+        for thread in active:
+            thread.join()
+        reporter_stop.set()
+        reporter.join()
+        return results
+
+    def _report_loop(self, names: List[str], interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            parts = []
+            for name in names:
+                progress = self.state.get(name)
+                if progress.status == "pulling" and progress.total:
+                    parts.append(f"{name} {100 * progress.completed / progress.total:.0f}%")
+            if parts:
+                self.log(f"📊 {human_bytes(self.throughput())}/s | " + ", ".join(parts))
+
+
+def print_summary(results: Dict[str, PullProgress], sync: ModelSync):
+    icons = {"done": "✅", "present": "⏭️ ", "failed": "❌", "pending": "⏸️ ", "pulling": "⏳"}
+    print("")
+    for name, progress in results.items():
+        size = f" ({human_bytes(progress.total)})" if progress.total else ""
+        error = f": {progress.error}" if progress.status == "failed" else ""
+        print(f"{icons.get(progress.status, '•')} {name}{size} {progress.status}{error}")
+    if not any(p.status in ("done", "failed") for p in results.values()):
+        return
+    elapsed = time.monotonic() - sync.started
+    print(f"📈 Downloaded {human_bytes(sync.downloaded)} in {elapsed:.0f}s "
+          f"({human_bytes(sync.average_throughput())}/s aggregate)")
+
+
+def main():
+    """Sync a list of models to an Ollama server"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Concurrent, resumable model pulls for Ollama')
+    parser.add_argument('models', nargs='+', help='Models to install (e.g. codellama:13b)')
+    parser.add_argument('--url', default=os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434"),
+                        help='Ollama API URL (default: OLLAMA_URL or http://127.0.0.1:11434)')
+    parser.add_argument('--concurrency', '-j', type=int, default=2, help='Simultaneous pulls (default: 2)')
+    parser.add_argument('--start-below-mbps', type=float, default=0.0,
+                        help='Start further pulls only while aggregate MB/s is below this; running pulls are '
+                             'not throttled (default: no threshold)')
+    parser.add_argument('--retries', type=int, default=3, help='Attempts per model (default: 3)')
+    parser.add_argument('--registry', default=os.environ.get("OLLAMA_REGISTRY_MIRROR"),
+                        help='Pull through this registry mirror, e.g. ollama-blob-cache:5000 (blob_cache.py)')
+    parser.add_argument('--state', default=DEFAULT_STATE, help=f'Progress file (default: {DEFAULT_STATE})')
+    parser.add_argument('--report-interval', type=float, default=5.0, help='Seconds between progress lines')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    upstream = Upstream(args.url, timeout=120)
+    state = SyncState(args.state, upstream.url)
+    sync = ModelSync(upstream, state, args.concurrency, args.start_below_mbps * 1e6, args.retries, quiet=args.json,
+                     registry=args.registry)
+    try:
+        results = sync.sync(args.models, args.report_interval)
+    except (UpstreamError, ValueError) as e:
+        print(f"❌ Could not reach Ollama at {upstream.url}: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        state.save(force=True)
+        print(f"\n⏸️  Interrupted; progress saved to {args.state}")
+        sys.exit(130)
+
+    if args.json:
+        print(json.dumps({"downloaded_bytes": sync.downloaded,
+                          "bytes_per_second": sync.average_throughput(),
+                          "models": {name: p.to_dict() for name, p in results.items()}}, indent=2))
+    else:
+        print_summary(results, sync)
+    sys.exit(1 if any(p.status == "failed" for p in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Ollama Proxy Base
+Shared pieces for the services that sit in front of the Ollama API
+(metrics exporter, router, caches, gateway)
+
+- Upstream: keep-alive HTTP connections to one Ollama instance, one per thread
+- ProxyHandler: forwards requests, streaming responses through unchanged,
+  with hooks for serving some routes locally and observing streamed output
+- StreamObserver: splits a streamed NDJSON response into documents, and
+  queue_wait reads the slot wait off the final one
+
+No external dependencies required.
+"""
+
+import json
+import time
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te",
+              "trailer", "trailers", "transfer-encoding", "upgrade"}
+
+
+class UpstreamError(Exception):
+    """Raised when the upstream cannot be reached or answers with an error"""
+
+
+class Upstream:
+    """One Ollama instance, reached over per-thread keep-alive connections"""
+
+    def __init__(self, url: str, timeout: float = 600.0):
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        self.url = f"{parts.scheme}://{parts.netloc}"
+        self.scheme = parts.scheme
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def _reset(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def request(self, method: str, path: str, body: bytes = b"",
+                headers: Optional[Dict[str, str]] = None) -> http.client.HTTPResponse:
+        """Send a request and return the unread response; the caller must read it to the end"""
+        headers = dict(headers or {})
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body or None, headers=headers)
+                return conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                # Stale keep-alive connection; retry once on a fresh one
+                self._reset()
+                if attempt == 2:
+                    raise UpstreamError(f"{self.url}{path}: {e}") from e
+            except OSError as e:
+                self._reset()
+                raise UpstreamError(f"{self.url}{path}: {e}") from e
+
+    def call(self, method: str, path: str, payload: Any = None) -> Tuple[int, bytes]:
+        """Request with an optional JSON payload; returns (status, body)"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        response = self.request(method, path, body, headers)
+        try:
+            return response.status, response.read()
+        except OSError as e:
+            self._reset()
+            raise UpstreamError(f"{self.url}{path}: {e}") from e
+
+    def json(self, method: str, path: str, payload: Any = None) -> Any:
+        """JSON request that raises UpstreamError on an error status"""
+        status, body = self.call(method, path, payload)
+        if status >= 400:
+            raise UpstreamError(f"{method} {path} returned {status}: {body[:200].decode('utf-8', 'replace')}")
+        return json.loads(body) if body else {}
+
+    def stream(self, method: str, path: str, payload: Any = None):
+        """Yield the NDJSON documents of a streamed response"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        response = self.request(method, path, body, {"Content-Type": "application/json"})
+        if response.status >= 400:
+            error = response.read()
+            raise UpstreamError(f"{method} {path} returned {response.status}: {error[:200].decode('utf-8', 'replace')}")
+        observer = StreamObserver()
+        finished = False
+        try:
+            while True:
+                piece = response.read1(65536)
+                if not piece:
+                    break
+                yield from observer.feed(piece)
+            yield from observer.flush()
+            finished = True
+        finally:
+            if not finished:
+                # Abandoned mid-stream: the connection cannot be reused
+                self._reset()
+
+
+class StreamObserver:
+    """Splits NDJSON bytes into documents as they arrive; keeps the raw pieces when recording"""
+
+    def __init__(self, record: bool = False):
+        self.buffer = b""
+        self.pieces: Optional[List[bytes]] = [] if record else None
+        self.content_type = ""
+        self.started = time.perf_counter()
+        self.first_chunk_at: Optional[float] = None
+        self.last: Optional[Dict[str, Any]] = None
+        self.documents = 0
+
+    def feed(self, piece: bytes) -> List[Dict[str, Any]]:
+        if self.first_chunk_at is None and piece:
+            self.first_chunk_at = time.perf_counter()
+        if self.pieces is not None and piece:
+            self.pieces.append(piece)
+        self.buffer += piece
+        documents = []
+        while b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            if line.strip():
+                try:
+                    documents.append(json.loads(line))
+                except ValueError:
+                    continue
+        if documents:
+            self.last = documents[-1]
+            self.documents += len(documents)
+        return documents
+
+    def flush(self) -> List[Dict[str, Any]]:
+        line, self.buffer = self.buffer, b""
+        if not line.strip():
+            return []
+        try:
+            self.last = json.loads(line)
+            self.documents += 1
+            return [self.last]
+        except ValueError:
+            return []
+
+
+def queue_wait(final: Dict[str, Any]) -> Optional[float]:
+    """Seconds before Ollama started evaluating, from a response's final document; None without timings.
+    Ollama durations are nanoseconds. total_duration starts when the request reaches the handler, before the
+    scheduler (load_duration covers the wait for a slot as well as any load), so whatever is not prompt or
+    token evaluation is the wait"""
+    if not final.get("total_duration"):
+        return None
+    evaluating = (final.get("prompt_eval_duration") or 0) + (final.get("eval_duration") or 0)
+    return max(0.0, (final["total_duration"] - evaluating) / 1e9)
+
+
+def model_of(body: bytes) -> str:
+    """The model named in a JSON request body, or '' when there is none"""
+    if not body:
+        return ""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return ""
+    return (payload.get("model") or payload.get("name") or "") if isinstance(payload, dict) else ""
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    """Forwards every request to `upstream`; subclasses override the hooks"""
+
+    protocol_version = "HTTP/1.1"
+    upstream: Upstream = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch()
+
+    def do_POST(self):
+        self.dispatch()
+
+    def do_DELETE(self):
+        self.dispatch()
+
+    def do_PUT(self):
+        self.dispatch()
+
+    def do_HEAD(self):
+        self.dispatch()
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def dispatch(self):
+        body = self.read_body()
+        try:
+            if not self.handle_local(body):
+                self.proxy(body)
+        except UpstreamError as e:
+            self.send_json(502, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-stream
+            self.close_connection = True
+
+    def handle_local(self, body: bytes) -> bool:
+        """Serve a request without the upstream; return True when handled"""
+        return False
+
+    def choose_upstream(self, body: bytes) -> Upstream:
+        """Upstream for this request; routers override this"""
+        return self.upstream
+
+    def proxy(self, body: bytes, upstream: Optional[Upstream] = None,
+              on_document: Optional[Callable[[Dict[str, Any]], None]] = None,
+              record: bool = False) -> Tuple[int, StreamObserver]:
+        """Forward the request and relay the response as it streams; returns (status, observer)"""
+        upstream = upstream or self.choose_upstream(body)
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() not in HOP_BY_HOP and name.lower() != "host"}
+        response = upstream.request(self.command, self.path, body, headers)
+
+        observer = StreamObserver(record)
+        observer.content_type = response.getheader("Content-Type", "")
+        self.send_response(response.status)
+        length = response.getheader("Content-Length")
+        for name, value in response.getheaders():
+            if name.lower() not in HOP_BY_HOP:
+                self.send_header(name, value)
+        chunked = length is None and self.command != "HEAD"
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            while True:
+                piece = response.read1(65536) if self.command != "HEAD" else b""
+                if not piece:
+                    break
+                for document in observer.feed(piece):
+                    if on_document:
+                        on_document(document)
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece) if chunked else piece)
+                self.wfile.flush()
+            for document in observer.flush():
+                if on_document:
+                    on_document(document)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client left; drop the upstream connection instead of draining it
+            upstream._reset()
+            raise
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+        return response.status, observer
+
+    def send_json(self, code: int, payload: Any):
+        self.send_bytes(code, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def send_bytes(self, code: int, body: bytes, content_type: str):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+
+class ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The socketserver default of 5 refuses connections when many clients arrive at once
+    request_queue_size = 128
+
+
+def serve(handler: type, host: str, port: int, background: bool = False) -> ThreadingHTTPServer:
+    """Run a handler on a threading server, in the foreground or on a daemon thread"""
+    server = ProxyServer((host, port), handler)
+    if background:
+        threading.Thread(target=server.serve_forever, name=handler.__name__, daemon=True).start()
+    return server
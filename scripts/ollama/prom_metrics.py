@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics
+Minimal counters, gauges and histograms rendered in the Prometheus text format
+No external dependencies required (no prometheus_client)
+"""
+
+import math
+import threading
+from typing import Dict, List, Tuple, Optional, Iterable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans sub-second API calls up to multi-minute generations
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Tokens per second on CPU-only through GPU inference
+RATE_BUCKETS = (1, 2.5, 5, 10, 20, 40, 80, 160, 320)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic total per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+                    for key, value in sorted(self.values.items())]
+
+
+class Gauge(_Metric):
+    """Current value per label set"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def replace(self, values: Dict[Tuple[str, ...], float]):
+        """Swap in a complete set of samples, dropping label sets that disappeared"""
+        with self.lock:
+            self.values = dict(values)
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+                    for key, value in sorted(self.values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative buckets, sum and count per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                # per-bucket counts, then sum and count
+                entry = self.values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def count(self, **labels) -> int:
+        entry = self.values.get(self._key(labels))
+        return int(entry[-1]) if entry else 0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Upper bound of the bucket containing the q-quantile"""
+        entry = self.values.get(self._key(labels))
+        if not entry or not entry[-1]:
+            return None
+        target = q * entry[-1]
+        running = 0.0
+        for bound, count in zip(self.buckets, entry):
+            running += count
+            if running >= target:
+                return bound
+        return math.inf
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self.lock:
+            for key, entry in sorted(self.values.items()):
+                running = 0.0
+                for bound, count in zip(self.buckets, entry):
+                    running += count
+                    le = 'le="%s"' % _number(bound)
+                    lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {_number(running)}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(entry[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, key)} {_number(entry[-1])}")
+        return lines
+
+
+class Registry:
+    """Metrics exposed together on one /metrics endpoint"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
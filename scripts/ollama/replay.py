@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Ollama Trace Replay
+Sends the traffic recorded in request logs (request_log.py) back to an
+Ollama API with its original timing, or scaled
+
+    replay.py 'requests-*.jsonl.gz' requests.jsonl --url http://ollama.local:11434
+    replay.py trace.jsonl.gz --speed 4 --model-map codellama:13b=codellama:7b -o replay.json
+    replay.py trace.jsonl --speed 0 --max-in-flight 16         # as fast as the server allows
+
+Each record becomes a request for the same model and endpoint, with a
+synthetic prompt of the recorded size (the same one for the same prompt
+hash, so cache hits replay as hits) and generation capped at the recorded
+output tokens. Arrival gaps are divided by --speed; latency is measured
+from the scheduled arrival, as in loadgen.py's open loop, and the summary
+is written in loadgen's format so `loadgen.py compare` works on replays.
+
+The proxies write a record when its request finishes but stamp it with
+its arrival, so each file is put back in arrival order through a buffer
+holding --reorder-window seconds of records, then files are merged by
+timestamp (logs of several replicas interleave correctly). At most
+--max-in-flight requests are outstanding, per-request results are
+streamed to --output as they finish and percentiles come from bounded
+samples, so memory does not grow with the length of the trace.
+No external dependencies required.
+"""
+
+import sys
+import json
+import time
+import heapq
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Dict, IO, Iterator, List, Any, Optional
+
+from loadgen import LoadGenerator, print_summary
+from ollama_proxy import UpstreamError
+from request_log import expand, read_records
+
+# Common English words; most are a single token for Llama-family tokenizers
+WORDS = ("the of and to in is that it for on with as was at by be this are from or have an they which one you "
+         "were all we her she there would their will when who him been has more if no out do so can what up said "
+         "about other into than its time only could new them man some these then two first may any like now my "
+         "such make over our even most me state after also made many did must before back see through way where "
+         "get much go well your know should down work year because come people just say each those take day good "
+         "how long own too little use us very great still men here life both between old under last never place "
+         "same another while house might part found world again high off every point form small home large end").split()
+
+
+def synthetic_text(seed: str, tokens: int) -> str:
+    """Roughly `tokens` tokens of filler, identical for the same seed"""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(max(1, tokens)))
+
+
+def prompt_tokens(record: Dict[str, Any]) -> int:
+    if record.get("prompt_tokens"):
+        return int(record["prompt_tokens"])
+    # About four characters per token when the server reported no count
+    return max(1, int(record.get("prompt_chars", 0)) // 4)
+
+
+def reordered(records: Iterator[Dict[str, Any]], window: float) -> Iterator[Dict[str, Any]]:
+    """Records of one log in arrival order. The log is in completion order (ts + duration), so once a request
+    completing at c has been read, later records arrived after c - window unless they ran longer than window;
+    records older than that are released (one that ran longer comes out late)"""
+    held: List[Any] = []
+    for seq, record in enumerate(records):
+        heapq.heappush(held, (record["ts"], seq, record))
+        completed = record["ts"] + (record.get("duration") or 0.0)
+        while held and held[0][0] <= completed - window:
+            yield heapq.heappop(held)[2]
+    while held:
+        yield heapq.heappop(held)[2]
+
+
+def merged(paths: List[str], window: float = 600.0) -> Iterator[Dict[str, Any]]:
+    """Records of all files in timestamp order, holding window seconds of records per file"""
+    return heapq.merge(*(reordered(read_records([path]), window) for path in paths), key=lambda record: record["ts"])
+
+
+class ResultWriter:
+    """Writes a results file in loadgen's format with the requests streamed in as they finish (in completion
+    order, not by id) and the summary appended at the end"""
+
+    def __init__(self, path: str):
+        self.file: IO[str] = open(path, "w", encoding="utf-8")
+        self.file.write('{"requests": [\n')
+        self.first = True
+
+    def __call__(self, result: Dict[str, Any]):
+        if self.file.closed:
+            # A straggler finishing after an interrupted run was summarized
+            return
+        self.file.write(("" if self.first else ",\n") + json.dumps(result, separators=(",", ":")))
+        self.first = False
+
+    def close(self, **fields: Any):
+        self.file.write("\n]")
+        for key, value in fields.items():
+            self.file.write(f",\n{json.dumps(key)}: {json.dumps(value, indent=1)}")
+        self.file.write("}\n")
+        self.file.close()
+
+
+class Replayer:
+    """Schedules records at their (scaled) offsets and measures them with a LoadGenerator"""
+
+    def __init__(self, url: str, speed: float = 1.0, max_in_flight: int = 256, timeout: float = 600.0,
+                 model_map: Optional[Dict[str, str]] = None, model: Optional[str] = None,
+                 writer: Optional[ResultWriter] = None):
+        self.speed = speed
+        self.max_in_flight = max_in_flight
+        self.model_map = model_map or {}
+        self.model = model
+        self.generator = LoadGenerator(url, [], timeout=timeout, keep=False, sink=writer)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.skipped = 0
+        self.max_lag = 0.0
+
+    def entry(self, record: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """The loadgen entry that reproduces a record"""
+        model = self.model or self.model_map.get(record.get("model", ""), record.get("model", ""))
+        text = synthetic_text(record.get("prompt_sha", str(index)), prompt_tokens(record))
+        options = dict(record.get("options") or {})
+        options["num_predict"] = int(record.get("output_tokens") or options.get("num_predict") or 128)
+        entry: Dict[str, Any] = {"model": model, "options": options, "_id": index}
+        if "chat" in record.get("endpoint", ""):
+            entry["messages"] = [{"role": "user", "content": text}]
+        else:
+            entry["prompt"] = text
+        return entry
+
+    def embed(self, record: Dict[str, Any], index: int, scheduled: float):
+        """Embedding records are sent as one /api/embed call with the recorded number of inputs"""
+        model = self.model or self.model_map.get(record.get("model", ""), record.get("model", ""))
+        count = int(record.get("inputs") or 1)
+        size = max(1, prompt_tokens(record) // count)
+        inputs = [synthetic_text(f"{record.get('prompt_sha', index)}:{i}", size) for i in range(count)]
+        result = {"id": index, "model": model, "endpoint": "/api/embed",
+                  "offset": round(scheduled - self.generator.started, 4), "ok": False}
+        try:
+            status, body = self.generator.upstream.call("POST", "/api/embed", {"model": model, "input": inputs})
+            result["ok"] = status < 400
+            if status >= 400:
+                result["error"] = body[:300].decode("utf-8", "replace")
+        except UpstreamError as e:
+            result["error"] = str(e)[:300]
+        result["latency"] = round(time.perf_counter() - scheduled, 4)
+        self.generator.record(result)
+
+    def fire(self, record: Dict[str, Any], index: int, scheduled: float):
+        try:
+            if "embed" in record.get("endpoint", ""):
+                self.embed(record, index, scheduled)
+            else:
+                self.generator.send(self.entry(record, index), scheduled)
+        finally:
+            self.in_flight.release()
+
+    def run(self, records: Iterator[Dict[str, Any]], limit: Optional[int] = None,
+            duration: Optional[float] = None, include_errors: bool = False) -> int:
+        """Replay until the records, --limit or --duration (trace seconds) run out; returns the count sent"""
+        generator = self.generator
+        generator.started = generator.finished = time.perf_counter()
+        origin = None
+        sent = 0
+        for record in records:
+            if not include_errors and record.get("status", 200) >= 400:
+                continue
+            if origin is None:
+                origin = record["ts"]
+            offset = record["ts"] - origin
+            if duration is not None and offset > duration:
+                break
+            if limit is not None and sent >= limit:
+                break
+            scheduled = generator.started + (offset / self.speed if self.speed else 0.0)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if self.speed:
+                if not self.in_flight.acquire(blocking=False):
+                    # As in loadgen's open loop: the client is the bottleneck, record it and move on
+                    self.skipped += 1
+                    generator.record({"id": sent, "offset": round(scheduled - generator.started, 4),
+                                      "ok": False, "error": "client: too many requests in flight"})
+                    sent += 1
+                    continue
+                self.max_lag = max(self.max_lag, time.perf_counter() - scheduled)
+            else:
+                self.in_flight.acquire()
+                scheduled = time.perf_counter()
+            threading.Thread(target=self.fire, args=(record, sent, scheduled), daemon=True).start()
+            sent += 1
+        # Wait for the stragglers by taking every slot back
+        for _ in range(self.max_in_flight):
+            self.in_flight.acquire()
+        generator.finished = time.perf_counter()
+        return sent
+
+
+def main():
+    """Replay a request log against an Ollama API"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Replay recorded Ollama traffic at original or scaled timing')
+    parser.add_argument('paths', nargs='+', help='Request logs or patterns (.gz accepted, - for stdin)')
+    parser.add_argument('--url', default='http://localhost:11434', help='Ollama API (default: http://localhost:11434)')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Time compression: 2 replays twice as fast, 0 as fast as --max-in-flight allows')
+    parser.add_argument('--max-in-flight', type=int, default=256, help='Outstanding requests (default: 256)')
+    parser.add_argument('--limit', '-n', type=int, help='Replay at most this many requests')
+    parser.add_argument('--duration', type=float, help='Replay only the first N seconds of the trace')
+    parser.add_argument('--model-map', action='append', default=[], metavar='FROM=TO',
+                        help='Send requests for one model to another (repeatable)')
+    parser.add_argument('--model', help='Send every request to this model')
+    parser.add_argument('--include-errors', action='store_true', help='Also replay requests that failed originally')
+    parser.add_argument('--timeout', type=float, default=600.0, help='Per-request timeout in seconds')
+    parser.add_argument('--reorder-window', type=float, default=600.0,
+                        help='Longest recorded request, in seconds, when sorting logs back into arrival order '
+                             '(default: 600, the proxies\' upstream timeout)')
+    parser.add_argument('--label', help='Name for this run in the output')
+    parser.add_argument('--output', '-o', help='Write results JSON (loadgen format) here')
+    args = parser.parse_args()
+
+    model_map = {}
+    for item in args.model_map:
+        source, _, target = item.partition("=")
+        if not target:
+            parser.error(f"--model-map expects FROM=TO, got {item!r}")
+        model_map[source] = target
+
+    paths = expand(args.paths)
+    writer = ResultWriter(args.output) if args.output else None
+    replayer = Replayer(args.url, args.speed, args.max_in_flight, args.timeout, model_map, args.model, writer)
+    pace = f"{args.speed:g}x speed" if args.speed else "max speed"
+    print(f"⏯️  Replaying {len(paths)} file(s) against {args.url} at {pace}", flush=True)
+    try:
+        sent = replayer.run(merged(paths, args.reorder_window), args.limit, args.duration, args.include_errors)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; summarizing what finished")
+        sent = replayer.generator.count
+        replayer.generator.finished = time.perf_counter()
+    summary = replayer.generator.summary()
+    label = args.label or f"replay {pace}"
+    print_summary(summary, label)
+    if replayer.skipped:
+        print(f"⚠️  {replayer.skipped} request(s) not sent: --max-in-flight {args.max_in_flight} reached")
+    if args.speed and replayer.max_lag > 1.0:
+        print(f"⚠️  The replayer fell up to {replayer.max_lag:.1f}s behind schedule")
+
+    if writer is not None:
+        config = {"url": args.url, "traces": paths, "mode": pace, "speed": args.speed, "sent": sent,
+                  "model_map": model_map, "model": args.model}
+        with replayer.generator.lock:
+            writer.close(label=label, started_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                         config=config, summary=summary)
+        print(f"💾 Results written to {args.output}")
+    sys.exit(1 if summary["requests"] and summary["errors"] == summary["requests"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Ollama Request Log
+One compact JSON line per inference request, written by the proxies in
+front of Ollama (metrics exporter, router) and read back by replay.py
+
+    {"ts":1760680800.123,"endpoint":"/api/chat","model":"codellama:13b","replica":"ollama-5d9f-x2",
+     "status":200,"stream":true,"prompt_sha":"9f2c...","prompt_chars":812,"prompt_tokens":231,
+     "output_tokens":187,"duration":6.204,"ttft":0.412,"queue_wait":0.051,"load":0.003}
+
+Prompts are never stored, only a hash (so repeated prompts stay
+recognizable) and their size. The file is rotated past a size limit;
+rotated files are gzipped in the background and the oldest removed.
+
+    request_log.py stats 'requests-*.jsonl.gz' requests.jsonl
+
+No external dependencies required.
+"""
+
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Any, Optional
+
+from ollama_proxy import queue_wait
+
+# Requests worth a record; model management calls are not traffic
+LOGGED_ENDPOINTS = {"/api/generate", "/api/chat", "/api/embed", "/api/embeddings",
+                    "/v1/chat/completions", "/v1/completions", "/v1/embeddings"}
+# Options that change how a request is served, kept so a replay behaves the same
+KEPT_OPTIONS = ("temperature", "num_ctx", "num_predict")
+
+
+def prompt_of(payload: Dict[str, Any]) -> Any:
+    """The part of a request body that is the prompt"""
+    for field in ("messages", "prompt", "input"):
+        if payload.get(field) is not None:
+            return payload[field]
+    return ""
+
+
+def prompt_digest(prompt: Any) -> str:
+    text = prompt if isinstance(prompt, str) else json.dumps(prompt, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def prompt_chars(prompt: Any) -> int:
+    if isinstance(prompt, str):
+        return len(prompt)
+    if isinstance(prompt, list):
+        return sum(prompt_chars(item.get("content", "") if isinstance(item, dict) else item) for item in prompt)
+    return 0
+
+
+def build_record(endpoint: str, body: bytes, status: int, arrived: float, started: float,
+                 observer=None, replica: str = "", client: str = "") -> Optional[Dict[str, Any]]:
+    """The record for a request that arrived at `arrived` (epoch) / `started` (perf_counter) and just
+    finished, or None when it is not an inference request"""
+    if endpoint not in LOGGED_ENDPOINTS:
+        return None
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
+    prompt = prompt_of(payload)
+    elapsed = time.perf_counter() - started
+    record: Dict[str, Any] = {
+        "ts": round(arrived, 3), "endpoint": endpoint, "model": payload.get("model", ""),
+        "replica": replica, "status": status,
+        "stream": bool(payload.get("stream", not endpoint.startswith("/v1/"))),
+        "prompt_sha": prompt_digest(prompt), "prompt_chars": prompt_chars(prompt),
+        "duration": round(elapsed, 4),
+    }
+    if "embed" in endpoint:
+        del record["stream"]
+        if isinstance(prompt, list):
+            record["inputs"] = len(prompt)
+    if client:
+        record["client"] = client
+    options = dict(payload.get("options") or {}, **{k: payload[k] for k in ("temperature",) if k in payload})
+    kept = {key: options[key] for key in KEPT_OPTIONS if key in options}
+    if kept:
+        record["options"] = kept
+
+    final = observer.last if observer is not None else None
+    if final:
+        record["model"] = record["model"] or final.get("model", "")
+        usage = final.get("usage") or {}
+        record["prompt_tokens"] = final.get("prompt_eval_count", usage.get("prompt_tokens"))
+        record["output_tokens"] = final.get("eval_count", usage.get("completion_tokens"))
+        if observer.documents > 1 and observer.first_chunk_at is not None:
+            record["ttft"] = round(observer.first_chunk_at - started, 4)
+        wait = queue_wait(final)
+        if wait is not None:
+            record["queue_wait"] = round(wait, 4)
+        if final.get("load_duration"):
+            record["load"] = round(final["load_duration"] / 1e9, 4)
+    return {key: value for key, value in record.items() if value is not None}
+
+
+class RequestLog:
+    """Thread-safe JSONL appender with size-based rotation"""
+
+    def __init__(self, path: str, max_bytes: int = 100 * 1024 * 1024, keep: int = 10):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.written = self.file.tell()
+        self.dropped = 0
+
+    def write(self, record: Optional[Dict[str, Any]]):
+        if record is None:
+            return
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.lock:
+            try:
+                self.file.write(line)
+                self.file.flush()
+            except OSError:
+                # A full disk must not fail the request being logged
+                self.dropped += 1
+                return
+            self.written += len(line)
+            if self.max_bytes and self.written >= self.max_bytes:
+                self._rotate()
+
+    def log(self, endpoint: str, body: bytes, status: int, arrived: float, started: float,
+            observer=None, replica: str = "", client: str = ""):
+        self.write(build_record(endpoint, body, status, arrived, started, observer, replica, client))
+
+    def _rotate(self):
+        self.file.close()
+        stem, ext = os.path.splitext(self.path)
+        rotated = f"{stem}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}{ext}"
+        os.replace(self.path, rotated)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.written = 0
+        threading.Thread(target=self._compress, args=(rotated,), name="log-compress", daemon=True).start()
+
+    def _compress(self, path: str):
+        with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+        stem, ext = os.path.splitext(self.path)
+        for old in sorted(glob.glob(f"{stem}-*{ext}.gz"))[:-self.keep or None]:
+            os.remove(old)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_records(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """Records from JSONL files in order, one line at a time; .gz files and '-' (stdin) are accepted"""
+    for path in paths:
+        if path == "-":
+            handle = sys.stdin
+        else:
+            with open(path, "rb") as probe:
+                gzipped = probe.read(2) == b"\x1f\x8b"
+            handle = gzip.open(path, "rt", encoding="utf-8") if gzipped else open(path, "r", encoding="utf-8")
+        try:
+            for line in handle:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and "ts" in record:
+                    yield record
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+
+def expand(paths: List[str]) -> List[str]:
+    """Shell-style patterns expanded and sorted, so rotated files are read oldest first"""
+    files: List[str] = []
+    for path in paths:
+        matches = sorted(glob.glob(os.path.expanduser(path))) if path != "-" else []
+        files.extend(matches or [path])
+    return files
+
+
+def stats(paths: List[str]) -> Dict[str, Any]:
+    """Per-model request counts, token totals and the span of a log, in one pass"""
+    models: Dict[str, Dict[str, Any]] = {}
+    first = last = None
+    total = errors = 0
+    for record in read_records(paths):
+        total += 1
+        first = record["ts"] if first is None else min(first, record["ts"])
+        last = record["ts"] if last is None else max(last, record["ts"])
+        model = models.setdefault(record.get("model") or "?", {"requests": 0, "errors": 0, "prompt_tokens": 0,
+                                                              "output_tokens": 0, "duration": 0.0})
+        model["requests"] += 1
+        if record.get("status", 200) >= 400:
+            model["errors"] += 1
+            errors += 1
+        model["prompt_tokens"] += record.get("prompt_tokens") or 0
+        model["output_tokens"] += record.get("output_tokens") or 0
+        model["duration"] += record.get("duration") or 0.0
+    span = (last - first) if total else 0.0
+    return {"requests": total, "errors": errors, "span_seconds": round(span, 1),
+            "rate_per_second": round(total / span, 3) if span else None, "models": models}
+
+
+def main():
+    """Summarize request logs"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect request logs written by the Ollama proxies')
+    sub = parser.add_subparsers(dest='command', required=True)
+    stats_cmd = sub.add_parser('stats', help='Requests, errors and tokens per model')
+    stats_cmd.add_argument('paths', nargs='+', help='Log files or patterns (.gz accepted, - for stdin)')
+    stats_cmd.add_argument('--json', action='store_true', help='Print JSON')
+    args = parser.parse_args()
+
+    summary = stats(expand(args.paths))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    rate = f", {summary['rate_per_second']}/s" if summary["rate_per_second"] else ""
+    span = summary["span_seconds"]
+    span_text = f"{span / 3600:.1f}h" if span >= 3600 else f"{span / 60:.1f}min"
+    print(f"📜 {summary['requests']} requests ({summary['errors']} errors) over {span_text}{rate}")
+    print(f"   {'model':32}{'requests':>10}{'errors':>8}{'prompt tok':>12}{'output tok':>12}{'avg s':>8}")
+    for name, model in sorted(summary["models"].items(), key=lambda item: -item[1]["requests"]):
+        print(f"   {name:32}{model['requests']:>10}{model['errors']:>8}{model['prompt_tokens']:>12}"
+              f"{model['output_tokens']:>12}{model['duration'] / model['requests']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Ollama Response Cache
+Caching proxy for deterministic Ollama requests
+
+Generate and chat requests with temperature 0 always produce the same output
+for the same model weights, so the completed response is kept and replayed,
+streamed chunk by chunk as originally sent. The key is the model's digest
+(from /api/tags, so a re-pulled model never serves stale answers), the
+endpoint and the request body minus keep_alive. Entries expire after a TTL
+and the least recently used are evicted beyond the size limit. Identical
+requests that arrive while the first is still running wait for it instead of
+computing the same answer twice.
+
+Hit ratio and sizes are served at /metrics (Prometheus) and /cache/stats.
+No external dependencies required.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+from model_sync import ModelDigests, parse_size
+from ollama_proxy import ProxyHandler, Upstream, serve
+from prom_metrics import CONTENT_TYPE, Registry
+
+CACHEABLE_ENDPOINTS = {"/api/generate", "/api/chat", "/v1/chat/completions", "/v1/completions"}
+# Request fields that do not change the answer
+IGNORED_FIELDS = ("keep_alive",)
+
+
+class Entry:
+    """A completed response: status, content type and the chunks as streamed"""
+
+    def __init__(self, status: int, content_type: str, pieces: List[bytes], chunked: bool):
+        self.status = status
+        self.content_type = content_type
+        self.pieces = pieces
+        self.chunked = chunked
+        self.size = sum(len(p) for p in pieces)
+        self.stored_at = time.time()
+        self.hits = 0
+
+
+class ResponseStore:
+    """In-memory LRU of responses bounded by total bytes, with a TTL"""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl and time.time() - entry.stored_at > self.ttl:
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            entry.hits += 1
+            return entry
+
+    def put(self, key: str, entry: Entry) -> bool:
+        if entry.size > self.max_bytes:
+            return False
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            while self.entries and self.bytes + entry.size > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+            self.entries[key] = entry
+            self.bytes += entry.size
+            return True
+
+    def _drop(self, key: str):
+        self.bytes -= self.entries.pop(key).size
+
+
+def is_deterministic(endpoint: str, payload: Dict[str, Any]) -> bool:
+    """Temperature 0 requests; Ollama's default temperature is not 0, so it must be explicit"""
+    if endpoint.startswith("/v1/"):
+        temperature = payload.get("temperature")
+    else:
+        options = payload.get("options")
+        temperature = options.get("temperature") if isinstance(options, dict) else None
+    try:
+        return temperature is not None and float(temperature) == 0.0
+    except (TypeError, ValueError):
+        # Not a number: bypass the cache and let Ollama answer it
+        return False
+
+
+def is_complete(endpoint: str, payload: Dict[str, Any], observer) -> bool:
+    """Only responses that ran to the end are stored"""
+    if endpoint.startswith("/v1/"):
+        if payload.get("stream"):
+            return b"".join(observer.pieces).rstrip().endswith(b"data: [DONE]")
+        return bool(observer.last and observer.last.get("choices"))
+    return bool(observer.last and observer.last.get("done"))
+
+
+class ResponseCache:
+    """Keys, single-flight and statistics around a ResponseStore"""
+
+    def __init__(self, upstream: Upstream, store: ResponseStore, digest_ttl: float = 30.0):
+        self.upstream = upstream
+        self.store = store
+        self.digests = ModelDigests(upstream, digest_ttl)
+        self._pending: Dict[str, threading.Event] = {}
+        self._pending_lock = threading.Lock()
+
+        self.registry = Registry()
+        self.requests = self.registry.counter(
+            "ollama_cache_requests_total", "Requests by cache result (hit, miss, bypass)", ("result",))
+        self.saved_seconds = self.registry.counter(
+            "ollama_cache_saved_seconds_total", "Ollama time not spent thanks to hits (from total_duration)")
+        self.hit_ratio = self.registry.gauge(
+            "ollama_cache_hit_ratio", "Hits over cacheable requests since start")
+        self.entries = self.registry.gauge("ollama_cache_entries", "Responses held")
+        self.bytes = self.registry.gauge("ollama_cache_bytes", "Bytes held")
+        self.evictions = self.registry.gauge("ollama_cache_evictions", "Responses evicted to stay under the size limit")
+
+    def key(self, endpoint: str, payload: Dict[str, Any]) -> Optional[str]:
+        digest = self.digests.get(payload.get("model") or "")
+        if not digest:
+            return None
+        request = {k: v for k, v in payload.items() if k not in IGNORED_FIELDS and k != "model"}
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{digest}\n{endpoint}\n{canonical}".encode("utf-8")).hexdigest()
+
+    def claim(self, key: str) -> Tuple[bool, threading.Event]:
+        """(True, event) for the first request with this key; later ones get the leader's event to wait on"""
+        with self._pending_lock:
+            event = self._pending.get(key)
+            if event is not None:
+                return False, event
+            event = self._pending[key] = threading.Event()
+            return True, event
+
+    def settle(self, key: str):
+        with self._pending_lock:
+            self._pending.pop(key).set()
+
+    def record(self, result: str, entry: Optional[Entry] = None):
+        self.requests.inc(result=result)
+        if entry is not None and entry.pieces:
+            try:
+                last = json.loads(entry.pieces[-1].strip().splitlines()[-1])
+                self.saved_seconds.inc((last.get("total_duration") or 0) / 1e9)
+            except (ValueError, IndexError, AttributeError):
+                pass
+        self.refresh()
+
+    def refresh(self):
+        hits, misses = self.requests.get(result="hit"), self.requests.get(result="miss")
+        self.hit_ratio.set(hits / (hits + misses) if hits + misses else 0.0)
+        self.entries.set(len(self.store.entries))
+        self.bytes.set(self.store.bytes)
+        self.evictions.set(self.store.evictions)
+
+    def stats(self) -> Dict[str, Any]:
+        self.refresh()
+        return {"hits": int(self.requests.get(result="hit")), "misses": int(self.requests.get(result="miss")),
+                "bypassed": int(self.requests.get(result="bypass")), "hit_ratio": round(self.hit_ratio.get(), 4),
+                "entries": len(self.store.entries), "bytes": self.store.bytes, "max_bytes": self.store.max_bytes,
+                "evictions": self.store.evictions, "saved_seconds": round(self.saved_seconds.get(), 3)}
+
+
+def make_handler(cache: ResponseCache):
+    class CacheHandler(ProxyHandler):
+        """Serves deterministic requests from the cache and proxies the rest"""
+
+        def handle_local(self, body: bytes) -> bool:
+            if self.command == "GET" and self.path == "/metrics":
+                cache.refresh()
+                self.send_bytes(200, cache.registry.render(), CONTENT_TYPE)
+                return True
+            if self.command == "GET" and self.path == "/cache/stats":
+                self.send_json(200, cache.stats())
+                return True
+            endpoint = self.path.split("?", 1)[0]
+            if self.command != "POST" or endpoint not in CACHEABLE_ENDPOINTS:
+                return False
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                return False
+            if not isinstance(payload, dict) or not is_deterministic(endpoint, payload):
+                cache.record("bypass")
+                return False
+            key = cache.key(endpoint, payload)
+            if key is None:
+                cache.record("bypass")
+                return False
+
+            while True:
+                entry = cache.store.get(key)
+                if entry is not None:
+                    cache.record("hit", entry)
+                    self.replay(entry)
+                    return True
+                leader, event = cache.claim(key)
+                if leader:
+                    break
+                # Same request already running: its answer will be here shortly
+                event.wait(self.upstream.timeout)
+                if cache.store.get(key) is None:
+                    break
+
+            try:
+                status, observer = self.proxy(body, record=True)
+                cache.record("miss")
+                if status == 200 and observer.pieces and is_complete(endpoint, payload, observer):
+                    entry = Entry(status, observer.content_type, observer.pieces,
+                                  chunked=bool(payload.get("stream", not endpoint.startswith("/v1/"))))
+                    cache.store.put(key, entry)
+                    cache.refresh()
+            finally:
+                if leader:
+                    cache.settle(key)
+            return True
+
+        def replay(self, entry: Entry):
+            self.send_response(entry.status)
+            self.send_header("Content-Type", entry.content_type or "application/json")
+            self.send_header("X-Ollama-Cache", "hit")
+            if entry.chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for piece in entry.pieces:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                self.send_header("Content-Length", str(entry.size))
+                self.end_headers()
+                self.wfile.write(b"".join(entry.pieces))
+
+    CacheHandler.upstream = cache.upstream
+    return CacheHandler
+
+
+def main():
+    """Run the response cache"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Caching proxy for deterministic (temperature 0) Ollama requests')
+    parser.add_argument('--listen', default='0.0.0.0', help='Listen address (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get("CACHE_PORT", "11436")),
+                        help='Listen port (default: 11436)')
+    parser.add_argument('--upstream', default=os.environ.get("OLLAMA_UPSTREAM", "http://127.0.0.1:11434"),
+                        help='Ollama API to cache (default: http://127.0.0.1:11434)')
+    parser.add_argument('--max-size', default=os.environ.get("CACHE_MAX_SIZE", "512Mi"),
+                        help='Memory for cached responses, e.g. 512Mi (default: 512Mi)')
+    parser.add_argument('--ttl', type=float, default=float(os.environ.get("CACHE_TTL", "86400")),
+                        help='Seconds a response is served from the cache, 0 for no expiry (default: 86400)')
+    args = parser.parse_args()
+
+    upstream = Upstream(args.upstream)
+    cache = ResponseCache(upstream, ResponseStore(parse_size(args.max_size), args.ttl))
+    server = serve(make_handler(cache), args.listen, args.port)
+    print(f"🗃️  Response cache on http://{args.listen}:{args.port} in front of {upstream.url}"
+          f" ({args.max_size}, ttl {args.ttl:.0f}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping response cache")
+    finally:
+        server.server_close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Ollama Router
+Model-aware load balancer in front of several Ollama replicas
+
+Each replica's resident models (polled from /api/ps and updated as requests
+complete) and in-flight count are tracked. An inference request goes to the
+least-loaded replica that already has its model loaded and a free slot
+(in-flight below OLLAMA_NUM_PARALLEL), else to the least-loaded replica
+with a free slot. When every slot is busy requests wait in per-client
+queues served round-robin, so one busy client cannot starve the others.
+
+Replicas come from a headless service's DNS records (--replicas-dns) or a
+static list (--replica). GET /router/status shows the routing state.
+--request-log records each inference request with the replica that served
+it (see request_log.py). No external dependencies required.
+"""
+
+import os
+import sys
+import time
+import socket
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional
+
+from model_sync import normalize, parse_size
+from ollama_proxy import ProxyHandler, Upstream, UpstreamError, model_of, serve
+from request_log import RequestLog
+
+# Requests that occupy an Ollama slot while they run
+INFERENCE_ENDPOINTS = {"/api/generate", "/api/chat", "/api/embed", "/api/embeddings",
+                       "/v1/chat/completions", "/v1/completions", "/v1/embeddings"}
+
+
+class QueueTimeout(Exception):
+    """Raised when a request waited longer than the queue timeout for a slot"""
+
+
+class Replica:
+    """One Ollama instance and what the router knows about it"""
+
+    def __init__(self, url: str, capacity: int):
+        self.url = url
+        self.upstream = Upstream(url)
+        self.capacity = capacity
+        self.resident: set = set()
+        self.in_flight = 0
+        self.served = 0
+        self.healthy = True
+        self.error = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"url": self.url, "healthy": self.healthy, "in_flight": self.in_flight, "capacity": self.capacity,
+                "resident": sorted(self.resident), "served": self.served, "error": self.error}
+
+
+class Waiter:
+    def __init__(self, model: str):
+        self.model = model
+        self.event = threading.Event()
+        self.replica: Optional[Replica] = None
+
+
+class Dispatcher:
+    """Slot accounting, placement and fair queueing across replicas"""
+
+    def __init__(self, num_parallel: int = 4, queue_timeout: float = 300.0):
+        self.num_parallel = num_parallel
+        self.queue_timeout = queue_timeout
+        self.lock = threading.Lock()
+        self.replicas: Dict[str, Replica] = {}
+        self.queues: "OrderedDict[str, deque]" = OrderedDict()
+        self.queued = 0
+        self.warm_hits = 0
+        self.cold_routes = 0
+        self._next = 0
+
+    def set_replicas(self, urls: List[str]):
+        with self.lock:
+            for url in urls:
+                if url not in self.replicas:
+                    self.replicas[url] = Replica(url, self.num_parallel)
+            for url in [u for u in self.replicas if u not in urls]:
+                # In-flight requests keep their Replica object; it just stops receiving new ones
+                del self.replicas[url]
+            self._dispatch()
+
+    def pick(self, model: str) -> Optional[Replica]:
+        """Warm replica with a free slot if any, else any replica with a free slot (least loaded first)"""
+        free = [r for r in self.replicas.values() if r.healthy and r.in_flight < r.capacity]
+        if not free:
+            return None
+        warm = [r for r in free if model in r.resident]
+        if warm:
+            self.warm_hits += 1
+            return min(warm, key=lambda r: r.in_flight / r.capacity)
+        self.cold_routes += 1
+        # Cold: prefer the replica with the fewest models resident, as it is least likely to evict one in use
+        return min(free, key=lambda r: (r.in_flight / r.capacity, len(r.resident)))
+
+    def acquire(self, model: str, client: str) -> Replica:
+        """Reserve a slot for a request, queueing fairly when all are busy"""
+        waiter = Waiter(model)
+        with self.lock:
+            self.queues.setdefault(client, deque()).append(waiter)
+            self.queued += 1
+            self._dispatch()
+        if not waiter.event.wait(self.queue_timeout):
+            with self.lock:
+                if waiter.replica is None:
+                    queue = self.queues.get(client)
+                    if queue and waiter in queue:
+                        queue.remove(waiter)
+                        self.queued -= 1
+                    raise QueueTimeout(f"no Ollama slot free after {self.queue_timeout:.0f}s")
+        return waiter.replica
+
+    def release(self, replica: Replica, model: str, ok: bool = True):
+        with self.lock:
+            replica.in_flight -= 1
+            replica.served += 1
+            if ok and model:
+                # The model is loaded there now, at least until /api/ps says otherwise
+                replica.resident.add(model)
+            self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to waiting requests, one client at a time in rotation (lock held)"""
+        while self.queues:
+            assigned = False
+            for client in list(self.queues):
+                queue = self.queues[client]
+                replica = self.pick(queue[0].model)
+                if replica is None:
+                    return
+                waiter = queue.popleft()
+                self.queued -= 1
+                replica.in_flight += 1
+                waiter.replica = replica
+                waiter.event.set()
+                assigned = True
+                # Rotate: this client goes to the back of the line
+                del self.queues[client]
+                if queue:
+                    self.queues[client] = queue
+                break
+            if not assigned:
+                return
+
+    def any(self) -> Replica:
+        """A healthy replica for requests that do not take a slot (round-robin)"""
+        with self.lock:
+            healthy = [r for r in self.replicas.values() if r.healthy] or list(self.replicas.values())
+            if not healthy:
+                raise UpstreamError("no Ollama replicas available")
+            self._next = (self._next + 1) % len(healthy)
+            return healthy[self._next]
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"replicas": [r.to_dict() for r in self.replicas.values()], "queued": self.queued,
+                    "queued_clients": len(self.queues), "warm_hits": self.warm_hits,
+                    "cold_routes": self.cold_routes}
+
+
+def resolve(host: str, port: int, scheme: str = "http") -> List[str]:
+    """Replica URLs from a headless service's A records"""
+    try:
+        infos = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except socket.gaierror:
+        return []
+    addresses = sorted({info[4][0] for info in infos})
+    return [f"{scheme}://[{a}]:{port}" if ":" in a else f"{scheme}://{a}:{port}" for a in addresses]
+
+
+def poll_replicas(dispatcher: Dispatcher, interval: float, stop: threading.Event):
+    """Refresh each replica's resident models and health from /api/ps"""
+    while not stop.is_set():
+        for replica in list(dispatcher.replicas.values()):
+            try:
+                models = replica.upstream.json("GET", "/api/ps").get("models") or []
+                resident = {normalize(m.get("name") or m.get("model", "")) for m in models}
+                with dispatcher.lock:
+                    replica.resident = resident
+                    was_healthy, replica.healthy, replica.error = replica.healthy, True, ""
+                    if not was_healthy:
+                        dispatcher._dispatch()
+            except (UpstreamError, ValueError) as e:
+                replica.healthy, replica.error = False, str(e)
+        stop.wait(interval)
+
+
+def discover(dispatcher: Dispatcher, host: str, port: int, interval: float, stop: threading.Event):
+    while not stop.is_set():
+        urls = resolve(host, port)
+        if urls:
+            dispatcher.set_replicas(urls)
+        stop.wait(interval)
+
+
+def make_handler(dispatcher: Dispatcher, request_log: Optional[RequestLog] = None):
+    class RouterHandler(ProxyHandler):
+        """Routes inference to replicas through the dispatcher"""
+
+        def handle_local(self, body: bytes) -> bool:
+            if self.path == "/router/status":
+                self.send_json(200, dispatcher.status())
+                return True
+            return False
+
+        def proxy(self, body: bytes, upstream: Optional[Upstream] = None, on_document=None, record: bool = False):
+            endpoint = self.path.split("?", 1)[0]
+            if self.command != "POST" or endpoint not in INFERENCE_ENDPOINTS:
+                return super().proxy(body, dispatcher.any().upstream, on_document, record)
+            # As /api/ps names it: llama3.2 is llama3.2:latest
+            model = model_of(body)
+            model = normalize(model) if model else ""
+            client = self.headers.get("X-Forwarded-For", self.client_address[0]).split(",")[0].strip()
+            arrived, started = time.time(), time.perf_counter()
+            try:
+                replica = dispatcher.acquire(model, client)
+            except QueueTimeout as e:
+                self.send_json(503, {"error": str(e)})
+                if request_log is not None:
+                    request_log.log(endpoint, body, 503, arrived, started, client=client)
+                return 503, None
+            status, observer = 502, None
+            try:
+                status, observer = super().proxy(body, replica.upstream, on_document, record)
+                return status, observer
+            finally:
+                dispatcher.release(replica, model, status < 400)
+                if request_log is not None:
+                    request_log.log(endpoint, body, status, arrived, started, observer, replica.url, client)
+
+    return RouterHandler
+
+
+def main():
+    """Run the model-aware router"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Model-aware router for Ollama replicas')
+    parser.add_argument('--listen', default='0.0.0.0', help='Listen address (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get("ROUTER_PORT", "11434")),
+                        help='Listen port (default: 11434)')
+    parser.add_argument('--replica', action='append', default=[], help='Static replica URL (repeatable)')
+    parser.add_argument('--replicas-dns', default=os.environ.get("ROUTER_REPLICAS_DNS"),
+                        help='Headless service name whose A records are the replicas')
+    parser.add_argument('--replica-port', type=int, default=int(os.environ.get("ROUTER_REPLICA_PORT", "11434")),
+                        help='Port on each replica (default: 11434)')
+    parser.add_argument('--num-parallel', type=int, default=int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")),
+                        help='Slots per replica, as OLLAMA_NUM_PARALLEL (default: 4)')
+    parser.add_argument('--queue-timeout', type=float, default=300.0,
+                        help='Seconds a request may wait for a slot before 503 (default: 300)')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between /api/ps polls')
+    parser.add_argument('--request-log', default=os.environ.get("REQUEST_LOG"),
+                        help='Append one JSON line per inference request to this file')
+    parser.add_argument('--request-log-size', default=os.environ.get("REQUEST_LOG_SIZE", "100Mi"),
+                        help='Rotate the request log past this size (default: 100Mi)')
+    parser.add_argument('--request-log-keep', type=int, default=int(os.environ.get("REQUEST_LOG_KEEP", "10")),
+                        help='Rotated, gzipped request logs to keep (default: 10)')
+    args = parser.parse_args()
+
+    if not args.replica and not args.replicas_dns:
+        parser.error("give --replica or --replicas-dns")
+
+    dispatcher = Dispatcher(args.num_parallel, args.queue_timeout)
+    stop = threading.Event()
+    if args.replica:
+        dispatcher.set_replicas(args.replica)
+    if args.replicas_dns:
+        dispatcher.set_replicas(resolve(args.replicas_dns, args.replica_port))
+        threading.Thread(target=discover, args=(dispatcher, args.replicas_dns, args.replica_port, 10.0, stop),
+                         name="discover", daemon=True).start()
+    threading.Thread(target=poll_replicas, args=(dispatcher, args.poll_interval, stop),
+                     name="poll", daemon=True).start()
+
+    request_log = None
+    if args.request_log:
+        request_log = RequestLog(args.request_log, parse_size(args.request_log_size), args.request_log_keep)
+    server = serve(make_handler(dispatcher, request_log), args.listen, args.port)
+    print(f"🔀 Router on http://{args.listen}:{args.port} for {len(dispatcher.replicas)} replica(s),"
+          f" {args.num_parallel} slots each")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping router")
+    finally:
+        stop.set()
+        server.server_close()
+        if request_log is not None:
+            request_log.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
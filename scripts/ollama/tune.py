@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Ollama Tuning Sweep
+Benchmarks a grid of ollama.config / ollama.resources settings and
+recommends one
+
+    tune.py --num-parallel 1,2,4,8 --max-loaded 1,2 --cpu 10000m,20000m -f charts/ollama-stack/values-local.yaml
+    tune.py --fake --num-parallel 1,2,4,8      # offline, against the bundled fake server
+
+For every combination the chart is rolled out with a values overlay
+(helm upgrade --wait; --render-only just runs helm template), a loadgen.py
+workload is run against ollama-service, and throughput and tail latency are
+recorded. The Pareto front (no other setting has both more output tokens/s
+and lower latency) is reported, and the recommended point, the fastest one
+within --slo or else the front's knee, is written as a values overlay next
+to values-local.yaml. Afterwards the release is rolled back to the revision
+it was on before the sweep (helm rollback), unless --apply-best rolled the
+recommended setting out.
+
+Needs helm and kubectl for cluster runs; no external Python dependencies.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import itertools
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+
+from loadgen import LoadGenerator, load_corpus
+
+CHART_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                                          "charts", "ollama-stack"))
+DEFAULT_OVERLAY = os.path.join(CHART_DIR, "values-tuned.yaml")
+# Summary metrics kept per trial
+KEPT = ("requests", "errors", "error_rate", "throughput_rps", "output_tokens_per_second",
+        "ttft_p50", "ttft_p95", "latency_p50", "latency_p95", "itl_p95", "queue_wait_p95")
+
+
+def parse_list(text: Optional[str], kind: type = str) -> List[Any]:
+    return [kind(item.strip()) for item in text.split(",") if item.strip()] if text else []
+
+
+def cpu_cores(text: str) -> float:
+    """Kubernetes CPU quantity ('20000m', '8') in cores"""
+    return float(text[:-1]) / 1000.0 if text.endswith("m") else float(text)
+
+
+def make_grid(num_parallel: List[int], max_loaded: List[int], cpu: List[str], memory: List[str]) -> List[Dict[str, Any]]:
+    """Every combination of the given settings; dimensions left empty keep the chart's value"""
+    dimensions = [("numParallel", num_parallel), ("maxLoadedModels", max_loaded), ("cpu", cpu), ("memory", memory)]
+    dimensions = [(name, values) for name, values in dimensions if values]
+    names = [name for name, _ in dimensions]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values for _, values in dimensions))]
+
+
+def overlay_for(setting: Dict[str, Any]) -> Dict[str, Any]:
+    """The values overlay that applies one setting"""
+    ollama: Dict[str, Any] = {}
+    config = {key: setting[key] for key in ("numParallel", "maxLoadedModels") if key in setting}
+    if config:
+        ollama["config"] = config
+    limits = {key: setting[key] for key in ("cpu", "memory") if key in setting}
+    if limits:
+        ollama["resources"] = {"limits": limits}
+    return {"ollama": ollama}
+
+
+def to_yaml(data: Dict[str, Any], indent: int = 0) -> str:
+    """Nested mappings of scalars as YAML (enough for values overlays, without PyYAML)"""
+    lines = []
+    for key, value in data.items():
+        if isinstance(value, dict):
+            lines.append(f"{' ' * indent}{key}:")
+            lines.append(to_yaml(value, indent + 2))
+        else:
+            lines.append(f"{' ' * indent}{key}: {json.dumps(value)}")
+    return "\n".join(lines)
+
+
+def label(setting: Dict[str, Any]) -> str:
+    short = {"numParallel": "np", "maxLoadedModels": "ml", "cpu": "cpu", "memory": "mem"}
+    return " ".join(f"{short[key]}={value}" for key, value in setting.items()) or "chart defaults"
+
+
+def pareto_front(trials: List[Dict[str, Any]], latency: str) -> List[Dict[str, Any]]:
+    """Trials no other trial beats on both output tokens/s (higher) and the latency metric (lower)"""
+    front = []
+    for trial in trials:
+        t, l = trial["summary"]["output_tokens_per_second"], trial["summary"][latency]
+        dominated = any(o["summary"]["output_tokens_per_second"] >= t and o["summary"][latency] <= l
+                        and (o["summary"]["output_tokens_per_second"] > t or o["summary"][latency] < l)
+                        for o in trials if o is not trial)
+        if not dominated:
+            front.append(trial)
+    return sorted(front, key=lambda trial: trial["summary"]["output_tokens_per_second"])
+
+
+def recommend(front: List[Dict[str, Any]], latency: str, slo: Optional[float]) -> Optional[Dict[str, Any]]:
+    """Fastest front point within the SLO; without one, the knee (best normalized throughput minus latency)"""
+    if not front:
+        return None
+    if slo is not None:
+        within = [trial for trial in front if trial["summary"][latency] <= slo]
+        if within:
+            return max(within, key=lambda trial: trial["summary"]["output_tokens_per_second"])
+        return min(front, key=lambda trial: trial["summary"][latency])
+    throughputs = [trial["summary"]["output_tokens_per_second"] for trial in front]
+    latencies = [trial["summary"][latency] for trial in front]
+    t_span = (max(throughputs) - min(throughputs)) or 1.0
+    l_span = (max(latencies) - min(latencies)) or 1.0
+    return max(front, key=lambda trial: (trial["summary"]["output_tokens_per_second"] - min(throughputs)) / t_span
+               - (trial["summary"][latency] - min(latencies)) / l_span)
+
+
+class HelmBackend:
+    """Rolls each setting out with helm and reaches Ollama through a port-forward (or --url)"""
+
+    def __init__(self, release: str, chart: str, namespace: str, values: List[str],
+                 url: Optional[str] = None, timeout: str = "15m", render_only: bool = False):
+        import subprocess
+        import tempfile
+
+        self.subprocess = subprocess
+        self.release = release
+        self.chart = chart
+        self.namespace = namespace
+        self.values = values
+        self.url = url
+        self.timeout = timeout
+        self.render_only = render_only
+        self.workdir = tempfile.mkdtemp(prefix="ollama-tune-")
+        self.forward = None
+        # Set once an upgrade has been started, so an interrupted first rollout is rolled back too
+        self.changed = False
+
+    def _run(self, args: List[str]) -> str:
+        result = self.subprocess.run(args, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args[:2])} failed: {result.stderr.strip()[-400:]}")
+        return result.stdout
+
+    def _helm(self, verb: List[str], overlay: Optional[Dict[str, Any]]) -> str:
+        args = ["helm"] + verb + [self.release, self.chart, "--namespace", self.namespace]
+        for path in self.values:
+            args += ["-f", path]
+        if overlay is not None:
+            path = os.path.join(self.workdir, "overlay.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(to_yaml(overlay) + "\n")
+            args += ["-f", path]
+        return self._run(args)
+
+    def revision(self) -> Optional[int]:
+        """The deployed revision of the release (None if it is not installed); its values are saved to the workdir"""
+        try:
+            history = json.loads(self._run(["helm", "history", self.release, "--namespace", self.namespace,
+                                            "-o", "json"]) or "[]")
+        except RuntimeError as e:
+            if "not found" in str(e):
+                return None
+            raise
+        deployed = [entry for entry in history if entry.get("status") == "deployed"] or history
+        if not deployed:
+            return None
+        revision = int(deployed[-1]["revision"])
+        with open(os.path.join(self.workdir, f"values-revision-{revision}.yaml"), "w", encoding="utf-8") as f:
+            f.write(self._run(["helm", "get", "values", self.release, "--namespace", self.namespace,
+                               "--revision", str(revision), "-o", "yaml"]))
+        return revision
+
+    def rollback(self, revision: int):
+        """Return the release to revision, with the values it was installed with"""
+        self._stop_forward()
+        self._run(["helm", "rollback", self.release, str(revision), "--namespace", self.namespace,
+                   "--wait", "--timeout", self.timeout])
+
+    def render(self, overlay: Dict[str, Any], name: str) -> str:
+        """helm template with the overlay; returns the path of the rendered manifests"""
+        path = os.path.join(self.workdir, f"{name}.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self._helm(["template"], overlay))
+        return path
+
+    def apply(self, overlay: Optional[Dict[str, Any]]) -> str:
+        """Roll out the overlay (None restores the plain values) and return a URL for the Ollama API"""
+        self._stop_forward()
+        self.changed = True
+        self._helm(["upgrade", "--install", "--wait", "--timeout", self.timeout], overlay)
+        self.subprocess.run(["kubectl", "rollout", "status", "deployment/ollama", "-n", self.namespace,
+                             f"--timeout={self.timeout}"], capture_output=True, check=False)
+        if self.url:
+            return self.url
+        port = _free_port()
+        self.forward = self.subprocess.Popen(
+            ["kubectl", "port-forward", "-n", self.namespace, "svc/ollama-service", f"{port}:11434"],
+            stdout=self.subprocess.DEVNULL, stderr=self.subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return f"http://127.0.0.1:{port}"
+            except OSError:
+                time.sleep(0.5)
+        raise RuntimeError("kubectl port-forward to ollama-service did not come up")
+
+    def _stop_forward(self):
+        if self.forward is not None:
+            self.forward.terminate()
+            self.forward.wait()
+            self.forward = None
+
+    def close(self):
+        self._stop_forward()
+
+
+class FakeBackend:
+    """Runs each setting on the bundled fake server: slots from numParallel, speed from the CPU limit"""
+
+    def __init__(self, models: List[str], token_delay: float = 0.01, contention: float = 0.35,
+                 reference_cpu: float = 20.0):
+        self.models = models
+        self.token_delay = token_delay
+        self.contention = contention
+        self.reference_cpu = reference_cpu
+        self.server = None
+        self.render_only = False
+
+    def apply(self, overlay: Optional[Dict[str, Any]]) -> str:
+        from fake_ollama import FakeOllama, serve as serve_fake
+
+        self.close()
+        ollama = (overlay or {}).get("ollama", {})
+        config = ollama.get("config", {})
+        cpu = ollama.get("resources", {}).get("limits", {}).get("cpu")
+        scale = self.reference_cpu / cpu_cores(cpu) if cpu else 1.0
+        fake = FakeOllama(self.models, token_delay=self.token_delay * scale, load_delay=0.05,
+                          num_parallel=int(config.get("numParallel", 4)),
+                          max_loaded=int(config.get("maxLoadedModels", 2)), contention=self.contention)
+        self.server = serve_fake(fake, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_workload(url: str, corpus: List[Dict[str, Any]], args) -> Dict[str, Any]:
+    generator = LoadGenerator(url, corpus, args.model, args.max_tokens, seed=args.seed)
+    for model in sorted({entry.get("model") or args.model for entry in corpus}):
+        generator.send({"prompt": "hi", "model": model, "_id": -1})
+    generator.reset()
+    if args.rate:
+        generator.run_open(args.rate, args.requests, args.duration)
+    else:
+        generator.run_closed(args.concurrency, args.requests, args.duration)
+    summary = generator.summary()
+    return {key: summary.get(key) for key in KEPT}
+
+
+def write_overlay(path: str, trial: Dict[str, Any], latency: str, workload: str):
+    summary = trial["summary"]
+    header = [
+        "# Generated by scripts/ollama/tune.py; layer it after your other values files:",
+        f"#   helm upgrade --install ollama-stack charts/ollama-stack -f values-local.yaml -f {os.path.basename(path)}",
+        f"# Swept {datetime.now(timezone.utc).isoformat(timespec='seconds')} with {workload}",
+        f"# Result: {summary['output_tokens_per_second']:.1f} output tokens/s, {latency} {summary[latency]:.3f}s,"
+        f" {100 * summary['error_rate']:.1f}% errors",
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(header) + "\n" + to_yaml(overlay_for(trial["setting"])) + "\n")
+
+
+def run_sweep(backend, settings: List[Dict[str, Any]], corpus: List[Dict[str, Any]], args,
+              trials: List[Dict[str, Any]]):
+    """Run the workload on each setting, appending to trials; Ctrl-C ends the sweep with the finished ones"""
+    try:
+        for i, setting in enumerate(settings, 1):
+            name = label(setting)
+            if backend.render_only:
+                path = backend.render(overlay_for(setting), f"trial-{i}")
+                print(f"📄 [{i}/{len(settings)}] {name}: {path}", flush=True)
+                continue
+            print(f"⏳ [{i}/{len(settings)}] {name}", flush=True)
+            try:
+                url = backend.apply(overlay_for(setting))
+                summary = run_workload(url, corpus, args)
+            except (RuntimeError, OSError) as e:
+                print(f"   ❌ {e}", flush=True)
+                trials.append({"setting": setting, "error": str(e)})
+                continue
+            trials.append({"setting": setting, "summary": summary})
+            print(f"   {summary['output_tokens_per_second']:.1f} tok/s, {summary['throughput_rps']:.2f} req/s,"
+                  f" {args.latency} {summary[args.latency]}s, {100 * summary['error_rate']:.1f}% errors", flush=True)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; reporting the finished settings")
+
+
+def report(trials: List[Dict[str, Any]], args, workload: str) -> Optional[Dict[str, Any]]:
+    """Print the trials table, write --output and return the recommended trial"""
+    usable = [t for t in trials if "summary" in t and t["summary"][args.latency] is not None
+              and t["summary"]["error_rate"] <= args.max_error_rate]
+    front = pareto_front(usable, args.latency)
+    best = recommend(front, args.latency, args.slo)
+
+    print(f"\n{'setting':36}{'tok/s':>10}{'req/s':>9}{args.latency:>14}{'errors':>9}")
+    for trial in sorted(trials, key=lambda t: -t.get("summary", {}).get("output_tokens_per_second", -1)):
+        if "summary" not in trial:
+            print(f"{label(trial['setting']):36}{'failed':>10}")
+            continue
+        s = trial["summary"]
+        mark = " ✅ recommended" if trial is best else (" ★ pareto" if trial in front else "")
+        print(f"{label(trial['setting']):36}{s['output_tokens_per_second']:>10.1f}{s['throughput_rps']:>9.2f}"
+              f"{s[args.latency]:>14.3f}{100 * s['error_rate']:>8.1f}%{mark}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"workload": workload, "latency": args.latency, "slo": args.slo, "trials": trials,
+                       "front": [label(t["setting"]) for t in front],
+                       "recommended": best["setting"] if best else None}, f, indent=2)
+        print(f"💾 Trials written to {args.output}")
+    return best
+
+
+def main():
+    """Sweep Ollama settings and recommend a values overlay"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark a grid of Ollama settings and recommend one')
+    grid = parser.add_argument_group('grid (comma-separated; omitted dimensions keep the chart value)')
+    grid.add_argument('--num-parallel', default='1,2,4,8', help='OLLAMA_NUM_PARALLEL values (default: 1,2,4,8)')
+    grid.add_argument('--max-loaded', help='OLLAMA_MAX_LOADED_MODELS values, e.g. 1,2')
+    grid.add_argument('--cpu', help='CPU limits, e.g. 10000m,20000m')
+    grid.add_argument('--memory', help='Memory limits, e.g. 48Gi,64Gi')
+    chart = parser.add_argument_group('chart')
+    chart.add_argument('-f', '--values', action='append', default=[], help='Values files applied before each overlay')
+    chart.add_argument('--release', default='ollama-stack', help='Helm release (default: ollama-stack)')
+    chart.add_argument('--namespace', default='ollama-stack', help='Namespace (default: ollama-stack)')
+    chart.add_argument('--chart', default=CHART_DIR, help='Chart path')
+    chart.add_argument('--url', help='Ollama URL to benchmark instead of a port-forward to ollama-service')
+    chart.add_argument('--render-only', action='store_true', help='Only render each setting with helm template')
+    chart.add_argument('--apply-best', action='store_true', help='Leave the recommended setting deployed')
+    work = parser.add_argument_group('workload (see loadgen.py)')
+    work.add_argument('--model', default=os.environ.get("LOADGEN_MODEL", "codellama:13b"), help='Model to load')
+    work.add_argument('--prompts', help='Prompt corpus (default: built-in)')
+    work.add_argument('--concurrency', '-c', type=int, default=8, help='Closed-loop clients (default: 8)')
+    work.add_argument('--rate', type=float, help='Open-loop arrivals per second instead of --concurrency')
+    work.add_argument('--requests', '-n', type=int, default=40, help='Requests per setting (default: 40)')
+    work.add_argument('--duration', type=float, help='Seconds per setting instead of --requests')
+    work.add_argument('--max-tokens', type=int, default=128, help='num_predict per request (default: 128)')
+    work.add_argument('--seed', type=int, default=1, help='Seed for open-loop arrivals')
+    result = parser.add_argument_group('result')
+    result.add_argument('--latency', default='latency_p95', choices=['latency_p95', 'ttft_p95', 'latency_p50', 'ttft_p50'],
+                        help='Latency metric for the Pareto front (default: latency_p95)')
+    result.add_argument('--slo', type=float, help='Seconds the latency metric may reach; picks the fastest within it')
+    result.add_argument('--max-error-rate', type=float, default=0.01, help='Settings with more errors are discarded')
+    result.add_argument('--write', default=DEFAULT_OVERLAY, help=f'Recommended overlay (default: {DEFAULT_OVERLAY})')
+    result.add_argument('--output', '-o', help='All trials as JSON')
+    parser.add_argument('--fake', action='store_true', help='Sweep the bundled fake server instead of a cluster')
+    parser.add_argument('--fake-contention', type=float, default=0.35, help='Fake per-stream slowdown (default: 0.35)')
+    args = parser.parse_args()
+    if args.duration:
+        args.requests = None
+
+    settings = make_grid(parse_list(args.num_parallel, int), parse_list(args.max_loaded, int),
+                         parse_list(args.cpu), parse_list(args.memory))
+    corpus = load_corpus(args.prompts)
+    if args.fake:
+        backend = FakeBackend(sorted({entry.get("model") or args.model for entry in corpus}),
+                              contention=args.fake_contention)
+    else:
+        backend = HelmBackend(args.release, args.chart, args.namespace, args.values, args.url,
+                              render_only=args.render_only)
+    workload = (f"{args.rate}/s open loop" if args.rate else f"{args.concurrency} clients") + \
+               f", {args.requests or args.duration} {'requests' if args.requests else 's'}, {args.max_tokens} tokens"
+    print(f"🎛️  Sweeping {len(settings)} setting(s) with {workload}", flush=True)
+
+    trials: List[Dict[str, Any]] = []
+    helm = isinstance(backend, HelmBackend) and not backend.render_only
+    try:
+        original = backend.revision() if helm else None
+    except (RuntimeError, OSError, ValueError) as e:
+        print(f"❌ Could not read the history of {args.release}: {e}")
+        sys.exit(1)
+    applied = False
+    try:
+        run_sweep(backend, settings, corpus, args, trials)
+        if backend.render_only:
+            return
+        best = report(trials, args, workload)
+        if best is None:
+            print("❌ No setting met the error budget; nothing written")
+            sys.exit(1)
+        write_overlay(args.write, best, args.latency, workload)
+        print(f"📝 Recommended {label(best['setting'])} written to {args.write}")
+        if helm and args.apply_best:
+            print("🚀 Applying the recommended setting")
+            backend.values.append(args.write)
+            backend.apply(None)
+            applied = True
+    finally:
+        # Whatever stopped the sweep, the cluster goes back to where it was unless the recommendation was rolled out
+        if helm and backend.changed and not applied:
+            if original is None:
+                print(f"⚠️  Release {backend.release} was not installed before the sweep; left on the last setting")
+            else:
+                print(f"↩️  Rolling {backend.release} back to revision {original}", flush=True)
+                try:
+                    backend.rollback(original)
+                except (RuntimeError, OSError) as e:
+                    print(f"⚠️  Rollback failed: {e}; run: helm rollback {backend.release} {original} "
+                          f"-n {backend.namespace}")
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
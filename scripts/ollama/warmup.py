@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Ollama Warmup Scheduler
+Preloads models shortly before they are usually needed, so the first
+requests of the day (or after a quiet spell) do not pay for a cold load
+
+- Demand: per-model request counts from the metrics exporter, learned per
+  quarter-hour with weekdays and weekends kept apart, decaying day by day
+- Plan: the models expected in the next --lookahead seconds, most demanded
+  first, up to OLLAMA_MAX_LOADED_MODELS and the memory limit (sizes from
+  /api/ps once seen loaded, else the model size plus a margin)
+- Act: a prompt-less /api/generate with keep_alive loads a model or extends
+  its stay; a loaded model is unloaded (keep_alive 0) to make room only
+  when it is expected to be needed less and has been idle for --idle
+- Report: cold loads (exporter ollama_cold_loads_total) per day, split into
+  days before and after the scheduler was preloading
+
+No external dependencies required.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import urllib.error
+import urllib.request
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from ollama_proxy import Upstream, UpstreamError
+from model_eviction import scrape_counts
+from model_sync import normalize, human_bytes, parse_size
+
+SLOT_MINUTES = 15
+DEFAULT_STATE = os.path.expanduser("~/.cache/ollama-stack/warmup.json")
+# Memory beyond the weights for a model never seen loaded (KV cache, graph buffers)
+MEMORY_MARGIN = 1.2
+
+
+def slot_of(moment: datetime) -> str:
+    kind = "weekend" if moment.weekday() >= 5 else "weekday"
+    return f"{kind}:{(moment.hour * 60 + moment.minute) // SLOT_MINUTES}"
+
+
+def parse_expiry(text: str) -> Optional[datetime]:
+    """Ollama's expires_at (RFC 3339 with nanoseconds) as an aware datetime"""
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(re.sub(r"\.\d+", "", text).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class DemandProfile:
+    """Per-model request counts by quarter-hour of weekdays and weekends, plus cold-load history"""
+
+    def __init__(self, path: Optional[str], decay: float = 0.9):
+        self.path = path
+        self.decay = decay
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, Dict[str, float]] = {}
+        self.days: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.models = data.get("models", {})
+                self.counters.update(data.get("counters", {}))
+                self.days = data.get("days", {})
+            except (OSError, ValueError):
+                pass
+
+    def model(self, name: str) -> Dict[str, Any]:
+        return self.models.setdefault(name, {"slots": {}, "memory": 0, "last_used": 0.0})
+
+    def _deltas(self, kind: str, counters: Optional[Dict[str, float]]) -> Dict[str, float]:
+        if counters is None:
+            return {}
+        # The very first scrape only sets the baseline; after that new models count from zero
+        first = kind not in self.counters
+        previous = self.counters.setdefault(kind, {})
+        deltas = {}
+        for name, value in counters.items():
+            last = previous.get(name, 0.0)
+            if not first:
+                # A smaller counter means the exporter restarted
+                deltas[name] = value - last if value >= last else value
+            previous[name] = value
+        return deltas
+
+    def learn(self, requests: Optional[Dict[str, float]], cold: Optional[Dict[str, float]],
+              moment: datetime, active: bool):
+        """Fold exporter counters (None when the scrape failed) into the profile"""
+        today = moment.date()
+        slot = slot_of(moment)
+        for name, delta in self._deltas("requests", requests).items():
+            if delta <= 0:
+                continue
+            entry = self.model(name)
+            value, day = entry["slots"].get(slot, [0.0, today.toordinal()])
+            entry["slots"][slot] = [value * self.decay ** (today.toordinal() - day) + delta, today.toordinal()]
+            entry["last_used"] = moment.timestamp()
+        record = self.days.setdefault(today.isoformat(), {"active": False, "cold": {}})
+        record["active"] = record["active"] or active
+        for name, delta in self._deltas("cold", cold).items():
+            if delta > 0:
+                record["cold"][name] = record["cold"].get(name, 0) + delta
+
+    def predict(self, name: str, moment: datetime, horizon: float) -> float:
+        """Expected requests for a model from now until now + horizon seconds"""
+        slots = self.models.get(name, {}).get("slots", {})
+        today = moment.date().toordinal()
+        total, seen = 0.0, set()
+        step = timedelta(minutes=SLOT_MINUTES)
+        cursor = moment
+        while cursor <= moment + timedelta(seconds=horizon):
+            slot = slot_of(cursor)
+            if slot not in seen and slot in slots:
+                value, day = slots[slot]
+                total += value * self.decay ** (today - day)
+            seen.add(slot)
+            cursor += step
+        return total
+
+    def cold_report(self) -> Dict[str, Any]:
+        """Mean cold loads per day before and after preloading started"""
+        report: Dict[str, Any] = {}
+        for label, active in (("before", False), ("after", True)):
+            days = {d: r for d, r in self.days.items() if r["active"] == active}
+            per_model: Dict[str, float] = {}
+            for record in days.values():
+                for name, count in record["cold"].items():
+                    per_model[name] = per_model.get(name, 0) + count
+            total = sum(per_model.values())
+            report[label] = {"days": len(days), "cold_loads": int(total),
+                             "per_day": round(total / len(days), 2) if days else None,
+                             "models": {name: int(count) for name, count in sorted(per_model.items())}}
+        return report
+
+    def save(self, keep_days: int = 90):
+        if not self.path:
+            return
+        cutoff = (date.today() - timedelta(days=keep_days)).isoformat()
+        self.days = {d: r for d, r in self.days.items() if d >= cutoff}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "models": self.models, "counters": self.counters,
+                       "days": self.days}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class WarmupController:
+    """Learns demand, plans which models should be resident and preloads them"""
+
+    def __init__(self, upstream: Upstream, profile: DemandProfile, metrics_url: Optional[str],
+                 max_loaded: int = 2, memory_limit: int = 0, lookahead: float = 1800.0,
+                 keep_alive: str = "30m", min_demand: float = 1.0, idle: float = 600.0, dry_run: bool = False):
+        self.upstream = upstream
+        self.profile = profile
+        self.metrics_url = metrics_url
+        self.max_loaded = max(1, max_loaded)
+        self.memory_limit = memory_limit
+        self.lookahead = lookahead
+        self.keep_alive = keep_alive
+        self.min_demand = min_demand
+        self.idle = idle
+        self.dry_run = dry_run
+
+    def scrape(self) -> str:
+        """Exporter metrics text, or '' when unavailable"""
+        if not self.metrics_url:
+            return ""
+        try:
+            with urllib.request.urlopen(self.metrics_url, timeout=10) as response:
+                return response.read().decode("utf-8", "replace")
+        except (urllib.error.URLError, OSError):
+            return ""
+
+    def loaded(self) -> Dict[str, Dict[str, Any]]:
+        models = self.upstream.json("GET", "/api/ps").get("models") or []
+        return {normalize(m.get("name") or m.get("model", "")): m for m in models}
+
+    def installed(self) -> Dict[str, int]:
+        models = self.upstream.json("GET", "/api/tags").get("models") or []
+        return {normalize(m.get("name") or m.get("model", "")): m.get("size", 0) for m in models}
+
+    def memory_of(self, name: str, installed: Dict[str, int]) -> int:
+        return self.profile.model(name)["memory"] or int(installed.get(name, 0) * MEMORY_MARGIN)
+
+    def plan(self, moment: datetime, installed: Dict[str, int],
+             loaded: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Actions (load, extend, unload) that bring the expected models into memory"""
+        demand = {name: self.profile.predict(name, moment, self.lookahead) for name in installed}
+        wanted: List[str] = []
+        memory = 0
+        for name in sorted(demand, key=demand.get, reverse=True):
+            need = self.memory_of(name, installed)
+            if demand[name] < self.min_demand or len(wanted) >= self.max_loaded:
+                break
+            if self.memory_limit and memory + need > self.memory_limit:
+                continue
+            wanted.append(name)
+            memory += need
+
+        actions: List[Dict[str, Any]] = []
+        resident = dict(loaded)
+        horizon = moment.astimezone() + timedelta(seconds=self.lookahead)
+        for name in wanted:
+            if name in resident:
+                expiry = parse_expiry(resident[name].get("expires_at", ""))
+                if expiry and expiry < horizon:
+                    actions.append({"action": "extend", "model": name, "demand": round(demand[name], 2)})
+                continue
+            need = self.memory_of(name, installed)
+            while True:
+                used = sum(self.memory_of(n, installed) for n in resident)
+                if len(resident) < self.max_loaded and (not self.memory_limit or used + need <= self.memory_limit):
+                    break
+                now = moment.timestamp()
+                victims = [n for n in resident if n not in wanted
+                           and now - self.profile.model(n)["last_used"] >= self.idle]
+                if not victims:
+                    break
+                victim = min(victims, key=lambda n: demand.get(n, 0.0))
+                actions.append({"action": "unload", "model": victim, "demand": round(demand.get(victim, 0.0), 2)})
+                del resident[victim]
+            used = sum(self.memory_of(n, installed) for n in resident)
+            if len(resident) < self.max_loaded and (not self.memory_limit or used + need <= self.memory_limit):
+                actions.append({"action": "load", "model": name, "demand": round(demand[name], 2),
+                                "memory": need})
+                resident[name] = {}
+        return actions
+
+    def step(self, moment: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Learn from the exporter, then plan and (unless dry-run) apply; returns the actions"""
+        moment = moment or datetime.now()
+        text = self.scrape()
+        self.profile.learn(scrape_counts(text) if text else None,
+                           scrape_counts(text, "ollama_cold_loads_total") if text else None,
+                           moment, active=not self.dry_run)
+        installed = self.installed()
+        loaded = self.loaded()
+        for name, model in loaded.items():
+            if model.get("size"):
+                self.profile.model(name)["memory"] = model["size"]
+        actions = self.plan(moment, installed, loaded)
+        if not self.dry_run:
+            for action in actions:
+                keep_alive = 0 if action["action"] == "unload" else self.keep_alive
+                started = time.monotonic()
+                try:
+                    self.upstream.json("POST", "/api/generate", {"model": action["model"], "keep_alive": keep_alive})
+                    action["seconds"] = round(time.monotonic() - started, 2)
+                except (UpstreamError, ValueError) as e:
+                    action["error"] = str(e)
+        self.profile.save()
+        return actions
+
+
+def main():
+    """Preload models ahead of their usual demand"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Learned model preloading for Ollama')
+    parser.add_argument('command', nargs='?', choices=['run', 'once', 'plan', 'report'], default='plan',
+                        help="'run' loops, 'once' acts once, 'plan' shows what would be done, 'report' shows cold loads")
+    parser.add_argument('--url', default=os.environ.get("OLLAMA_URL", "http://127.0.0.1:11434"),
+                        help='Ollama API URL, ideally not through the exporter (default: http://127.0.0.1:11434)')
+    parser.add_argument('--metrics-url', default=os.environ.get("EXPORTER_METRICS_URL", "http://127.0.0.1:11435/metrics"),
+                        help='Metrics exporter endpoint for request and cold-load counts')
+    parser.add_argument('--max-loaded', type=int, default=int(os.environ.get("OLLAMA_MAX_LOADED_MODELS", "2")),
+                        help='Models Ollama keeps loaded, as OLLAMA_MAX_LOADED_MODELS (default: 2)')
+    parser.add_argument('--memory-limit', default='0', help='Memory available to loaded models (e.g. 60Gi)')
+    parser.add_argument('--lookahead', type=float, default=1800.0,
+                        help='Seconds of expected demand to prepare for (default: 1800)')
+    parser.add_argument('--keep-alive', default='30m', help='keep_alive for preloaded models (default: 30m)')
+    parser.add_argument('--min-demand', type=float, default=1.0,
+                        help='Expected requests in the lookahead needed to preload (default: 1)')
+    parser.add_argument('--idle', type=float, default=600.0,
+                        help='Seconds unused before a loaded model may be unloaded for another (default: 600)')
+    parser.add_argument('--decay', type=float, default=0.9, help='Daily decay of learned demand (default: 0.9)')
+    parser.add_argument('--state', default=os.environ.get("WARMUP_STATE", DEFAULT_STATE),
+                        help=f'Learned demand file (default: {DEFAULT_STATE})')
+    parser.add_argument('--interval', type=float, default=60.0, help="Seconds between steps for 'run'")
+    parser.add_argument('--observe', action='store_true',
+                        help="Learn and count cold loads without preloading (the 'before' baseline)")
+    parser.add_argument('--json', action='store_true', help='Print actions or the report as JSON')
+    args = parser.parse_args()
+
+
+    profile = DemandProfile(args.state, args.decay)
+    if args.command == 'report':
+        report = profile.cold_report()
+        if args.json:
+            print(json.dumps(report, indent=2))
+            return
+        for label in ("before", "after"):
+            entry = report[label]
+            per_day = "n/a" if entry["per_day"] is None else f"{entry['per_day']:.2f}/day"
+            print(f"{'🥶' if label == 'before' else '🔥'} {label:6} preloading: {entry['cold_loads']} cold loads"
+                  f" over {entry['days']} day(s), {per_day}")
+            for name, count in entry["models"].items():
+                print(f"     {name}: {count}")
+        return
+
+    controller = WarmupController(
+        Upstream(args.url, timeout=600), profile, args.metrics_url, args.max_loaded,
+        parse_size(args.memory_limit), args.lookahead, args.keep_alive, args.min_demand, args.idle,
+        dry_run=args.command == 'plan' or args.observe)
+
+    def show(actions: List[Dict[str, Any]]):
+        if args.json:
+            print(json.dumps(actions, indent=2), flush=True)
+            return
+        icons = {"load": "🔥", "extend": "⏳", "unload": "💤"}
+        for action in actions:
+            detail = f"expected {action['demand']} requests"
+            if action.get("memory"):
+                detail += f", ~{human_bytes(action['memory'])}"
+            if action.get("error"):
+                print(f"❌ {action['action']} {action['model']}: {action['error']}", flush=True)
+            else:
+                verb = action["action"] if not controller.dry_run else f"would {action['action']}"
+                took = f" in {action['seconds']}s" if "seconds" in action else ""
+                print(f"{icons[action['action']]} {verb} {action['model']} ({detail}){took}", flush=True)
+
+    try:
+        if args.command != 'run':
+            actions = controller.step()
+            if not actions and not args.json:
+                print("✅ Expected models are already loaded")
+            show(actions)
+            return
+        mode = "observing" if args.observe else f"up to {args.max_loaded} models, {args.lookahead:.0f}s ahead"
+        print(f"🌅 Warmup scheduler {mode}, every {args.interval:.0f}s", flush=True)
+        while True:
+            try:
+                show(controller.step())
+            except (UpstreamError, ValueError) as e:
+                print(f"⚠️  {e}", flush=True)
+            time.sleep(args.interval)
+    except (UpstreamError, ValueError) as e:
+        print(f"❌ Could not reach Ollama at {args.url}: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n👋 Stopping warmup scheduler")
+
+
+if __name__ == "__main__":
+    main()